@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+
+Time Parse.__clear_differences, which compiles its patterns once and only applies a pattern
+to a line which contains its markup, against the previous implementation, which applied
+every pattern to each line, over the lines of a generated diff of a large article.
+
+    python benchmarks/clear_differences.py
+"""
+
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from fake import FakeTransport
+from reference import clear_differences
+from parsewiki.page import Parse
+
+words = [
+    'Python', 'is', 'a', 'widely', 'used', 'high-level', 'programming', 'language', 'for',
+    'general-purpose', 'programming', 'created', 'by', 'Guido', 'van', 'Rossum', 'and', 'first',
+    'released', 'in', '1991', 'its', 'design', 'philosophy', 'emphasizes', 'code', 'readability'
+]
+
+markup = [
+    "'''%s'''", "''%s''", '[[%s]]', '[[Python (programming language)|%s]]', '%s<ref>A reference.</ref>',
+    '%s<ref name="a" />', '{{citation needed}}%s', '[[File:Logo.png|thumb|%s]]', '== %s =='
+]
+
+def lines(count=4000, seed=15):
+    """
+    Get the lines of the differences of a large article, most of them with some markup.
+    """
+
+    rng = random.Random(seed)
+    result = []
+
+    for i in range(count):
+
+        text = [rng.choice(words) for _ in range(rng.randint(8, 60))]
+
+        for j in range(rng.randint(0, 4)):
+            k = rng.randrange(len(text))
+            text[k] = rng.choice(markup) % text[k]
+
+        result.append(' '.join(text))
+
+    return result
+
+def best(function, content, repeat):
+    """
+    Get the shortest time in milliseconds of several runs over all lines.
+    """
+
+    times = []
+
+    for i in range(repeat):
+
+        start = time.perf_counter()
+
+        for line in content:
+            function(line)
+
+        times.append(time.perf_counter() - start)
+
+    return min(times) * 1000
+
+def main():
+
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    # The patterns of the previous implementation give a FutureWarning
+    warnings.simplefilter('ignore', FutureWarning)
+
+    wiki = Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None))
+    content = lines()
+
+    before = best(clear_differences, content, 5)
+    after = best(wiki._Parse__clear_differences, content, 5)
+
+    print('%d lines %8.1f ms -> %6.1f ms (%.1fx)' % (len(content), before, after, before / after))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+
+Time Parse.__clear_html, which clears the html of a page in a single walk, against the 
+previous implementation, which searched the page once for each type of tag.
+
+    python benchmarks/clear_html.py
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import bs4 as bs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from pages import article
+from fake import FakeTransport
+from reference import clear_html
+from parsewiki.page import Parse
+
+def best(function, html, parser, repeat):
+    """
+    Get the shortest time in milliseconds of several runs, without parsing the html.
+    """
+
+    times = []
+
+    for i in range(repeat):
+
+        soup = bs.BeautifulSoup(html, parser)
+
+        start = time.perf_counter()
+        function(soup)
+        times.append(time.perf_counter() - start)
+
+    return min(times) * 1000
+
+def main():
+
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    pages = [('560 KB article', article(), 5), ('6 KB page', article(sections=1, references=5), 50)]
+
+    for parser in ('lxml', 'html.parser'):
+
+        wiki = Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None), parser=parser)
+
+        def walk(soup):
+            wiki._Parse__clear_html(soup.select_one(wiki._css_selector), True)
+
+        def search(soup):
+            clear_html(soup, True)
+
+        for name, html, repeat in pages:
+
+            before = best(search, html, parser, repeat)
+            after = best(walk, html, parser, repeat)
+
+            print('%-15s %-12s %8.1f ms -> %6.1f ms (%.1fx)' % (name, parser, before, after, before / after))
+
+if __name__ == '__main__':
+    main()
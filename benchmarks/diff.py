@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+
+Time the local comparison of consecutive revisions (Diff.compare and Diff.words) over a 
+generated history of a large article, and the worst case in which every paragraph of a 
+revision is changed, with and without the window of Diff.
+
+    python benchmarks/diff.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parsewiki.diff import Diff
+
+words = [
+    'Python', 'is', 'a', 'widely', 'used', 'high-level', 'programming', 'language', 'for',
+    'general-purpose', 'programming', 'created', 'by', 'Guido', 'van', 'Rossum', 'and', 'first',
+    'released', 'in', '1991', 'its', 'design', 'philosophy', 'emphasizes', 'code', 'readability'
+]
+
+def sentence(rng):
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(8, 40))) + '.'
+
+def history(revisions=500, paragraphs=400, seed=17):
+    """
+    Generate the sections of consecutive revisions, each revision changes, adds or removes 
+    a few paragraphs of its predecessor.
+    """
+
+    rng = random.Random(seed)
+
+    text = [sentence(rng) for _ in range(paragraphs)]
+    result = []
+
+    for i in range(revisions):
+
+        for j in range(rng.randint(1, 4)):
+
+            k = rng.randrange(len(text))
+            edit = rng.random()
+
+            if edit < 0.6:
+                split = text[k].split()
+                split[rng.randrange(len(split))] = rng.choice(words)
+                text[k] = ' '.join(split)
+            elif edit < 0.8:
+                text.insert(k, sentence(rng))
+            else:
+                del text[k]
+
+        # Twenty paragraphs per section
+        result.append({
+            s : {'header' : 'Section %d' % s, 'content' : '\n'.join(text[s * 20:(s + 1) * 20])}
+            for s in range((len(text) + 19) // 20)
+        })
+
+    return result
+
+def main():
+
+    revisions = history()
+    diff = Diff()
+
+    start = time.perf_counter()
+    differences = [diff.compare(previous, revision) for previous, revision in zip(revisions, revisions[1:])]
+    compare = time.perf_counter() - start
+
+    start = time.perf_counter()
+    [diff.words(difference) for difference in differences]
+    words = time.perf_counter() - start
+
+    pairs = len(differences)
+
+    print('history of %d revisions' % len(revisions))
+    print('  compare  %8.1f ms (%.2f ms per revision)' % (compare * 1000, compare * 1000 / pairs))
+    print('  words    %8.1f ms (%.3f ms per revision)' % (words * 1000, words * 1000 / pairs))
+
+    # Every paragraph is changed, so all paragraphs are paired in one block
+    rng = random.Random(1)
+
+    original = revisions[0]
+    revision = {
+        key : {'header' : section['header'], 'content' : '\n'.join(sentence(rng) for _ in section['content'].split('\n'))}
+        for key, section in original.items()
+    }
+
+    for window in (20, 1000):
+
+        start = time.perf_counter()
+        Diff(window=window).compare(original, revision)
+
+        print('all paragraphs changed, window %4d  %8.1f ms' % (window, (time.perf_counter() - start) * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+
+Measure the memory of a saved history of revisions, loaded as plain dicts (json.loads) 
+and as slotted Page, Revision and Section records. Identical sections are not shared in 
+either case, so only the layout of the records is measured.
+
+    python benchmarks/memory.py [revisions]
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parsewiki.records import Page
+
+def history(revisions, seed=24):
+    """
+    Generate a json wiki object with the history of an article of 15 sections and 60 
+    references. Each revision changes one section and one reference of its predecessor.
+    """
+
+    rng = random.Random(seed)
+
+    sections = [
+        {'header' : 'Header %d' % k, 'content' : '\n'.join('Paragraph %d.%d ' % (k, p) + 'word ' * 80 for p in range(5))}
+        for k in range(15)
+    ]
+    references = ['Author %d (2017). "Title %d". Journal.' % (k, k) for k in range(60)]
+    links = ['https://example.org/%d' % k for k in range(40)]
+
+    result = {}
+
+    for i in range(revisions):
+
+        k = rng.randrange(15)
+        sections[k] = dict(sections[k], content=sections[k]['content'] + ' edit %d' % i)
+        references[rng.randrange(60)] = 'Changed reference %d.' % i
+
+        result[str(i)] = {
+            'oldid' : str(10 ** 6 + i), 'date' : '2017-08-%02dT10:00:00Z' % (1 + i % 28),
+            'user' : 'User%d' % (i % 50), 'comment' : 'edit %d' % i, 'size' : 40000 + i, 'empty' : False,
+            'sections' : {str(j) : dict(section) for j, section in enumerate(sections)},
+            'references' : list(references), 'externallinks' : list(links), 'previous' : 10 ** 6 + i - 1,
+            'differences' : {'original' : [], 'difference' : []}
+        }
+
+    page = {
+        'language' : 'en', 'date' : '2017-09-01T00:00:00Z', 'title' : 'Python',
+        'sections' : {'0' : {'header' : 'Summary', 'content' : 'Python'}},
+        'references' : [], 'externallinks' : [], 'previous' : 0, 'revisions' : result
+    }
+
+    return json.dumps({'id' : '23862', 'language' : 'en', 'pages' : {'0' : page}})
+
+def measure(load, text):
+    """
+    Get the memory in bytes which is kept by the loaded object.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+
+    result = load(text)
+
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return result, size
+
+def main():
+
+    revisions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    text = history(revisions)
+
+    def records(text):
+        return Page(json.loads(text)['pages']['0'])
+
+    plain, before = measure(json.loads, text)
+    del plain
+
+    page, after = measure(records, text)
+
+    print('%d revisions, json %.1f MB' % (revisions, len(text) / 2 ** 20))
+    print('  dicts    %8.1f MB (%.0f bytes per revision)' % (before / 2 ** 20, before / revisions))
+    print('  records  %8.1f MB (%.0f bytes per revision)' % (after / 2 ** 20, after / revisions))
+
+if __name__ == '__main__':
+    main()
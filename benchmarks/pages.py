@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import random
+
+def paragraph(rng, i):
+    """
+    Generate a paragraph with links, layout, references and math, like the paragraphs of 
+    a rendered Wikipedia page.
+    """
+
+    words = [
+        'alpha', 'beta', '<a href="/wiki/X" title="X">linked text</a>', '<b>bold</b>',
+        '<i>ital</i>', '&amp;', '&#160;', 'café', '<span class="nowrap">1 km</span>',
+        '<abbr title="a">AB</abbr>',
+        '<sup id="cite_ref-%d" class="reference"><a href="#cite_note-%d">[%d]</a></sup>' % (i, i, i),
+        '<span class="mwe-math-element"><img src="m.svg"></span>'
+    ]
+
+    return '<p>%s.\n</p>' % ' '.join(rng.choice(words) for _ in range(60))
+
+def article(sections=40, references=400, seed=3):
+    """
+    Generate the html of a large article, as returned by action=parse.
+
+    Args:
+        sections: The number of sections (default 40, i.e. about 560 KB).
+        references: The number of references (default 400).
+        seed: The seed of the random paragraphs (default 3).
+
+    Returns:
+        A string with the html of the article.
+    """
+
+    rng = random.Random(seed)
+
+    html = [
+        '<div class="mw-parser-output">'
+        '<style data-mw-deduplicate="TemplateStyles:r1">.x{color:red}</style>',
+        '<div role="note" class="hatnote navigation-not-searchable">For other uses, see <a href="/wiki/X">X</a>.</div>',
+        '<table class="infobox vevent"><tbody><tr><th colspan="2">Title</th></tr><tr><td>Info <b>x</b></td></tr></tbody></table>',
+        '<p class="mw-empty-elt">\n</p>'
+    ]
+
+    for s in range(sections):
+
+        if s:
+            html.append(
+                '<h2><span class="mw-headline" id="S%d">Section <i>%d</i> &amp; more</span>'
+                '<span class="mw-editsection"><span class="mw-editsection-bracket">[</span>'
+                '<a href="#">edit</a><span class="mw-editsection-bracket">]</span></span></h2>' % (s, s)
+            )
+
+        for k in range(6):
+
+            html.append(paragraph(rng, s * 10 + k))
+
+            if k == 2:
+                html.append(
+                    '<div class="thumb tright"><div class="thumbinner"><a href="/wiki/File:x.png" class="image">'
+                    '<img src="x.png"></a><div class="thumbcaption">Caption <i>c</i></div></div></div>'
+                )
+                html.append('<h3><span class="mw-headline" id="Sub%d">Sub %d</span></h3>' % (s, s))
+                html.append('<ul><li>one <a href="#">two</a></li><li>three<ul><li>nested</li></ul></li></ul>')
+                html.append('<ol><li>first</li></ol><dl><dd><i>Main article: <a href="#">M</a></i></dd></dl>')
+                html.append('<table class="wikitable"><tr><th>h</th></tr><tr><td>c</td></tr></table>')
+                html.append('<blockquote><p>Quoted text here.</p></blockquote>')
+                html.append('<!-- hidden comment -->')
+                html.append('<p><br></p>')
+
+    html.append('<h2><span class="mw-headline" id="References">References</span></h2>')
+    html.append('<div class="reflist columns references-column-width"><ol class="references">')
+
+    for r in range(references):
+        html.append(
+            '<li id="cite_note-%d"><span class="mw-cite-backlink"><b><a href="#cite_ref-%d">^</a></b></span> '
+            '<span class="reference-text"><cite class="citation web">Author %d (2017). '
+            '<a rel="nofollow" class="external text" href="http://x">"Title &amp; %d"</a>. <i>Site</i>. '
+            'Retrieved <span class="nowrap">1 May</span> 2017.</cite></span></li>' % (r, r, r, r)
+        )
+
+    html.append('</ol></div>')
+    html.append('<noscript><img src="//x" alt="" width="1" height="1" /></noscript>')
+    html.append('</div>')
+
+    return '\n'.join(html)
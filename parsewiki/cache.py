@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import json
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+class DiskCache:
+    """
+    This class saves MediaWiki API responses on disk
+    """
+
+    def __init__(self, path, max_size=1024 ** 3, ttl=86400):
+        """
+        Initialize the DiskCache class.
+
+        Responses for a specific revision (i.e. requested by oldid or revids) never change,
+        so they are kept until they are evicted. All other responses, such as the current
+        page or the comparison with the previous revision, expire after the specified time
+        to live. If the cache grows larger than the maximum size, the least recently used
+        responses are evicted.
+
+        Args:
+            path: The path of the cache file.
+            max_size: The maximum size of the cached responses in bytes (default 1 GiB).
+            ttl: The number of seconds that responses which can change are kept (default
+                86400). If set as None, these responses are not cached.
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS accessed ON responses (accessed)')
+
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, lang, params):
+        """
+        Get a cached response.
+
+        Args:
+            lang: The article language.
+            params: A dict with the WikiMedia API paramaters.
+
+        Returns:
+            A dict with the decoded response, or None if the response is not cached.
+        """
+
+        key = self.__key(lang, params)
+        now = time.time()
+
+        with self._lock:
+
+            row = self._db.execute('SELECT value, size, expires FROM responses WHERE key = ?', (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            if row[2] is not None and row[2] < now:
+                with self._db:
+                    self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= row[1]
+                return None
+
+            with self._db:
+                self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+
+        return json.loads(zlib.decompress(row[0]).decode('utf8'))
+
+    def set(self, lang, params, data):
+        """
+        Save a response in the cache.
+
+        Args:
+            lang: The article language.
+            params: A dict with the WikiMedia API paramaters.
+            data: A dict with the decoded response.
+        """
+
+        if self.__immutable(params):
+            expires = None
+        elif self.ttl is not None:
+            expires = time.time() + self.ttl
+        else:
+            return
+
+        key = self.__key(lang, params)
+        value = zlib.compress(json.dumps(data).encode('utf8'))
+
+        with self._lock:
+
+            row = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+
+            with self._db:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                    (key, value, len(value), expires, time.time())
+                )
+
+            self._size += len(value) - (row[0] if row is not None else 0)
+
+            if self._size > self.max_size:
+                self.__evict()
+
+    def clear(self):
+        """
+        Remove all cached responses.
+        """
+
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM responses')
+            self._size = 0
+
+    def close(self):
+        """
+        Close the cache file.
+        """
+
+        self._db.close()
+
+    def __evict(self):
+        """
+        Internal method which removes the least recently used responses until the cache
+        is smaller than the maximum size.
+        """
+
+        with self._db:
+
+            self._db.execute('DELETE FROM responses WHERE expires < ?', (time.time(),))
+
+            # Other processes may use the same file, so start from the actual size
+            self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+            rows = self._db.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall()
+
+            for key, size in rows:
+
+                if self._size <= self.max_size:
+                    break
+
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= size
+
+    def __key(self, lang, params):
+        """
+        Internal method which creates a key from the language and the normalized parameters.
+        """
+
+        return lang + '?' + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+
+    def __immutable(self, params):
+        """
+        Internal method which checks whether a response belongs to a specific revision.
+        """
+
+        if 'oldid' in params or 'revids' in params:
+            return True
+
+        if 'rvstartid' in params and params.get('rvstartid') == params.get('rvendid'):
+            return True
+
+        return False
+
+class ResultCache:
+    """
+    This class keeps the parsed content of revisions in memory
+    """
+
+    def __init__(self, max_entries=1000, path=None):
+        """
+        Initialize the ResultCache class.
+
+        The parsed sections, references, external links and differences of a revision are
+        kept by language, revision identifier, whether lists are included in the text, and
+        whether the html or the wikitext of the revision is parsed.
+        The same instance can be shared by several Parse instances, so a revision is parsed
+        only once. If the cache holds more than the maximum number of revisions, the least
+        recently used revisions are removed, or moved to disk if a path is specified.
+
+        Args:
+            max_entries: The maximum number of revisions kept in memory (default 1000).
+            path: The path of a file to which removed revisions are moved (default None).
+        """
+
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        if path is not None:
+
+            self._db = sqlite3.connect(path, check_same_thread=False)
+
+            with self._db:
+                self._db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)')
+
+        else:
+            self._db = None
+
+    def get(self, lang, revid, lists, mode='html'):
+        """
+        Get the parsed content of a revision.
+
+        Args:
+            lang: The article language.
+            revid: The revision identifier.
+            lists: Whether lists are included in the text.
+            mode: Whether the "html" or the "wikitext" is parsed (default "html").
+
+        Returns:
+            A dict with the parsed content, or None if the revision is not cached.
+        """
+
+        key = self.__key(lang, revid, lists, mode)
+
+        with self._lock:
+
+            value = self._entries.get(key)
+
+            if value is not None:
+                self._entries.move_to_end(key)
+
+            elif self._db is not None:
+
+                row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+
+                if row is None:
+                    return None
+
+                value = row[0]
+                self.__add(key, value)
+
+            else:
+                return None
+
+        # Return a copy, so the cached content is not changed with the saved content
+        return pickle.loads(value)
+
+    def has(self, lang, revid, lists, mode='html'):
+        """
+        Check whether the parsed content of a revision is cached, without loading it.
+
+        Args:
+            lang: The article language.
+            revid: The revision identifier.
+            lists: Whether lists are included in the text.
+            mode: Whether the "html" or the "wikitext" is parsed (default "html").
+
+        Returns:
+            True if the revision is cached, otherwise False.
+        """
+
+        key = self.__key(lang, revid, lists, mode)
+
+        with self._lock:
+
+            if key in self._entries:
+                return True
+
+            if self._db is not None:
+                return self._db.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone() is not None
+
+        return False
+
+    def set(self, lang, revid, lists, result, mode='html'):
+        """
+        Save the parsed content of a revision.
+
+        Args:
+            lang: The article language.
+            revid: The revision identifier.
+            lists: Whether lists are included in the text.
+            result: A dict with the parsed content.
+            mode: Whether the "html" or the "wikitext" is parsed (default "html").
+        """
+
+        key = self.__key(lang, revid, lists, mode)
+        value = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self.__add(key, value)
+
+    def clear(self):
+        """
+        Remove all cached revisions.
+        """
+
+        with self._lock:
+
+            self._entries.clear()
+
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM results')
+
+    def __add(self, key, value):
+        """
+        Internal method which adds a revision and removes the least recently used revisions.
+        """
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+
+            key, value = self._entries.popitem(last=False)
+
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?)', (key, value))
+
+    def __key(self, lang, revid, lists, mode):
+        """
+        Internal method which creates a key from the language, revision, lists flag and mode.
+        """
+
+        key = '|'.join((lang, str(revid), str(lists is True)))
+
+        # The keys of parsed html are kept, so an existing file can still be used
+        if mode != 'html':
+            key += '|' + mode
+
+        return key
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from parsewiki.page import Parse, _check_workers
+from parsewiki.stats import Stats
+from parsewiki.transport import get_transport
+
+import json
+import requests
+import threading
+
+class Corpus:
+    """
+    This class extracts a large number of Wikipedia pages and writes them to a sink
+    """
+
+    _ignore = True
+    _print_errors = True
+
+    _batch = 50
+
+    def __init__(self, pages, lang='en', workers=4, ignore=True, transport=None, cache=None, results=None, stats=None, parser=None, mode='html', processes=None):
+        """
+        Initialize the Corpus class.
+
+        The titles of the pages in all languages are requested for 50 pages at once, so
+        the pages can be extracted without requesting their metadata one by one.
+
+        Args:
+            pages: A list with Wiki page identifiers and/or titles.
+            lang: The article language which will be used as the default language (default "en").
+            workers: The number of pages which are extracted concurrently (default 4).
+            ignore: Set to False to raise exeptions, which is helpfull for debugging (default True).
+            transport: The Transport used to connect to Wikipedia (default None). If no transport
+                is specified, a pooled transport which is shared by all instances is used.
+            cache: A DiskCache in which the MediaWiki API responses are saved (default None).
+            results: A ResultCache in which the parsed revisions are kept (default None).
+            stats: The Stats in which the requests, cache hits, retries and processing time
+                of all pages are counted (default None, i.e. a new Stats instance).
+            parser: The html parser used by BeautifulSoup, either "html.parser" or "lxml"
+                (default None, i.e. "html.parser", see Parse).
+            mode: Parse the rendered "html" or the "wikitext" of the pages when no job is
+                specified (default "html", see Parse.extract).
+            processes: A ProcessPoolExecutor in which the pages are parsed (default None, i.e.
+                they are parsed in the worker threads). Use at least as many workers as
+                processes to keep all processes busy, otherwise a RuntimeWarning is given.
+
+        Raises:
+            ValueError: The number of workers must be a positive integer.
+        """
+
+        if type(workers) is not int or workers < 1:
+            raise ValueError('The number of workers must be a positive integer.')
+
+        _check_workers(processes, workers)
+
+        if transport is None:
+            transport = get_transport()
+
+        self.lang = lang
+        self.workers = workers
+        self.parser = parser
+        self.mode = mode
+        self.processes = processes
+
+        self._pages = list(pages)
+        self._transport = transport
+        self._cache = cache
+        self._results = results
+        self._stats = stats if stats is not None else Stats()
+        self._log = []
+
+        if ignore is False:
+            self._ignore = False
+
+    def extract(self, sink, job=None):
+        """
+        Extract all pages and write each page to the sink.
+
+        The pages are written in the specified order. A page which cannot be extracted
+        is skipped, unless ignore is set to False.
+
+        Args:
+            sink: A callable which receives the json wiki object (see Parse.get_wiki) of
+                each page, e.g. an instance of the JsonLinesSink class.
+            job: A callable which receives the Parse instance of each page and extracts the
+                required content (default None, i.e. only the current page is extracted
+                in the default language and the specified mode).
+
+        Returns:
+            The number of pages written to the sink.
+        """
+
+        pending = deque()
+        count = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            for pageid, titles in self.__resolve():
+
+                pending.append((pageid, pool.submit(self.__extract_page, pageid, titles, job)))
+
+                # Keep a limited number of pages in memory
+                if len(pending) >= 2 * self.workers:
+                    count += self.__write(*pending.popleft(), sink)
+
+            while pending:
+                count += self.__write(*pending.popleft(), sink)
+
+        return count
+
+    def get_log(self):
+        """
+        Get the errors that occured while extracting the pages.
+
+        Returns:
+            A list with a tuple (date, page, error) for each error.
+        """
+
+        return self._log
+
+    def get_stats(self):
+        """
+        Get the number of requests, cache hits and retries, and the time spent in each
+        processing stage, of all pages.
+
+        Returns:
+            A dict with the collected figures (see Stats.get_stats).
+        """
+
+        return self._stats.get_stats()
+
+    def __resolve(self):
+        """
+        Internal method which requests the identifier and titles of the pages in batches.
+
+        Returns:
+            A generator which yields the page identifier and a dict with the title of the
+            page in each language, in the specified order. If the titles of a batch cannot
+            be requested, the error is logged for each page of the batch and the pages are
+            skipped, unless ignore is set to False.
+        """
+
+        for i in range(0, len(self._pages), self._batch):
+
+            batch = self._pages[i:i + self._batch]
+
+            pageids = [page for page in batch if type(page) is int]
+            titles = [page for page in batch if type(page) is str]
+
+            found = {}
+            failed = {}
+
+            for key, pages in (('pageids', pageids), ('titles', titles)):
+
+                if not pages:
+                    continue
+
+                try:
+                    found.update(self.__query({key : '|'.join(str(page) for page in pages)}))
+                except Exception as e:
+                    failed.update(dict.fromkeys(pages, str(e)))
+
+            for page in batch:
+
+                if type(page) is not int and type(page) is not str:
+                    self.__error(page, 'A valid page identifier or title must be specified.')
+                elif page in failed:
+                    self.__error(page, failed[page])
+                elif page not in found:
+                    self.__error(page, 'The page you specified doesn\'t exist.')
+                else:
+                    yield found[page]
+
+    def __query(self, pages):
+        """
+        Internal method which requests the titles of a batch of pages in all languages.
+
+        Args:
+            pages: A dict with the pageids or titles parameter.
+
+        Returns:
+            A dict with a tuple (page identifier, titles) for each requested page identifier
+            or title.
+
+        Raises:
+            ValueError: An unexpected error occured while connecting to Wikipedia.
+        """
+
+        params = {
+            'action' : 'query',
+            'prop' : 'langlinks',
+            'lllimit' : 'max',
+            'redirects' : '1',
+            'format' : 'json'
+        }
+
+        params.update(pages)
+
+        titles = {}
+        renamed = {}
+        langlinks = {}
+
+        while True:
+
+            data = self.__extract(params)
+
+            for key in ('normalized', 'redirects'):
+                for item in data['query'].get(key, []):
+                    renamed[item['from']] = item['to']
+
+            for page in data['query']['pages'].values():
+
+                if 'missing' in page or 'invalid' in page:
+                    continue
+
+                titles[page['pageid']] = page['title']
+                langlinks.setdefault(page['pageid'], {})
+
+                for link in page.get('langlinks', []):
+                    langlinks[page['pageid']][link['lang']] = link['*']
+
+            # The language links of a batch can be spread over several responses
+            if 'continue' not in data:
+                break
+
+            params.update(data['continue'])
+
+        pageids = {title : pageid for pageid, title in titles.items()}
+        resolved = {}
+
+        for pageid, title in titles.items():
+            resolved[pageid] = (pageid, dict(langlinks[pageid], **{self.lang : title}))
+
+        if 'titles' in pages:
+            for title in pages['titles'].split('|'):
+
+                name = renamed.get(title, title)
+                name = renamed.get(name, name)
+
+                if name in pageids:
+                    resolved[title] = resolved[pageids[name]]
+
+        return resolved
+
+    def __extract(self, params):
+        """
+        Internal method which extracts information from the MediaWiki API.
+
+        Args:
+            params: A dict with the WikiMedia API paramaters.
+
+        Returns:
+            A dict with the decoded response.
+
+        Raises:
+            ValueError: An unexpected error occured while connecting to Wikipedia.
+        """
+
+        if self._cache is not None:
+
+            data = self._cache.get(self.lang, params)
+
+            if data is not None:
+                self._stats.hit('responses', params)
+                return data
+
+        url = Parse._prefix + self.lang + Parse._suffix
+
+        status, data = self._transport.get_json(url, params, self._stats)
+
+        if status != requests.codes.ok or data is None or 'error' in data:
+            raise ValueError("An unexpected error occured while connecting to Wikipedia (Status code: ", status, ").")
+
+        if self._cache is not None:
+            self._cache.set(self.lang, params, data)
+
+        return data
+
+    def __extract_page(self, pageid, titles, job):
+        """
+        Internal method which extracts a single page.
+
+        Args:
+            pageid: The Wiki page identifier.
+            titles: A dict with the title of the page in each language.
+            job: A callable which extracts the required content, or None.
+
+        Returns:
+            A dict with the json wiki object.
+        """
+
+        wiki = Parse(
+            pageid, lang=self.lang, ignore=self._ignore, transport=self._transport,
+            cache=self._cache, results=self._results, languages=titles,
+            stats=self._stats, parser=self.parser, processes=self.processes
+        )
+
+        if job is None:
+            wiki.extract(mode=self.mode)
+        else:
+            job(wiki)
+
+        return wiki.get_wiki()
+
+    def __write(self, pageid, future, sink):
+        """
+        Internal method which writes an extracted page to the sink.
+
+        Args:
+            pageid: The Wiki page identifier.
+            future: The future of the extracted page.
+            sink: A callable which receives the json wiki object.
+
+        Returns:
+            1 if the page is written, otherwise 0.
+        """
+
+        try:
+            wiki = future.result()
+        except Exception as e:
+            self.__error(pageid, str(e))
+            return 0
+
+        sink(wiki)
+
+        return 1
+
+    def __error(self, page, error):
+        """
+        Internal method to handle errors.
+
+        Args:
+            page: The page identifier or title.
+            error: A string with the error message.
+        """
+
+        if self._print_errors is True:
+            print('Page:', page, '-', error)
+
+        self._log.append((datetime.strftime(datetime.now(), '%Y-%m-%dT%H:%M:%S%Z'), page, error))
+
+        if self._ignore is False:
+            raise ValueError(error)
+
+class JsonLinesSink:
+    """
+    This class writes json wiki objects to a file, one object on each line
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the JsonLinesSink class.
+
+        Args:
+            path: The path of the file. Objects are appended if the file already exists.
+        """
+
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf8')
+
+    def __call__(self, wiki):
+        """
+        Write a json wiki object to the file.
+
+        Args:
+            wiki: A dict with the saved Wikipedia data.
+        """
+
+        line = json.dumps(wiki, ensure_ascii=False)
+
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        """
+        Close the file.
+        """
+
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
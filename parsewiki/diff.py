@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+from difflib import SequenceMatcher
+
+class Diff:
+    """
+    This class compares the paragraphs of a revision with the paragraphs of its predecessor
+    """
+
+    def __init__(self, ratio=0.5, window=20):
+        """
+        Initialize the Diff class.
+
+        The paragraphs of both revisions are compared first. Within a block of changed
+        paragraphs, a paragraph of the revision is paired with the first paragraph of the
+        predecessor which shares enough words, otherwise the paragraph is added.
+
+        A paragraph is only compared with the next paragraphs of the predecessor within
+        the window, so a block of n changed paragraphs takes at most n * window word
+        comparisons, instead of one for each pair of paragraphs.
+
+        Args:
+            ratio: The minimal similarity of the words of two paragraphs to pair them as a
+                changed paragraph (default 0.5).
+            window: The maximal number of paragraphs of the predecessor with which a
+                paragraph is compared (default 20).
+        """
+
+        self.ratio = ratio
+        self.window = window
+
+    def compare(self, original, revision):
+        """
+        Compare the sections of a revision with the sections of its predecessor.
+
+        The result has the same layout as the differences returned by Wikipedia: each
+        changed paragraph is added to the original and the difference, an added paragraph
+        only to the difference (its original is an empty string). Removed paragraphs are
+        not included.
+
+        Args:
+            original: A dict with the sections of the predecessor.
+            revision: A dict with the sections of the revision.
+
+        Returns:
+            A dict with a list of the original paragraphs and a list of the changed or
+            added paragraphs.
+        """
+
+        old = self.__paragraphs(original)
+        new = self.__paragraphs(revision)
+
+        originals = []
+        differences = []
+
+        matcher = SequenceMatcher(None, old, new, autojunk=False)
+
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+
+            if tag == 'insert':
+
+                for paragraph in new[j1:j2]:
+                    originals.append('')
+                    differences.append(paragraph)
+
+            elif tag == 'replace':
+                self.__pair(old[i1:i2], new[j1:j2], originals, differences)
+
+        return {'original' : originals, 'difference' : differences}
+
+    def words(self, differences):
+        """
+        Compare the words of each changed or added paragraph with its original.
+
+        Args:
+            differences: A dict with a list of the original paragraphs and a list of the
+                changed or added paragraphs, as returned by compare.
+
+        Returns:
+            A list with a dict for each changed or added paragraph, with a list of the
+            removed words and a list of the added words.
+        """
+
+        result = []
+
+        for original, difference in zip(differences['original'], differences['difference']):
+
+            old = original.split()
+            new = difference.split()
+
+            removed = []
+            added = []
+
+            matcher = SequenceMatcher(None, old, new, autojunk=False)
+
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+
+                if tag in ('delete', 'replace'):
+                    removed.extend(old[i1:i2])
+
+                if tag in ('insert', 'replace'):
+                    added.extend(new[j1:j2])
+
+            result.append({'removed' : removed, 'added' : added})
+
+        return result
+
+    def __pair(self, old, new, originals, differences):
+        """
+        Internal method which pairs the paragraphs of a block of changed paragraphs.
+
+        Args:
+            old: A list with the paragraphs of the predecessor.
+            new: A list with the paragraphs of the revision.
+            originals: The list to which the original paragraphs are added.
+            differences: The list to which the changed or added paragraphs are added.
+        """
+
+        start = 0
+        words = [paragraph.split() for paragraph in old]
+
+        for paragraph in new:
+
+            split = paragraph.split()
+
+            for i in range(start, min(len(old), start + self.window)):
+
+                matcher = SequenceMatcher(None, words[i], split, autojunk=False)
+
+                # The quick ratios are upper bounds of the ratio
+                if matcher.real_quick_ratio() < self.ratio or matcher.quick_ratio() < self.ratio:
+                    continue
+
+                if matcher.ratio() >= self.ratio:
+                    originals.append(old[i])
+                    differences.append(paragraph)
+                    start = i + 1
+                    break
+
+            else:
+                originals.append('')
+                differences.append(paragraph)
+
+    def __paragraphs(self, sections):
+        """
+        Internal method which lists the paragraphs of all sections in order.
+        """
+
+        return [
+            paragraph
+            for section in sections.values()
+            for paragraph in section['content'].split('\n')
+            if paragraph != ''
+        ]
@@ -3,14 +3,104 @@
 @author: jdevreeze
 """
 
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dateutil.parser import parse
+from functools import partial, wraps
+from operator import itemgetter
+
+from parsewiki.diff import Diff
+from parsewiki.records import Page, Revision, export, numbered
+from parsewiki.stats import Stats
+from parsewiki.transport import get_async_transport, get_transport
+from parsewiki.wikitext import Wikitext
 
 import bs4 as bs
 import requests
 
+import asyncio
+import base64
 import inspect
+import json
 import re
+import warnings
+import zlib
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+def _steps(method):
+    """
+    Decorator for methods which yield their requests instead of sending them.
+    
+    The decorated method is a generator which yields ('get', url, params) for each 
+    request and receives a tuple with the status code and the decoded response. It 
+    can also yield ('map', steps, workers) to run a list of such generators concurrently 
+    and receive a list with their return values, or ('parse', method, args) to run a 
+    parse method in a worker process (see _parse). The generator is run by the _run 
+    method of the instance, which sends blocking requests in Parse and awaits them 
+    in AsyncParse.
+    """
+    
+    @wraps(method)
+    def run(self, *args, **kwargs):
+        return self._run(method(self, *args, **kwargs))
+    
+    return run
+
+def _check_workers(processes, workers):
+    """
+    Warn when a pool of worker processes cannot be kept busy.
+    
+    Each worker hands one page or revision at a time to the pool, so with fewer workers 
+    than processes some of the processes are never used. A ProcessPoolExecutor does not 
+    expose its number of processes, so it is read from its private _max_workers attribute, 
+    and nothing is checked if the pool does not have this attribute.
+    
+    Args:
+        processes: The ProcessPoolExecutor in which the pages are parsed, or None.
+        workers: The number of pages or revisions which are extracted concurrently.
+    """
+    
+    size = getattr(processes, '_max_workers', None)
+    
+    if type(size) is not int:
+        return
+    
+    if workers < size:
+        warnings.warn(
+            'Only %d of the %d processes are used, use at least as many workers as processes.' % (workers, size), 
+            RuntimeWarning
+        )
+
+def _parse(parser, method, args):
+    """
+    Run a parse method of the Parse class in a worker process.
+    
+    The parse methods only use the html parser and the Stats of an instance, so the 
+    method is run on an instance without a page. The time spent in each stage is 
+    returned, so it can be counted in the Stats of the calling process.
+    
+    Args:
+        parser: The html parser used by BeautifulSoup.
+        method: The name of the parse method, e.g. "__extract_html".
+        args: A tuple with the arguments of the method.
+    
+    Returns:
+        A tuple with the return value of the method and a list with a tuple (stage, 
+        seconds) for each stage.
+    """
+    
+    stages = []
+    
+    wiki = Parse.__new__(Parse)
+    wiki._parser = parser
+    wiki._stats = Stats(callback=lambda event, stage, value: stages.append((stage, value)))
+    
+    return getattr(wiki, '_Parse' + method)(*args), stages
   
 class Parse:
     """
@@ -23,16 +113,74 @@ class Parse:
     _prefix = 'https://'
     _suffix = '.wikipedia.org/w/api.php'
     
+    _parser = 'html.parser'
+    _wikitext = Wikitext()
+    _diff = Diff()
+    
     _css_selector = 'div.mw-parser-output'
     _css_references = 'ol.references li'
     
+    # A line break and the white space before it, see str.splitlines
+    
+    _line_breaks = re.compile('\\s*[\\n\\r\\v\\f\\x1c\\x1d\\x1e\\x85\\u2028\\u2029]')
+    
+    # The maximum number of revisions of which the wikitext is requested at once
+    
+    _batch = 50
+    
+    # The keys of a revision which are kept in the ResultCache
+    
+    _result = ('sections', 'references', 'externallinks', 'previous', 'differences')
+    
+    # An ISO 8601 timestamp, of which the first ten characters are the date
+    
+    _iso_date = re.compile('\\d{4}-\\d{2}-\\d{2}(?:[T ]|$)')
+    
+    # The wiki markup removed from the differences
+    
+    _wiki_references = re.compile('<ref(.*?)</ref>|<ref(.*?)/>')
+    _wiki_files = re.compile('\\[{2}(File:|Category:)(.*?)]{2}')
+    _wiki_templates = re.compile('[{]{2}(.*?)[}]{2}')
+    _wiki_links = re.compile('\\[{2}(.*?)[|](.*?)]{2}')
+    _wiki_labels = re.compile('\\[{2}(.*?)[|]|]]')
+    _wiki_brackets = re.compile('\\[{2}|]{2}')
+    _wiki_headers = re.compile('(=){2,4}(.*?)(=){2,4}')
+    _wiki_layout = re.compile('(\'){2,4}(.*?)(\'){2,4}')
+    _wiki_quotes = re.compile('(\'){2,4}')
+    
+    # The rules used to clear the html of a page, for each tag the first rule which matches 
+    # an attribute (or None to match all tags) decides whether the tag is dropped together 
+    # with its content, unwrapped (i.e. only its content is kept), or treated as a list
+    
+    _html_rules = {
+        'div' : [(None, 'drop')],
+        'table' : [(None, 'drop')],
+        'noscript' : [(None, 'drop')],
+        'ul' : [(None, 'list')],
+        'ol' : [(None, 'list')],
+        'dl' : [(None, 'list')],
+        'h3' : [(None, 'drop')],
+        'span' : [(('id', 'coordinates'), 'drop'), (('class', 'mw-editsection'), 'drop'), (None, 'unwrap')],
+        'a' : [(None, 'unwrap')],
+        'b' : [(None, 'unwrap')],
+        'sup' : [(None, 'unwrap')],
+        'i' : [(None, 'unwrap')],
+        'abbr' : [(None, 'unwrap')]
+    }
+    
     _pageid = None
     _languages = {}
     _content = {}
     
+    _transport = None
+    _cache = None
+    _results = None
+    _stats = None
+    _processes = None
+    
     _log = []
     
-    def __init__(self, wiki=None, lang='en', ignore=True):
+    def __init__(self, wiki=None, lang='en', ignore=True, transport=None, cache=None, results=None, languages=None, stats=None, parser=None, processes=None):
         """
         Initialize the ParseWiki class.   
         
@@ -40,6 +188,23 @@ class Parse:
             wiki: The Wiki page identifier, title or a json wiki object (default None).
             lang: The article language which will be used as the default language (default "en").
             ignore: Set to False to raise exeptions, which is helpfull for debugging (default True).
+            transport: The Transport used to connect to Wikipedia (default None). If no transport 
+                is specified, a pooled transport which is shared by all instances is used.
+            cache: A DiskCache in which the MediaWiki API responses are saved (default None).
+            results: A ResultCache in which the parsed revisions are kept (default None).
+            languages: A dict with the title of the page in each language, including the default 
+                language (default None). If it is specified together with a page identifier or 
+                json wiki object, the titles are not requested from Wikipedia.
+            stats: The Stats in which the requests, cache hits, retries and processing time 
+                are counted (default None, i.e. a new Stats instance for this instance).
+            parser: The html parser used by BeautifulSoup, either "html.parser" or "lxml" 
+                (default None, i.e. "html.parser"). lxml is several times faster, but it repairs 
+                invalid html (e.g. a paragraph in a header) in another way, so the text of such 
+                a page can differ.
+            processes: A ProcessPoolExecutor in which the html, wikitext and differences are 
+                parsed (default None, i.e. they are parsed in the thread which requested them). 
+                Each thread waits for its own page or revision, so the number of workers 
+                limits the number of pages and revisions waiting to be parsed.
         
         Returns:
             False in case of an error.
@@ -47,22 +212,84 @@ class Parse:
         Raises:
             ValueError: The json object is not valid.
             ValueError: A valid page identifier or previously saved wiki object must be specified.
+            ValueError: The parser must be "lxml" or "html.parser".
+            ImportError: The lxml parser requires lxml.
+        """
+        
+        if transport is None:
+            transport = get_transport()
+        
+        self._init_state(transport, cache, results, stats, parser, processes)
+        
+        self._setup(wiki, lang, languages)
+          
+        if ignore is False:
+            self._ignore = False
+    
+    def _init_state(self, transport, cache, results, stats, parser, processes):
+        """
+        Internal method which sets up the state of a new instance, which is shared by the 
+        Parse and AsyncParse classes.
+        
+        Args:
+            transport: The Transport or AsyncTransport used to connect to Wikipedia.
+            cache: A DiskCache in which the MediaWiki API responses are saved, or None.
+            results: A ResultCache in which the parsed revisions are kept, or None.
+            stats: The Stats in which the requests are counted, or None for a new instance.
+            parser: The html parser used by BeautifulSoup, or None for the default parser.
+            processes: A ProcessPoolExecutor in which the pages are parsed, or None.
+        
+        Raises:
+            ValueError: The parser must be "lxml" or "html.parser".
+            ImportError: The lxml parser requires lxml.
+        """
+        
+        self.__parser(parser)
+        
+        self._transport = transport
+        self._cache = cache
+        self._results = results
+        self._stats = stats if stats is not None else Stats()
+        self._processes = processes
+        
+        # The indexes of the saved pages and revisions, and the store of the shared content
+        
+        self._pages = None
+        self._revisions = {}
+        self._store = {'sections' : {}, 'strings' : {}, 'lists' : {}}
+    
+    @_steps
+    def _setup(self, wiki, lang, titles=None):
+        """
+        Internal method which extracts the metadata of the page to setup this class.
+        
+        Args:
+            wiki: The Wiki page identifier, title or a json wiki object.
+            lang: The article language which will be used as the default language.
+            titles: A dict with the title of the page in each language (default None).
         """
                
         if wiki is not None:
             
-            if type(wiki) is int:
-                pageid, languages = self.__extract_metadata(pageid=wiki, title=None, lang=lang)
+            if type(wiki) is int and titles is not None:
+                pageid, languages = wiki, self.__languages(lang, titles)
+                self._content = {'id' : str(pageid), 'language' : lang, 'pages' : {}}
+            
+            elif type(wiki) is int:
+                pageid, languages = yield from self.__extract_metadata(pageid=wiki, title=None, lang=lang)
                 self._content = {'id' : str(pageid), 'language' : lang, 'pages' : {}}
             
             elif type(wiki) is str:
-                pageid, languages = self.__extract_metadata(pageid=None, title=wiki, lang=lang)
+                pageid, languages = yield from self.__extract_metadata(pageid=None, title=wiki, lang=lang)
                 self._content = {'id' : str(pageid), 'language' : lang, 'pages' : {}}
                 
             elif type(wiki) is dict:
-                if self.__is_valid(wiki) is True:
-                    pageid, languages = self.__extract_metadata(pageid=wiki['id'], title=None, lang=wiki['language'])
-                    self._content = wiki
+                if self.__is_valid(wiki) is True and titles is not None:
+                    pageid, languages = int(wiki['id']), self.__languages(wiki['language'], titles)
+                    self._content = self.__records(wiki)
+                elif self.__is_valid(wiki) is True:
+                    pageid, languages = yield from self.__extract_metadata(pageid=wiki['id'], title=None, lang=wiki['language'])
+                    self._content = self.__records(wiki)
                 else:
                     self.__error(self.__line_no(), 'The json object is not valid.', None)
             
@@ -77,11 +304,9 @@ class Parse:
                 
         else:
             self.__error(self.__line_no(), 'A valid page identifier or previously saved wiki object must be specified.', None)
-          
-        if ignore is False:
-            self._ignore = False
             
-    def extract(self, lang=None, lists=True):
+    @_steps
+    def extract(self, lang=None, lists=True, mode='html'):
         """
         Extract content from the current wikipedia page.
         
@@ -91,13 +316,21 @@ class Parse:
         Args:
             lang: The article language (default None).
             lists: Include lists in text (default True).
+            mode: Parse the rendered "html" of the page, or the "wikitext" (default "html"). 
+                The wikitext is not rendered by Wikipedia and it is stripped much faster, 
+                but the text is an approximation (see Wikitext.parse).
         
         Returns:
             An instance of the ParseWiki class is returned.
         
         Raises:
             ValueError: The requested page is not available in this language.
+            ValueError: The mode must be "html" or "wikitext".
         """
+        
+        if mode not in ('html', 'wikitext'):
+            self.__error(self.__line_no(), 'The mode must be "html" or "wikitext".', None)
+            return False
 
         if lang is None:
             lang = list(self._languages['default'].keys())[0] 
@@ -107,23 +340,64 @@ class Parse:
                 self.__error(self.__line_no(), 'The requested page is not available in this language.', None)
                 return False
         
-        params = {
-            'action' : 'parse',
-            'prop' : 'text',
-            'format' : 'json',
-            'page' : self.get_title(lang).replace(' ', '_')
-        } 
+        if mode == 'wikitext':
+            
+            params = {
+                'action' : 'query',
+                'prop' : 'revisions|langlinks',
+                'rvprop' : 'ids|content',
+                'rvslots' : 'main',
+                'lllimit' : 'max',
+                'format' : 'json',
+                'titles' : self.get_title(lang).replace(' ', '_')
+            }
+            
+            response = yield from self.__extract(params, lang)
+            page = list(response['query']['pages'].values())[0]
+            
+            data = {
+                'revid' : page['revisions'][0]['revid'],
+                'wikitext' : self.__revision_source(page['revisions'][0]),
+                'langlinks' : list(page.get('langlinks', []))
+            }
+            
+            # The language links can be spread over several responses
+            
+            while 'continue' in response:
+                
+                params.update(response['continue'])
+                
+                response = yield from self.__extract(params, lang)
+                page = list(response['query']['pages'].values())[0]
+                
+                data['langlinks'].extend(page.get('langlinks', []))
+            
+        else:
+            
+            params = {
+                'action' : 'parse',
+                'prop' : 'text|externallinks|langlinks',
+                'format' : 'json',
+                'page' : self.get_title(lang).replace(' ', '_')
+            } 
+            
+            data = (yield from self.__extract(params, lang))['parse']
+        
+        # Keep the titles of the other languages up to date
+        
+        for i in data['langlinks']:
+            self._languages['available'][i['lang']] = i['*']
         
         try:
             
-            compare = self.__extract({
+            compare = (yield from self.__extract({
                 'action' : 'compare',
                 'fromtitle' : self.get_title(lang).replace(' ', '_'),
                 'torelative' : 'prev',
                 'format' : 'json'               
-            }, lang)['compare']
+            }, lang))['compare']
             
-        except: 
+        except Exception: 
                    
             self.__error(self.__line_no(), 'The compare key is not found', None)
             compare = ''
@@ -133,19 +407,40 @@ class Parse:
         
         prev = 0 if 'fromrevid' not in compare else compare['fromrevid']       
         
-        self._content['pages'][len(self._content['pages'])] = {
+        # Parse the current revision, unless it has been parsed before
+        
+        result = None
+        
+        if self._results is not None and 'revid' in data:
+            result = self._results.get(lang, data['revid'], lists, mode)
+            
+        if result is not None:
+            self._stats.hit('results')
+        
+        else:
+            
+            if mode == 'wikitext':
+                result = yield from self.__parse('__extract_wikitext', data['wikitext'], lists)
+            else:
+                result = yield from self.__parse('__extract_html', data['text']['*'], lists)
+            
+            if self._results is not None and 'revid' in data:
+                self._results.set(lang, data['revid'], lists, result, mode)
+        
+        self._content['pages'][len(self._content['pages'])] = self.__intern(Page({
             'language' : lang,
             'date' : datetime.strftime(datetime.now(), '%Y-%m-%dT%H:%M:%S%Z'),
             'title' : self.get_title(lang),
-            'sections' :  self.__extract_sections(params, lang, lists),
-            'references' :  self.__extract_references(params, lang),
-            'externallinks' :  self.__extract_links(lang),
+            'sections' :  result['sections'],
+            'references' :  result['references'],
+            'externallinks' :  result['externallinks'] if mode == 'wikitext' else data['externallinks'],
             'previous' : prev     
-        }
+        }))
 
         return self
     
-    def extract_revision(self, lang=None, revid=None, date=None, lists=True, newest=False, empty=False):   
+    @_steps
+    def extract_revision(self, lang=None, revid=None, date=None, lists=True, newest=False, empty=False, mode='html', lazy=False):   
         """
         Extract content from a single wikipedia revision page.
         
@@ -160,6 +455,9 @@ class Parse:
             newest: Search for the newest or the oldest revision for the specified 
                 date (default False).
             empty: If set as True it will only extract the metadata (default False).
+            mode: Parse the rendered "html" of the revision, or the "wikitext" (default "html").
+            lazy: If set as True the revision is saved compressed, and it is only parsed when 
+                its content is requested, e.g. by get_text (default False).
         
         Returns:
             An instance of the ParseWiki class is returned.
@@ -167,6 +465,7 @@ class Parse:
         Raises:
             ValueError: A revision id or revision date must be specified.
             ValueError: The argument 'newest' must be a boolean value.
+            ValueError: The mode must be "html" or "wikitext".
             ValueError: The sepcified date is not valid.
             ValueError: The sepcified date could not be converted to a ISO 8601 timestamp.
         """     
@@ -179,6 +478,10 @@ class Parse:
             self.__error(self.__line_no(), 'The \'newest\' argument must be a boolean value.', None)
             return False     
         
+        if mode not in ('html', 'wikitext'):
+            self.__error(self.__line_no(), 'The mode must be "html" or "wikitext".', None)
+            return False
+        
         else:            
             
             if lang is None:
@@ -198,7 +501,7 @@ class Parse:
                 
                 # Extract revision date
                 
-                revid, date, user, comment, size = self.__extract_property(params, lang)
+                root = yield from self.__extract_property(params, lang)
                 
             else:
                 
@@ -234,77 +537,18 @@ class Parse:
             
                 # Extract revision id
             
-                revid, date, user, comment, size = self.__extract_property(params, lang)
-            
-            params = {
-                'action' : 'parse',
-                'prop' : 'text',
-                'format' : 'json',
-                'oldid' : revid
-            } 
+                root = yield from self.__extract_property(params, lang)
             
             # Check whether the revision already exists
             
-            revision = self.__has_revisions(lang, revid)
-      
-            if revision is None:  
-                
-                # Extract the revision
-                
-                revision = {
-                    'oldid' : str(revid),
-                    'date' : date,
-                    'user' : user,
-                    'comment' : comment,
-                    'size' : size,
-                    'empty' : empty
-                }               
-             
-                if empty is not True:
-                    
-                    revision['sections'] = self.__extract_sections(params, lang, lists)
-                    revision['references'] = self.__extract_references(params, lang)
-                    revision['externallinks'] = self.__extract_links(lang, oldid=str(revid))
-                    
-                    try:
-                        
-                        compare = self.__extract({
-                            'action' : 'compare',
-                            'fromrev' : str(revid),
-                            'torelative' : 'prev',
-                            'format' : 'json'               
-                        }, lang)['compare']      
-                        
-                    except:  
-                        
-                        self.__error(self.__line_no(), 'The compare key is not found', None)
-                        compare = ''
-                        pass
-                    
-                    if 'fromrevid' not in compare:
-                        prev = 0
-                        diff = { 'original' : '', 'difference' : '' } 
-                        
-                    else:
-                        prev = compare['fromrevid']
-                        diff = self.__extract_difference(compare['*'])
-    
-                    revision['previous'] = prev                
-                    revision['differences'] = diff         
-                    
-                for i in self._content['pages']:
-                    if lang in self._content['pages'][i]['language']:                    
-                        
-                        #save revision by the specified language
-                        
-                        if 'revisions' in self._content['pages'][i]:
-                            self._content['pages'][i]['revisions'][len(self._content['pages'][i]['revisions'])] = revision
-                        else:
-                            self._content['pages'][i]['revisions'] = {0 : revision}
+            if self.__has_revisions(lang, root['revid']) is None:
+                revision = yield from self.__extract_revision(lang, root, lists, empty, mode, lazy=lazy)
+                self.__save_revision(lang, revision)
                 
         return self    
     
-    def extract_revisions_by_user(self, lang=None, username=None, lists=True, empty=False):   
+    @_steps
+    def extract_revisions_by_user(self, lang=None, username=None, lists=True, empty=False, workers=1, mode='html', lazy=False):   
         """
         Extract all revisions made by a Wikipedia user.
         
@@ -316,17 +560,35 @@ class Parse:
             username: The Wiki user to look for (default None).
             lists: Include lists in text (default True).
             empty: If set as True it will only extract the metadata (default False).
+            workers: The number of revisions which are extracted concurrently (default 1). 
+                With a pool of processes, use at least as many workers as processes, 
+                otherwise a RuntimeWarning is given.
+            mode: Parse the rendered "html" of the revisions, or the "wikitext" (default "html").
+            lazy: If set as True the revisions are saved compressed, and a revision is only 
+                parsed when its content is requested, e.g. by get_text (default False).
         
         Returns:
             An instance of the ParseWiki class is returned.
         
         Raises:
             ValueError: A valid username must be specified.
+            ValueError: The number of workers must be a positive integer.
+            ValueError: The mode must be "html" or "wikitext".
         """
         
         if username is None or type(username) is not str:
             self.__error(self.__line_no(), 'A valid username must be specified.', None)
             return False
+        
+        if type(workers) is not int or workers < 1:
+            self.__error(self.__line_no(), 'The number of workers must be a positive integer.', None)
+            return False
+        
+        if mode not in ('html', 'wikitext'):
+            self.__error(self.__line_no(), 'The mode must be "html" or "wikitext".', None)
+            return False
+        
+        _check_workers(self._processes, workers)
             
         params = {
             'action' : 'query',
@@ -340,27 +602,15 @@ class Parse:
         
         if lang is None:
             lang = list(self._languages['default'].keys())[0]  
-      
-        while True:
-
-            data = self.__extract(params, lang)
-            
-            pageid = list(data['query']['pages'].keys())[0]             
-            
-            # Extract revisions made by this user
-            
-            if 'revisions' in data['query']['pages'][pageid]:
-                for revision in data['query']['pages'][pageid]['revisions']:               
-                    self.extract_revision(lang=lang, revid=revision['revid'], lists=lists, empty=empty)            
-            
-            if 'continue' not in data:
-                break
-            
-            params['rvcontinue'] = data['continue']['rvcontinue']
+        
+        # Extract revisions made by this user
+        
+        yield from self.__extract_revisions(lang, params, lists, empty, workers, mode, lazy)
     
         return self
     
-    def extract_revisions_by_date(self, lang=None, first=None, last=None, lists=True, empty=False):   
+    @_steps
+    def extract_revisions_by_date(self, lang=None, first=None, last=None, lists=True, empty=False, workers=1, mode='html', lazy=False):   
         """
         Extract all revisions made within a specified timeframe.
         
@@ -375,6 +625,12 @@ class Parse:
                 will only look for revisions done on the first date.
             lists: Include lists in text (default True).
             empty: If set as True it will only extract the metadata (default False).
+            workers: The number of revisions which are extracted concurrently (default 1). 
+                With a pool of processes, use at least as many workers as processes, 
+                otherwise a RuntimeWarning is given.
+            mode: Parse the rendered "html" of the revisions, or the "wikitext" (default "html").
+            lazy: If set as True the revisions are saved compressed, and a revision is only 
+                parsed when its content is requested, e.g. by get_text (default False).
         
         Returns:
             An instance of the ParseWiki class is returned.
@@ -382,6 +638,8 @@ class Parse:
         Raises:
             ValueError: A valid start date must be specified.
             ValueError: A valid end date must be specified.
+            ValueError: The number of workers must be a positive integer.
+            ValueError: The mode must be "html" or "wikitext".
             ValueError: The specified dates are are newer than date of the main page.
             ValueError: The sepcified dates could not be converted to a ISO 8601 timestamp.
             ValueError: An unexpected error occured while connecting to Wikipedia.
@@ -395,6 +653,16 @@ class Parse:
             self.__error(self.__line_no(), 'A valid end date must be specified.', None)
             return False
         
+        if type(workers) is not int or workers < 1:
+            self.__error(self.__line_no(), 'The number of workers must be a positive integer.', None)
+            return False
+        
+        if mode not in ('html', 'wikitext'):
+            self.__error(self.__line_no(), 'The mode must be "html" or "wikitext".', None)
+            return False
+        
+        _check_workers(self._processes, workers)
+        
         if last is None:
             last = first
         
@@ -430,26 +698,14 @@ class Parse:
             'rvstart' : last,
             'rvend': first
         }
-    
-        while True:
-
-            data = self.__extract(params, lang)
-            
-            pageid = list(data['query']['pages'].keys())[0]             
-            
-            # Extract revisions within the date range
-            
-            if 'revisions' in data['query']['pages'][pageid]:
-                for revision in data['query']['pages'][pageid]['revisions']:               
-                    self.extract_revision(lang=lang, revid=revision['revid'], lists=lists, empty=empty)
-                
-            if 'continue' not in data:
-                break
-            
-            params['rvcontinue'] = data['continue']['rvcontinue']
+        
+        # Extract revisions within the date range
+        
+        yield from self.__extract_revisions(lang, params, lists, empty, workers, mode, lazy)
             
         return self
     
+    @_steps
     def extract_users(self, lang=None):   
         """
         Extract all the users who have contributed to this page in a specified language.      
@@ -481,7 +737,7 @@ class Parse:
         
         while True:
 
-            data = self.__extract(params, lang)
+            data = yield from self.__extract(params, lang)
             
             pageid = list(data['query']['pages'].keys())[0]           
             
@@ -497,9 +753,8 @@ class Parse:
             
             params['rvcontinue'] = data['continue']['rvcontinue']
             
-        for i in self._content['pages']:
-            if lang in self._content['pages'][i]['language']:
-                self._content['pages'][i]['users'] = users
+        for page in self.__pages(lang):
+            page['users'] = users
                 
         return self
 
@@ -507,11 +762,25 @@ class Parse:
         """
         Retrieve the saved Wikipedia data in a JSON format.     
         
+        The pages, revisions and sections are saved as records, which are exported as 
+        dicts, so the json object is a copy of the saved data.
+        
         Returns:
             A dict with all the saved data is returned.
         """
         
-        return self._content
+        return export(self._content)
+    
+    def get_stats(self):
+        """
+        Retrieve the number of requests, cache hits and retries, and the time spent in 
+        each processing stage.
+        
+        Returns:
+            A dict with the collected figures (see Stats.get_stats).
+        """
+        
+        return self._stats.get_stats()
     
     def get_page(self, lang=None, revid=None):
         """
@@ -537,11 +806,7 @@ class Parse:
             page = self.__has_page(lang)
             
             if page is not None:
-                if 'revisions' in page:
-                    del page['revisions']
-                if 'users' in page:
-                    del page['users']                
-                return page
+                return page.export(('revisions', 'users'))
             else:
                 self.__error(self.__line_no(), 'The requested page is not available.', None)
                 return False
@@ -550,7 +815,7 @@ class Parse:
             page = self.__has_revisions(lang, revid)
             
             if page is not None:              
-                return page
+                return self.__unpack(page).export()
             else:
                 self.__error(self.__line_no(), 'The requested revision is not available.', None)
                 return False
@@ -564,7 +829,9 @@ class Parse:
         
         Args:
             lang: The article language (default None).
-            user: An author name to look for (default None).
+            user: An author name to look for (default None). With a date or date range, 
+                only the revisions of this author in the range are returned. Up to version 
+                1.0.2 the author was ignored when a date was specified.
             first: The first date to look for (default None).
             last: The last date to look for (default None). If no date is specified it 
                 will only look for revisions done on the first date.
@@ -625,15 +892,9 @@ class Parse:
                    return False
                 
                 if 'revisions' in page:
-                    for i in page['revisions']:
-                        revision = page['revisions'][i]
-                        date = parse(revision['date'])
-                        date = date.strftime('%Y-%m-%d')
-                        if first <= date <= last:
-                            if user is not None and user == revision['user']:
-                                pageid.append(revision['oldid'])
-                            else:
-                                pageid.append(revision['oldid'])
+                    for revision in self.__between(lang, page['revisions'], first, last):
+                        if user is None or user == revision['user']:
+                            pageid.append(revision['oldid'])
                 else:
                     pageid = []
                             
@@ -657,6 +918,7 @@ class Parse:
             self.__error(self.__line_no(), 'The requested title is not available in this language.', None)
             return False
     
+    @_steps
     def get_pageviews(self, lang=None, access='all-access', agents='all-agents', interval='daily', first=None, last=None):
         """
         Get the number of page views for the main Wikipedia page. 
@@ -777,15 +1039,14 @@ class Parse:
             
             # Request the number of page views
             
-            resp = requests.get(rest)
-            data = resp.json()
+            status, data = yield 'get', rest, None
 
-            if resp.status_code != requests.codes.ok:
-                    if 'detail' in data:
+            if status != requests.codes.ok:
+                    if data is not None and 'detail' in data:
                         self.__error(self.__line_no(), data['detail'], None)
                         return False
                     else:                        
-                        self.__error(self.__line_no(), ' '.join(['An unexpected error occured while connecting to Wikipedia (Status code:', resp.status_code, ').']), None)
+                        self.__error(self.__line_no(), ' '.join(['An unexpected error occured while connecting to Wikipedia (Status code:', str(status), ').']), None)
                         return False
             
             if 'items' not in data:
@@ -911,12 +1172,12 @@ class Parse:
                 
                 revision = self.__has_revisions(lang, revid=revid, date=None)
                 
-                if revision['empty'] is True:                    
+                if revision is not None and revision['empty'] is True:                    
                     self.__error(self.__line_no(), 'The requested revision is empty.', None)
                     return False
                     
                 if revision is not None:
-                    content = self.__extract_selection(revision['sections'], start, length, seq, headers)
+                    content = self.__extract_selection(self.__unpack(revision)['sections'], start, length, seq, headers)
                 else:
                     self.__error(self.__line_no(), 'The requested revision identifier is not available.', None)
                     return False
@@ -925,12 +1186,12 @@ class Parse:
                 
                 revision = self.__has_revisions(lang, revid=None, date=date)
                 
-                if revision['empty'] is True:
+                if revision is not None and revision['empty'] is True:
                     self.__error(self.__line_no(), 'The requested revision is empty.', None)
                     return False
                     
                 if revision is not None:
-                    content = self.__extract_selection(revision['sections'], start, length, seq, headers)
+                    content = self.__extract_selection(self.__unpack(revision)['sections'], start, length, seq, headers)
                 else:
                     raise ValueError("The requested revision identifier is not available.")
                     self.__error(self.__line_no(), 'The requested revision identifier is not available.', None)
@@ -1146,13 +1407,13 @@ class Parse:
             if revid is not None:                        
                 revision = self.__has_revisions(lang, revid=revid, date=None)
                 if revision is not None and revision['empty'] is False:
-                    for j in revision['sections']:
+                    for j in self.__unpack(revision)['sections']:
                         headers.append(revision['sections'][j]['header'])
             
             if date is not None:             
                 revision = self.__has_revisions(lang, revid=None, date=date)
                 if revision is not None and revision['empty'] is False:
-                    for j in revision['sections']:
+                    for j in self.__unpack(revision)['sections']:
                         headers.append(revision['sections'][j]['header'])
             
             #extract headers for the current page
@@ -1199,25 +1460,25 @@ class Parse:
             if revid is not None :                        
                 revision = self.__has_revisions(lang, revid=revid, date=None)
                 if revision is not None and revision['empty'] is False:
-                    references = revision['references']
+                    references = self.__unpack(revision)['references']
             
             if date is not None:             
                 revision = self.__has_revisions(lang, revid=None, date=date)
                 if revision is not None and revision['empty'] is False:
-                    references = revision['references']
+                    references = self.__unpack(revision)['references']
             
             #extract references for the current page
             
             if revid is None and date is None:
                 references = page['references']
                     
-            return references
+            return list(references)
                     
         else:     
             self.__error(self.__line_no(), 'The references are not saved in this language.', None)
             return False
     
-    def get_differences(self, lang=None, revid=None, date=None, compare=False):
+    def get_differences(self, lang=None, revid=None, date=None, compare=False, words=False):
         """
         Extract all the differences from a saved wikipedia page compared to its previous version.
         
@@ -1229,9 +1490,13 @@ class Parse:
             revid: The revision identifier (default None).
             date: The revision date (default None).
             compare: A flag to specify if the script should only return the difference or also the previous
+            words: Return the removed and added words of each changed or added paragraph instead 
+                of the paragraphs (default False).
         
         Returns:
-            A list with all the differences used in the requested page, and optional a list with the original
+            A list with all the differences used in the requested page, and optional a list with the original. 
+            With words, a list with a dict for each changed or added paragraph, with the removed and 
+            added words.
         
         Raises:
             ValueError: Retrieving the differences of the current page are not supported yet.
@@ -1253,16 +1518,22 @@ class Parse:
                 self.__error(self.__line_no(), 'Retrieving the differences of the current page are not supported yet.', None)
                 return False
                    
-            if revid is not None and revision['empty'] is False:                        
+            revision = None
+            
+            if revid is not None:                        
                 revision = self.__has_revisions(lang, revid=revid, date=None)
 
-            if date is not None and revision['empty'] is False:             
+            if date is not None:             
                 revision = self.__has_revisions(lang, revid=None, date=date)
                 
             if revision is not None and revision['empty'] is False:
+                self.__differences(lang, self.__unpack(revision))
                 differences = revision['differences']['difference']
                 original = revision['differences']['original']
             
+            if words is True:
+                return self._diff.words({ 'original' : original, 'difference' : differences })
+            
             if compare is True:
                 return differences, original
                 
@@ -1303,7 +1574,7 @@ class Parse:
                 revision = self.__has_revisions(lang, revid=None, date=date)
                 
             try:
-                content = revision['sections']
+                content = self.__unpack(revision)['sections']
             except:
                 return False
                     
@@ -1341,7 +1612,8 @@ class Parse:
             else:
                 
                 # Check the first page. If this is correct then assume the others are correct as well
-                validate = wiki['pages']['0']
+                # (the keys are strings in a json object, and integers in a dict from get_wiki)
+                validate = next(iter(wiki['pages'].values()))
                 
                 if ('date' in validate 
                     and 'title' in validate
@@ -1355,14 +1627,14 @@ class Parse:
                     else:
                         
                         # Check the revision. If this is correct then assume the others are correct as well
-                        revision = validate['revisions']['0']
+                        revision = next(iter(validate['revisions'].values()))
                         
+                        # A revision which is not parsed yet has a payload instead of its content
                         if ('user' in revision 
                             and 'oldid' in revision
                             and 'comment' in revision
                             and 'date' in revision
-                            and 'sections' in revision
-                            and 'references' in revision):
+                            and (('sections' in revision and 'references' in revision) or 'payload' in revision)):
                             
                             return True
                         
@@ -1388,10 +1660,40 @@ class Parse:
         """ 
         
         if lang in self._languages['available']:
-            for i in self._content['pages']:
-                if lang in self._content['pages'][i]['language']:
-                    return self._content['pages'][i]
+            pages = self.__pages(lang)
+            if pages:
+                return pages[0]
         return None
+    
+    def __pages(self, lang):
+        """
+        Internal method which returns the saved pages in a language.
+        
+        The pages are indexed by their language when they are looked up for the first 
+        time. The index is created again when a page is extracted, or when the pages 
+        are changed or replaced in another way.
+        
+        Args:
+            lang: The article language.
+        
+        Returns:
+            A list with the saved pages in this language, in the order in which they 
+            are saved.
+        """
+        
+        pages = self._content['pages']
+        index = self._pages
+        
+        if index is None or index['pages'] is not pages or index['size'] != len(pages):
+            
+            index = {'pages' : pages, 'size' : len(pages), 'languages' : {}}
+            
+            for i in pages:
+                index['languages'].setdefault(pages[i]['language'], []).append(pages[i])
+            
+            self._pages = index
+        
+        return index['languages'].get(lang, [])
         
     def __has_revisions(self, lang, revid=None, date=None):
         """
@@ -1411,101 +1713,285 @@ class Parse:
         if page is not None:
             if 'revisions' in page:
                 if revid is not None:
-                    for j in page['revisions']:
-                        if str(revid) in page['revisions'][j]['oldid']:
-                            return page['revisions'][j]       
+                    revision = self.__index(lang, page['revisions'])['ids'].get(str(revid))
+                    if revision is not None:
+                        return revision
                 if date is not None:
-                    date = parse(date)
-                    date = date.strftime('%Y-%m-%d')
-                    for j in page['revisions']:
-                        revdate = parse(page['revisions'][j]['date'])
-                        revdate = revdate.strftime('%Y-%m-%d')
-                        if date == revdate:
-                            return page['revisions'][j]
+                    date = self.__date(date)
+                    index = self.__dates(lang, page['revisions'])
+                    start = bisect_left(index['days'], date)
+                    if start < len(index['days']) and index['days'][start] == date:
+                        return index['dates'][start][2]
         return None
     
-    def __extract(self, params, lang):
+    def __index(self, lang, revisions):
         """
-        Internal method which extracts information from the MediaWiki API.    
+        Internal method which returns the index of the saved revisions of a page.
+        
+        The index is created when the revisions of a page are looked up for the first 
+        time (e.g. after a json wiki object is loaded), and it is updated when a revision 
+        is saved. If the revisions are changed or replaced in another way, the index is 
+        created again and replaces the index of the old revisions.
         
         Args:
-            params: A dict with the WikiMedia API paramaters to extract the previous 
-                revision identifier.
             lang: The article language.
+            revisions: A dict with the saved revisions of the (first) page in this language.
         
         Returns:
-            A string with the previous revision identifier.
+            A dict with the revisions by their identifier, and the date and position of 
+            each revision.
+        """
         
-        Raises:
-            ValueError: An unexpected error occured while connecting to Wikipedia.
+        index = self._revisions.get(lang)
+        
+        if index is None or index['revisions'] is not revisions or index['size'] != len(revisions):
+            
+            index = {'revisions' : revisions, 'size' : 0, 'ids' : {}, 'dates' : [], 'days' : None}
+            
+            for j in revisions:
+                self.__add(index, revisions[j])
+            
+            self._revisions[lang] = index
+        
+        return index
+    
+    def __add(self, index, revision):
         """
+        Internal method which adds a saved revision to the index of its page.
         
-        url = self._prefix + lang + self._suffix       
+        Args:
+            index: The index of the saved revisions of a page.
+            revision: A dict with the revision data.
+        """
+        
+        # The first revision with an identifier is returned, as before
         
-        resp = requests.get(url, params)
+        index['ids'].setdefault(str(revision['oldid']), revision)
+        index['dates'].append((self.__date(revision['date']), index['size'], revision))
         
-        if resp.status_code != requests.codes.ok:
-             raise ValueError("An unexpected error occured while connecting to Wikipedia (Status code: ", resp.status_code, ").")
+        # The dates are sorted again when they are looked up
         
-        return resp.json()
+        index['size'] += 1
+        index['days'] = None
     
-    def __extract_metadata(self, pageid, title, lang):
+    def __dates(self, lang, revisions):
         """
-        Internal method which extracts the wiki metadata to setup this class.    
+        Internal method which returns the index of the saved revisions of a page, in which 
+        the revisions are sorted by their date and position.
         
         Args:
-            pageid: The Wiki page identifier.
-            title: The Wiki page title.
             lang: The article language.
+            revisions: A dict with the saved revisions of the (first) page in this language.
         
         Returns:
-            True if the metadata is succesfully extracted and saved
-            
-        Raises:
-            ValueError: The page you specified doesn't exist.
+            The index of the revisions, with a sorted list of the dates.
         """
         
-        if pageid is None:
-            
-            params = {
-                'action' : 'parse',
-                'prop' : 'langlinks',
-                'page' : title.replace(' ', '_'),
-                'format' : 'json'
-            }
-            
-        else:
-            
-            params = {
-                'action' : 'parse',
-                'prop' : 'langlinks',
-                'pageid' : pageid,
-                'format' : 'json'
-            }
+        index = self.__index(lang, revisions)
         
-        data = self.__extract(params, lang)
-
-        if 'error' in data:
-            self.__error(self.__line_no(), 'The page you specified doesn\'t exist.', None)
-            return False, False
-            
-        else:
-            
-            pageid = data['parse']['pageid']            
-            
-            languages = {
-                'default' : {},
-                'available' : {}
-            }            
-            
-            languages['default'][lang] = data['parse']['title']
-            languages['available'][lang] = data['parse']['title'] 
-            
+        if index['days'] is None:
+            index['dates'].sort(key=itemgetter(0, 1))
+            index['days'] = [date[0] for date in index['dates']]
+        
+        return index
+    
+    def __between(self, lang, revisions, first, last):
+        """
+        Internal method which returns the saved revisions of a page in a date range.
+        
+        Args:
+            lang: The article language.
+            revisions: A dict with the saved revisions of the (first) page in this language.
+            first: The first date, formatted as YYYY-MM-DD.
+            last: The last date, formatted as YYYY-MM-DD.
+        
+        Returns:
+            A list with the revisions, in the order in which they are saved.
+        """
+        
+        index = self.__dates(lang, revisions)
+        
+        dates = index['dates'][bisect_left(index['days'], first):bisect_right(index['days'], last)]
+        
+        return [date[2] for date in sorted(dates, key=itemgetter(1))]
+    
+    def __date(self, date):
+        """
+        Internal method which returns the date of a timestamp.
+        
+        Args:
+            date: A string with a timestamp.
+        
+        Returns:
+            A string with the date, formatted as YYYY-MM-DD.
+        """
+        
+        # The timestamps of Wikipedia do not have to be parsed
+        
+        if self._iso_date.match(date) is not None:
+            return date[:10]
+        
+        return parse(date).strftime('%Y-%m-%d')
+    
+    def _run(self, steps):
+        """
+        Internal method which runs the requests yielded by an extraction method.
+        
+        Each request is send with a blocking call to the transport, and the response (or 
+        the raised exception) is passed back into the extraction method. Concurrent steps 
+        are run by a pool of worker threads, and the thread waits for the worker process 
+        of a parse step.
+        
+        Args:
+            steps: A generator which yields the requests of an extraction method.
+        
+        Returns:
+            The return value of the extraction method.
+        """
+        
+        response = error = None
+        
+        while True:
+            
+            try:
+                if error is None:
+                    request = steps.send(response)
+                else:
+                    request = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            
+            response = error = None
+            
+            try:
+                
+                if request[0] == 'get':
+                    response = self._transport.get_json(request[1], request[2], self._stats)
+                    
+                elif request[0] == 'parse':
+                    response = self._processes.submit(_parse, self._parser, *request[1:]).result()
+                    
+                elif request[2] > 1:
+                    with ThreadPoolExecutor(max_workers=request[2]) as pool:
+                        response = list(pool.map(self._run, request[1]))
+                        
+                else:
+                    response = [self._run(step) for step in request[1]]
+                    
+            except Exception as e:
+                error = e
+    
+    def __extract(self, params, lang):
+        """
+        Internal method which extracts information from the MediaWiki API.    
+        
+        Args:
+            params: A dict with the WikiMedia API paramaters.
+            lang: The article language.
+        
+        Returns:
+            A dict with the decoded response.
+        
+        Raises:
+            ValueError: An unexpected error occured while connecting to Wikipedia.
+        """
+        
+        if self._cache is not None:
+            
+            data = self._cache.get(lang, params)
+            
+            if data is not None:
+                self._stats.hit('responses', params)
+                return data
+        
+        url = self._prefix + lang + self._suffix       
+        
+        status, data = yield 'get', url, params
+        
+        if status != requests.codes.ok:
+             raise ValueError("An unexpected error occured while connecting to Wikipedia (Status code: ", status, ").")
+        
+        # Do not save errors, such as a page that does not exist (yet)
+        
+        if self._cache is not None and 'error' not in data:
+            self._cache.set(lang, params, data)
+        
+        return data
+    
+    def __extract_metadata(self, pageid, title, lang):
+        """
+        Internal method which extracts the wiki metadata to setup this class.    
+        
+        Args:
+            pageid: The Wiki page identifier.
+            title: The Wiki page title.
+            lang: The article language.
+        
+        Returns:
+            True if the metadata is succesfully extracted and saved
+            
+        Raises:
+            ValueError: The page you specified doesn't exist.
+        """
+        
+        if pageid is None:
+            
+            params = {
+                'action' : 'parse',
+                'prop' : 'langlinks',
+                'page' : title.replace(' ', '_'),
+                'format' : 'json'
+            }
+            
+        else:
+            
+            params = {
+                'action' : 'parse',
+                'prop' : 'langlinks',
+                'pageid' : pageid,
+                'format' : 'json'
+            }
+        
+        data = yield from self.__extract(params, lang)
+
+        if 'error' in data:
+            self.__error(self.__line_no(), 'The page you specified doesn\'t exist.', None)
+            return False, False
+            
+        else:
+            
+            pageid = data['parse']['pageid']            
+            
+            languages = {
+                'default' : {},
+                'available' : {}
+            }            
+            
+            languages['default'][lang] = data['parse']['title']
+            languages['available'][lang] = data['parse']['title'] 
+            
             for i in data['parse']['langlinks']:
                 languages['available'][i['lang']] = i['*']
                 
             return pageid, languages   
         
+    def __languages(self, lang, titles):
+        """
+        Internal method which creates the language metadata from the titles of a page.
+        
+        Args:
+            lang: The default article language.
+            titles: A dict with the title of the page in each language.
+        
+        Returns:
+            A dict with the title in the default language and all available languages.
+        """
+        
+        return {
+            'default' : {lang : titles[lang]},
+            'available' : dict(titles)
+        }
+    
     def __extract_property(self, params, lang):
         """
         Internal method which extracts the revision identifier and timestamp.    
@@ -1516,20 +2002,576 @@ class Parse:
             lang: The article language.
         
         Returns:
-            A string with the revision identifier, timestamp, user, and user comment.
+            A dict with the revision identifier, timestamp, user, user comment, and size.
         """
         
-        data = self.__extract(params, lang)
+        data = yield from self.__extract(params, lang)
         
         pageid = list(data['query']['pages'].keys())[0]
 
-        root = data['query']['pages'][pageid]['revisions'][0]
+        return data['query']['pages'][pageid]['revisions'][0]
+    
+    def __extract_revision(self, lang, root, lists, empty, mode, compare=True, sources=None, lazy=False):
+        """
+        Internal method which extracts a single revision.
+        
+        This method does not change the saved content, which makes it safe to run
+        it concurrently.
+        
+        Args:
+            lang: The article language.
+            root: A dict with the revision metadata as returned by a MediaWiki revisions 
+                query (i.e. revid, parentid, timestamp, user, comment and size).
+            lists: Include lists in text.
+            empty: If set as True it will only extract the metadata.
+            mode: Parse the rendered "html" or the "wikitext" of the revision.
+            compare: Compare the revision with its predecessor (default True). If set as 
+                False, the previous revision identifier and the differences are left out, 
+                and the revision is not saved in the ResultCache.
+            sources: A dict with the wikitext of revisions which has been requested already, 
+                by revision identifier (default None).
+            lazy: Save the compressed html or wikitext instead of the parsed content 
+                (default False).
+        
+        Returns:
+            A dict with the revision data.
+        """
+        
+        revid = root['revid']
+        
+        if sources is None:
+            sources = {}
+        
+        revision = {
+            'oldid' : str(revid),
+            'date' : root['timestamp'],
+            'user' : root['user'],
+            'comment' : root.get('comment', ''),
+            'size' : root['size'],
+            'empty' : empty
+        }               
+     
+        if empty is not True:
+            
+            # Only extract and parse the revision if it has not been parsed before
+            
+            result = None
+            
+            if self._results is not None:
+                result = self._results.get(lang, revid, lists, mode)
+            
+            if result is not None and 'differences' in result:
+                self._stats.hit('results')
+            
+            else:
+                
+                result = yield from self.__extract_content(lang, revid, lists, mode, sources.get(revid), lazy)
+                
+                if compare is True:
+                    
+                    yield from self.__extract_differences(lang, root, result, {})
+                    
+                    if self._results is not None and lazy is False:
+                        self._results.set(lang, revid, lists, result, mode)
+            
+            revision.update(result)
+        
+        return revision
+    
+    def __extract_content(self, lang, revid, lists, mode, source=None, lazy=False):
+        """
+        Internal method which extracts and parses the content of a single revision.
+        
+        Args:
+            lang: The article language.
+            revid: The revision identifier.
+            lists: Include lists in text.
+            mode: Parse the rendered "html" or the "wikitext" of the revision.
+            source: The wikitext of the revision, if it has been requested already 
+                (default None).
+            lazy: Return the compressed html or wikitext instead of the parsed content 
+                (default False).
+        
+        Returns:
+            A dict with the sections, references and external links of the revision, or 
+            a dict with the payload if lazy is set as True.
+        """
+        
+        if mode == 'wikitext':
+            
+            if source is None:
+                source = (yield from self.__extract_source(lang, [revid]))[revid]
+            
+            if lazy is True:
+                return {'payload' : self.__pack(mode, lists, source, None)}
+            
+            result = yield from self.__parse('__extract_wikitext', source, lists)
+            
+        else:
+            
+            params = {
+                'action' : 'parse',
+                'prop' : 'text|externallinks',
+                'format' : 'json',
+                'oldid' : revid
+            } 
+            
+            data = (yield from self.__extract(params, lang))['parse']
+            
+            if lazy is True:
+                return {'payload' : self.__pack(mode, lists, data['text']['*'], data['externallinks'])}
+            
+            result = yield from self.__parse('__extract_html', data['text']['*'], lists)
+            result['externallinks'] = data['externallinks']
         
-        # Some revisions do not have the 'comment' argument
-        if 'comment' not in root:
-            root['comment'] = ''
+        return result
+    
+    def __extract_differences(self, lang, root, result, known):
+        """
+        Internal method which adds the previous revision identifier and the differences 
+        to a revision.
+        
+        If the predecessor of the revision has been extracted, the paragraphs of both 
+        revisions are compared locally. Otherwise the differences are requested from 
+        Wikipedia. The paragraphs of a revision which is not parsed yet are compared 
+        when its differences are requested.
+        
+        Args:
+            lang: The article language.
+            root: A dict with the revision metadata as returned by a MediaWiki revisions query.
+            result: A dict with the parsed content of the revision, which is updated.
+            known: A dict with extracted revisions which are not saved yet, by revision 
+                identifier.
+        """
+        
+        parent = str(root.get('parentid', ''))
+        
+        # The first revision of a page has no predecessor
+        
+        if parent == '0':
+            result['previous'] = 0
+            result['differences'] = { 'original' : '', 'difference' : '' } 
+            return
+        
+        previous = known.get(parent)
+        
+        if previous is None and parent != '':
+            previous = self.__has_revisions(lang, parent)
+        
+        # Revisions with only metadata cannot be compared
+        
+        if previous is not None and ('sections' in previous or 'payload' in previous):
+            
+            result['previous'] = root['parentid']
+            
+            if 'payload' not in result:
+                self.__compare(result, previous)
+            
+            return
+        
+        try:
+            
+            compare = (yield from self.__extract({
+                'action' : 'compare',
+                'fromrev' : str(root['revid']),
+                'torelative' : 'prev',
+                'format' : 'json'               
+            }, lang))['compare']      
+            
+        except Exception:  
+            
+            self.__error(self.__line_no(), 'The compare key is not found', None)
+            compare = ''
+            pass
+        
+        if 'fromrevid' not in compare:
+            prev = 0
+            diff = { 'original' : '', 'difference' : '' } 
+            
+        else:
+            prev = compare['fromrevid']
+            diff = yield from self.__parse('__extract_difference', compare['*'])
 
-        return root['revid'], root['timestamp'], root['user'], root['comment'], root['size']
+        result['previous'] = prev                
+        result['differences'] = diff         
+    
+    def __extract_revisions(self, lang, params, lists, empty, workers, mode, lazy):
+        """
+        Internal method which extracts all revisions returned by a MediaWiki revisions query.
+        
+        The revisions in each batch of query results are extracted concurrently, but 
+        they are always saved in the order of the query results. The wikitext of the 
+        revisions is requested for 50 revisions at once. The revisions are 
+        compared with their predecessors once the batch is extracted, so a predecessor 
+        in the same batch is compared locally. The predecessor of the last revision is 
+        listed in the next batch, so this revision is saved with the next batch.
+        
+        Args:
+            lang: The article language.
+            params: A dict with the WikiMedia API paramaters to list the revisions.
+            lists: Include lists in text.
+            empty: If set as True it will only extract the metadata.
+            workers: The number of revisions which are extracted concurrently.
+            mode: Parse the rendered "html" or the "wikitext" of the revisions.
+            lazy: Save the compressed html or wikitext instead of the parsed content.
+        """
+        
+        held = []
+        
+        while True:
+
+            data = yield from self.__extract(params, lang)
+            
+            pageid = list(data['query']['pages'].keys())[0]             
+            
+            roots = list()
+            
+            if 'revisions' in data['query']['pages'][pageid]:
+                for root in data['query']['pages'][pageid]['revisions']:
+                    
+                    # Skip revisions which are already saved
+                    
+                    if self.__has_revisions(lang, root['revid']) is None:
+                        roots.append(root)
+            
+            sources = {}
+            
+            if mode == 'wikitext' and empty is not True:
+                sources = yield from self.__extract_sources(lang, roots, lists, workers)
+            
+            steps = [self.__extract_revision(lang, root, lists, empty, mode, False, sources, lazy) for root in roots]
+            
+            revisions = held + list(zip(roots, (yield 'map', steps, workers)))
+            known = {revision['oldid'] : revision for root, revision in revisions}
+            
+            held = []
+            
+            # Compare the revisions which are not taken from the ResultCache
+            
+            compare = [
+                (root, revision) for root, revision in revisions 
+                if revision['empty'] is not True and 'previous' not in revision
+            ]
+            
+            if 'continue' in data and compare and compare[-1][1] is revisions[-1][1]:
+                held = revisions[-1:]
+                revisions = revisions[:-1]
+                compare = compare[:-1]
+            
+            yield 'map', [self.__extract_differences(lang, root, revision, known) for root, revision in compare], workers
+            
+            if self._results is not None and lazy is False:
+                for root, revision in compare:
+                    self._results.set(lang, root['revid'], lists, {key : revision[key] for key in self._result}, mode)
+            
+            for root, revision in revisions:
+                self.__save_revision(lang, revision)
+            
+            if 'continue' not in data:
+                break
+            
+            params['rvcontinue'] = data['continue']['rvcontinue']
+    
+    def __extract_sources(self, lang, roots, lists, workers):
+        """
+        Internal method which extracts the wikitext of revisions in batches.
+        
+        Args:
+            lang: The article language.
+            roots: A list with the revision metadata as returned by a MediaWiki revisions query.
+            lists: Include lists in text.
+            workers: The number of batches which are extracted concurrently.
+        
+        Returns:
+            A dict with the wikitext of each revision identifier, except for the revisions 
+            which are kept in the ResultCache.
+        """
+        
+        revids = [
+            root['revid'] for root in roots 
+            if self._results is None or not self._results.has(lang, root['revid'], lists, 'wikitext')
+        ]
+        
+        steps = [
+            self.__extract_source(lang, revids[i:i + self._batch]) 
+            for i in range(0, len(revids), self._batch)
+        ]
+        
+        sources = {}
+        
+        for source in (yield 'map', steps, workers):
+            sources.update(source)
+        
+        return sources
+    
+    def __extract_source(self, lang, revids):
+        """
+        Internal method which extracts the wikitext of one or more revisions.
+        
+        Args:
+            lang: The article language.
+            revids: A list with at most 50 revision identifiers.
+        
+        Returns:
+            A dict with the wikitext of each revision identifier. The wikitext of a revision 
+            which does not exist, or which content is hidden, is an empty string.
+        """
+        
+        params = {
+            'action' : 'query',
+            'prop' : 'revisions',
+            'rvprop' : 'ids|content',
+            'rvslots' : 'main',
+            'format' : 'json',
+            'revids' : '|'.join(str(revid) for revid in revids)
+        }
+        
+        source = dict.fromkeys(revids, '')
+        
+        while True:
+            
+            data = yield from self.__extract(params, lang)
+            
+            for page in data['query'].get('pages', {}).values():
+                for revision in page.get('revisions', []):
+                    source[revision['revid']] = self.__revision_source(revision)
+            
+            # Large revisions can be spread over several responses
+            
+            if 'continue' not in data:
+                break
+            
+            params.update(data['continue'])
+        
+        return source
+    
+    def __revision_source(self, revision):
+        """
+        Internal method which gets the wikitext from a revision returned by a MediaWiki 
+        revisions query, with or without slots.
+        """
+        
+        if 'slots' in revision:
+            revision = revision['slots']['main']
+        
+        return revision.get('*', '')
+    
+    def __pack(self, mode, lists, content, externallinks):
+        """
+        Internal method which compresses the html or wikitext of a revision, so it can be 
+        parsed later.
+        
+        Args:
+            mode: Whether the content is "html" or "wikitext".
+            lists: Include lists in text.
+            content: A string with the html or wikitext.
+            externallinks: A list with the external links, or None for wikitext.
+        
+        Returns:
+            A string with the compressed payload, which can be saved in a json object.
+        """
+        
+        payload = json.dumps({
+            'mode' : mode,
+            'lists' : lists,
+            'content' : content,
+            'externallinks' : externallinks
+        })
+        
+        return base64.b64encode(zlib.compress(payload.encode('utf8'))).decode('ascii')
+    
+    def __unpack(self, revision):
+        """
+        Internal method which parses the payload of a revision, if it is not parsed yet.
+        
+        The parsed sections, references and external links replace the payload, so a 
+        revision is only parsed once.
+        
+        Args:
+            revision: A dict with the revision data.
+        
+        Returns:
+            The revision.
+        """
+        
+        if 'payload' not in revision:
+            return revision
+        
+        result = self.__parse_payload(revision['payload'])
+        
+        del revision['payload']
+        revision.update(result)
+        
+        return self.__intern(revision)
+    
+    def __parse_payload(self, payload):
+        """
+        Internal method which parses the compressed html or wikitext of a revision.
+        
+        Args:
+            payload: A string with the compressed payload.
+        
+        Returns:
+            A dict with the parsed sections, references and external links.
+        """
+        
+        payload = json.loads(zlib.decompress(base64.b64decode(payload)).decode('utf8'))
+        
+        if payload['mode'] == 'wikitext':
+            return self.__extract_wikitext(payload['content'], payload['lists'])
+        
+        result = self.__extract_html(payload['content'], payload['lists'])
+        result['externallinks'] = payload['externallinks']
+        
+        return result
+    
+    def __compare(self, revision, previous):
+        """
+        Internal method which compares the paragraphs of a revision with its predecessor.
+        
+        A revision which is not parsed yet is parsed to compare it, but it keeps its payload, 
+        so comparing a lazy revision does not unpack its predecessor.
+        
+        Args:
+            revision: A dict with the revision data, to which the differences are added.
+            previous: A dict with the data of the predecessor, or None if the predecessor 
+                is not saved.
+        """
+        
+        if previous is None:
+            revision['differences'] = { 'original' : [], 'difference' : [] }
+            return
+        
+        original = self.__sections(previous)
+        sections = self.__sections(revision)
+        
+        with self._stats.timer('differences'):
+            revision['differences'] = self._diff.compare(original, sections)
+    
+    def __sections(self, revision):
+        """
+        Internal method which gets the sections of a revision, without unpacking it.
+        """
+        
+        if 'payload' in revision:
+            return self.__parse_payload(revision['payload'])['sections']
+        
+        return revision['sections']
+    
+    def __differences(self, lang, revision):
+        """
+        Internal method which compares a revision which was saved before it was parsed 
+        with its predecessor, if it has not been compared yet.
+        
+        Args:
+            lang: The article language.
+            revision: A dict with the revision data.
+        
+        Returns:
+            The revision.
+        """
+        
+        if 'differences' in revision:
+            return revision
+        
+        previous = self.__has_revisions(lang, revision['previous'])
+        
+        self.__compare(revision, previous)
+        
+        return revision
+    
+    def __records(self, wiki):
+        """
+        Internal method which converts a json wiki object into records.
+        
+        Args:
+            wiki: A dict of a previous saved wikipedia page.
+        
+        Returns:
+            A dict with the saved pages as records.
+        """
+        
+        content = dict(wiki, pages=numbered(wiki['pages'], Page))
+        
+        for i in content['pages']:
+            
+            page = self.__intern(content['pages'][i])
+            
+            for j in page.get('revisions', {}):
+                self.__intern(page['revisions'][j])
+        
+        return content
+    
+    def __intern(self, record):
+        """
+        Internal method which replaces the sections, references and external links of a 
+        saved page or revision by identical ones which are saved already.
+        
+        Consecutive revisions share most of their sections, references and external links, 
+        so each distinct section, string and list is kept once. The lists are saved as 
+        tuples, so they cannot be changed through one of the records which share them.
+        
+        Args:
+            record: A Page or Revision record.
+        
+        Returns:
+            The record.
+        """
+        
+        sections = self._store['sections']
+        strings = self._store['strings']
+        lists = self._store['lists']
+        
+        if 'sections' in record:
+            
+            for i in record['sections']:
+                
+                # The sections are found by their paragraphs, the headers are compared
+                
+                section = record['sections'][i]
+                shared = sections.setdefault(section['content'], section)
+                
+                if shared is section:
+                    section['header'] = strings.setdefault(section['header'], section['header'])
+                elif shared['header'] == section['header']:
+                    record['sections'][i] = shared
+        
+        for key in ('references', 'externallinks'):
+            
+            if key in record:
+                value = tuple(strings.setdefault(item, item) for item in record[key])
+                record[key] = lists.setdefault(value, value)
+        
+        return record
+    
+    def __save_revision(self, lang, revision):
+        """
+        Internal method which saves a revision by the specified language.
+        
+        Args:
+            lang: The article language.
+            revision: A dict with the revision data.
+        """
+        
+        revision = self.__intern(Revision(revision))
+        
+        for i, page in enumerate(self.__pages(lang)):
+            
+            #save revision by the specified language
+            
+            if 'revisions' not in page:
+                page['revisions'] = {}
+            
+            revisions = page['revisions']
+            
+            # Only the first page in a language is looked up, so only its revisions are indexed
+            
+            if i == 0:
+                index = self.__index(lang, revisions)
+                revisions[len(revisions)] = revision
+                self.__add(index, revision)
+            else:
+                revisions[len(revisions)] = revision
     
     def __extract_selection(self, content, start, length, seq, headers):
         """
@@ -1555,6 +2597,10 @@ class Parse:
             ValueError: The smallest value in the sequence list is smaller than 1.
         """
         
+        # The sections are numbered with strings in a json object
+        
+        content = list(content.values())
+        
         # Create sequence is none is specified
         
         if len(content) == 0:
@@ -1607,44 +2653,108 @@ class Parse:
             
         # Run sequence
         
-        selection = list()        
-
-        if type(seq) is not list:
-            self.__error(self.__line_no(), 'The provided sequence value is not a list.', None)
-            return False
-        elif not all(isinstance(s, int) for s in seq):
-            self.__error(self.__line_no(), 'The provided values in the sequence list contains a non-number.', None)
-            return False
-        else:
-            
-            seq.sort()
-            seq = list(set(seq))
-
-            if seq[-1] > len(content):
-                self.__error(self.__line_no(), 'The largest value in the sequence list is larger than the number of paragraphs in the Wiki.', None)
-                return False
-            elif seq[0] < 1:
-                self.__error(self.__line_no(), 'The smallest value in the sequence list is smaller than 1.', None)
-                return False
-            else:                
-                                
-                seq[:] = [x - 1 for x in seq]
-                
-                for i in seq:  
-                    if headers is True:
-                        selection.append(content[i]['header'] + '.\n')
-                    selection.append(content[i]['content'] + '\n')
-
-        return selection
+        selection = list()        
+
+        if type(seq) is not list:
+            self.__error(self.__line_no(), 'The provided sequence value is not a list.', None)
+            return False
+        elif not all(isinstance(s, int) for s in seq):
+            self.__error(self.__line_no(), 'The provided values in the sequence list contains a non-number.', None)
+            return False
+        else:
+            
+            seq.sort()
+            seq = list(set(seq))
+
+            if seq[-1] > len(content):
+                self.__error(self.__line_no(), 'The largest value in the sequence list is larger than the number of paragraphs in the Wiki.', None)
+                return False
+            elif seq[0] < 1:
+                self.__error(self.__line_no(), 'The smallest value in the sequence list is smaller than 1.', None)
+                return False
+            else:                
+                                
+                seq[:] = [x - 1 for x in seq]
+                
+                for i in seq:  
+                    if headers is True:
+                        selection.append(content[i]['header'] + '.\n')
+                    selection.append(content[i]['content'] + '\n')
+
+        return selection
+    
+    def __parse(self, method, *args):
+        """
+        Internal method which runs a parse method, in a worker process if a process pool 
+        is specified.
+        
+        Args:
+            method: The name of the parse method, e.g. "__extract_html".
+            args: The arguments of the method.
+        
+        Returns:
+            The return value of the method.
+        """
+        
+        if self._processes is None:
+            return getattr(self, '_Parse' + method)(*args)
+        
+        result, stages = yield 'parse', method, args
+        
+        for stage, elapsed in stages:
+            self._stats.stage(stage, elapsed)
+        
+        return result
+    
+    def __extract_html(self, content, lists):
+        """
+        Internal method which parses the html of a Wikipedia page once and extracts the 
+        sections and references.
+        
+        Args:
+            content: A string with the html of the parsed Wikipedia page.
+            lists: Include lists in text.
+        
+        Returns:
+            A dict with all headers and corresponding paragraphs, and all references.
+        """
+        
+        with self._stats.timer('soup'):
+            soup = self.__soup(content)
+        
+        # The sections are cleared in place, so extract the references first
+        
+        references = self.__extract_references(soup)
+        
+        return {
+            'sections' : self.__extract_sections(soup, lists),
+            'references' : references
+        }
+    
+    def __extract_wikitext(self, content, lists):
+        """
+        Internal method which strips the wikitext of a Wikipedia page and extracts the 
+        sections, references and external links.
+        
+        Args:
+            content: A string with the wikitext of the page.
+            lists: Include lists in text.
+        
+        Returns:
+            A dict with all headers and corresponding paragraphs, all references, and all 
+            external links.
+        """
+        
+        with self._stats.timer('wikitext'):
+            return self._wikitext.parse(content, lists)
     
-    def __extract_sections(self, params, lang, lists):
+    def __extract_sections(self, soup, lists):
         """
         Internal method which extracts the headers and corresponding paragraphs from a 
         Wikipedia page.    
         
         Args:
-            params: A dict with the WikiMedia API paramaters to extract the Wikipedia page.
-            lang: The article language (default "en").
+            soup: A BeautifulSoup object with the parsed Wikipedia page.
             lists: Include lists in text.
         
         Returns:
@@ -1653,106 +2763,152 @@ class Parse:
         
         sections = {}
         
-        data = self.__extract(params, lang)
-
-        soup = bs.BeautifulSoup(data['parse']['text']['*'], 'html.parser')
+        content = soup.select_one(self._css_selector)
         
-        soup = bs.BeautifulSoup(
-            str(soup.select(self._css_selector)), 'html.parser'
-        )
+        if content is None:
+            return sections
         
         # Remove everything except headings and paragraphs
         
-        content = str(self.__clear_html(soup, lists))
+        with self._stats.timer('clear_html'):
+            content = self.__clear_html(content, lists)
         
         # Parse headers and paragraphs
         
-        content = '\n'.join([ll.rstrip() for ll in content.splitlines() if ll.strip()])
-        content = re.sub('<\/[^<]+?>', '', content)
-        content = re.sub('\n', '', content)
-        content = content.replace('<p>', '<*>').replace('<h2>', '<*>[header]')
-        content = re.split('<[^<]+?>', content)        
+        with self._stats.timer('sections'):
+            for section in self.__split_sections(content):
+                sections[len(sections)] = section
+        
+        return sections
+    
+    def __split_sections(self, content):
+        """
+        Internal method which splits the cleared content of a Wikipedia page into sections.
         
-        content[0] = '[header]Summary'
+        Each h2 tag starts a new section, the text before the first h2 tag belongs to the 
+        summary. Within a section each tag starts a new paragraph, and the paragraphs are 
+        joined by newlines. Line breaks and the white space before them are removed. The 
+        content is walked once, and only the current section is kept in memory.
         
-        content = content[0:-1]
+        Args:
+            content: The element with the cleared content of the page.
         
-        index = list()
+        Returns:
+            A generator which yields a dict with the header and content of each section in 
+            document order. Sections without content are skipped.
+        """
         
-        i = 0
-        for section in content:        
-            if '[header]' in section: 
-                index.append(i)
-            i += 1
+        header = 'Summary'
         
-        sections = {}
+        # The text before the first tag is not part of any section
         
-        for j in index:
+        paragraphs = None
+        heading = False
+        
+        # A section is only yielded when the next section starts, because the last 
+        # paragraph of the page decides whether it keeps its last paragraph
+        
+        pending = None
+        
+        paragraph = []
+        text = []
+        
+        stack = [(element, False) for element in reversed(content.contents)]
+        
+        while stack:
             
-            h = content[j].replace('[header]', '')            
-            s = j + 1
+            element, closing = stack.pop()
             
-            if len(index) > 1:
-                
-                e = index[1] - 1
-
-                if s is e:
-                    p = [content[s]]
-                else:
-                    p = ['\n'.join(content[s:e])]
-                    
-                sections[len(sections)] = {'header': h, 'content' : p}
+            # The text is escaped as in the html of the page (see bs4 "minimal" formatter)
+            
+            if type(element) is bs.NavigableString and element.parent.name not in ('script', 'style'):
+                text.append(element.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+                continue
+            
+            if isinstance(element, bs.NavigableString) and not element.PREFIX:
+                text.append(element.output_ready())
+                continue
+            
+            # Each tag ends the current text, an opening tag also ends the paragraph
             
+            if text:
+                paragraph.append(self._line_breaks.sub('', ''.join(text)))
+                text = []
+            
+            if closing:
+                continue
+            
+            if paragraphs is None:
+                paragraphs = []
+            elif heading is True:
+                header = ''.join(paragraph)
             else:
+                paragraphs.append(''.join(paragraph))
+            
+            paragraph = []
+            heading = False
+            
+            if isinstance(element, bs.Tag):
                 
-                e = len(content)
-                p = ['\n'.join(content[s:e])]
-                sections[len(sections)] = {'header': h, 'content' : p} 
+                if element.name == 'h2':
+                    
+                    if pending is not None:
+                        yield from self.__section(pending[0], self.__trim(pending[1]))
+                    
+                    pending = (header, paragraphs)
+                    paragraphs = []
+                    heading = True
                 
-            index = index[1:]
-
-        content = {}
-        for k in sections.keys():
-            if '' not in sections[k]['content']:
-                content[len(content)] = { 'header' : sections[k]['header'], 'content' : sections[k]['content'][0] }
-        
-        return content
-    
-    def __extract_links(self, lang, oldid=None):
-        """
-        Internal method which extracts all the external links in the Wikipedia page.    
+                stack.append((element, True))
+                stack.extend((child, False) for child in reversed(element.contents))
         
-        Args:
-            lang: The article language.
-            oldid: Parse the content of this revision identifier (default None).
+        paragraph.append(self._line_breaks.sub('', ''.join(text)).rstrip())
         
-        Returns:
-            A list with all the external links.
-        """
+        if paragraphs is None:
+            return
         
-        params = {
-            'action' : 'parse',
-            'prop' : 'externallinks',
-            'format' : 'json',
-        }
+        # The last paragraph of the page is left out. If the page ends with a header, 
+        # the previous section keeps its last paragraph.
         
-        if oldid is None:
-            params['page'] = self.get_title(lang).replace(' ', '_')
+        if heading is True:
             
-        else:
-            params['oldid'] = oldid 
+            if pending is not None:
+                yield from self.__section(pending[0], pending[1])
             
-        data = self.__extract(params, lang)
+            return
+        
+        paragraphs.append(''.join(paragraph))
+        
+        if pending is not None:
+            yield from self.__section(pending[0], self.__trim(pending[1]))
+        
+        yield from self.__section(header, paragraphs[:-1])
+    
+    def __trim(self, paragraphs):
+        """
+        Internal method which leaves out the last paragraph of a section with several 
+        paragraphs.
+        """
+        
+        if len(paragraphs) > 1:
+            return paragraphs[:-1]
+        
+        return paragraphs
+    
+    def __section(self, header, paragraphs):
+        """
+        Internal method which yields a section, unless it has no content.
+        """
         
-        return data['parse']['externallinks']   
+        if '\n'.join(paragraphs) != '':
+            yield {'header' : header, 'content' : '\n'.join(paragraphs)}
     
-    def __extract_references(self, params, lang):
+    def __extract_references(self, soup):
         """
         Internal method which extracts the references from a Wikipedia page.    
         
         Args:
-            params: A dict with the WikiMedia API paramaters to extract the Wikipedia page.
-            lang: The article language (default "en").
+            soup: A BeautifulSoup object with the parsed Wikipedia page, which is not changed.
         
         Returns:
             A list with all the references.
@@ -1760,37 +2916,56 @@ class Parse:
         
         references = []
         
-        data = self.__extract(params, lang)
-        
-        soup = bs.BeautifulSoup(data['parse']['text']['*'], 'html.parser')
+        with self._stats.timer('references'):
+            
+            for li in soup.select(self._css_references):
+                reference = ''.join(self.__reference_text(li))
+                reference = re.sub('\^\s', '', reference)
+                references.append(reference)
 
-        soup = bs.BeautifulSoup(
-            str(soup.select(self._css_references)), 'html.parser'
-        )
+            return references
+    
+    def __reference_text(self, element):
+        """
+        Internal method which collects the text of a reference.
         
-        # Remove html but keep text
-        elements = soup.findAll('sup')
-        for element in elements:
-            element.replace_with('')
-      
-        elements = soup.findAll('span', attrs={'class' : 'mw-cite-backlink'})
-        for element in elements:
-            element.replace_with('')
+        Superscripts, backlinks and spans with a style (except the normal font style) 
+        are skipped, the text of all other tags is kept.
+        
+        Args:
+            element: The list item of the reference.
+        
+        Returns:
+            A list with the strings of the reference in document order.
+        """
         
-        elements = soup.findAll('span', attrs={'style' : 'font-style:normal'})
-        for element in elements:
-            element.replaceWithChildren()
+        strings = []
+        stack = list(reversed(element.contents))
+        
+        while stack:
             
-        elements = soup.findAll('span', attrs={'style' : True})
-        for element in elements:
-            element.replace_with('')
-
-        for li in soup.findAll('li'):
-            reference = li.get_text()
-            reference = re.sub('\^\s', '', reference)
-            references.append(reference)
-
-        return references
+            element = stack.pop()
+            
+            # Only text, no comments or scripts
+            
+            if type(element) is bs.NavigableString:
+                strings.append(element)
+                continue
+            
+            if not isinstance(element, bs.Tag) or element.name == 'sup':
+                continue
+            
+            if element.name == 'span':
+                
+                if 'mw-cite-backlink' in element.get('class', []):
+                    continue
+                
+                if element.get('style', 'font-style:normal') != 'font-style:normal':
+                    continue
+            
+            stack.extend(reversed(element.contents))
+        
+        return strings
     
     def __extract_difference(self, content):
         """
@@ -1806,90 +2981,99 @@ class Parse:
             ValueError: Expecting one column when something new is added or two columns if somthing was changed, but more columns were found.
         """
 
-        soup = bs.BeautifulSoup(content, 'html.parser')
-
-        original = []
-        difference = []
-        
-        table = False
-        
-        for tr in soup.findAll('tr'):
+        with self._stats.timer('soup'):
+            soup = self.__soup(content)
         
-            for td in tr.findAll('td'):
-                
-                if 'diff-marker' in td.get('class')[0]:
+        with self._stats.timer('differences'):
+            
+            original = []
+            difference = []
+            
+            table = False
+            
+            for tr in soup.findAll('tr'):
+            
+                for td in tr.findAll('td'):
                     
-                    if '+' in td.get_text() or '-' in td.get_text():
-                        el = td.parent                
-                        el = el.findAll('div')
+                    if 'diff-marker' in td.get('class')[0]:
                         
-                        # A new piece is added
+                        marker = td.get_text()
                         
-                        if len(el) < 2:
+                        if '+' in marker or '-' in marker:
+                            el = td.parent                
+                            el = el.findAll('div')
                             
-                            for e in el:                   
-                                
-                                # Skip tables
+                            # A new piece is added
+                            
+                            if len(el) < 2:
                                 
-                                if '{|' in e.get_text():
-                                    table = True
-                                if '|}' in e.get_text():
-                                    table = False
+                                for e in el:                   
+                                    
+                                    text = e.get_text()
                                     
-                                if table is False:
+                                    # Skip tables
                                     
-                                    content = self.__clear_differences(e.get_text())
+                                    if '{|' in text:
+                                        table = True
+                                    if '|}' in text:
+                                        table = False
                                         
-                                    if content is not '':
-                                        original.append('')
-                                        difference.append(self.__clear_differences(e.get_text()))
-                        
-                        # Something has changed
-                        
-                        elif len(el) is 2:
+                                    if table is False:
+                                        
+                                        content = self.__clear_differences(text)
+                                            
+                                        if content != '':
+                                            original.append('')
+                                            difference.append(content)
                             
-                            flag = False
+                            # Something has changed
                             
-                            for e in el:                    
+                            elif len(el) == 2:
                                 
-                                # Skip tables
+                                flag = False
                                 
-                                if '{|' in e.get_text():
-                                    table = True
-                                if '|}' in e.get_text():
-                                    table = False
+                                for e in el:                    
                                     
-                                if table is False:
+                                    text = e.get_text()
                                     
-                                    if flag is False:
-                                        
-                                        content = self.__clear_differences(e.get_text())
-                                        
-                                        if content is not '':
-                                            original.append(self.__clear_differences(e.get_text()))
-                                        
-                                        flag = True
+                                    # Skip tables
+                                    
+                                    if '{|' in text:
+                                        table = True
+                                    if '|}' in text:
+                                        table = False
                                         
-                                    else:
+                                    if table is False:
                                         
-                                        content = self.__clear_differences(e.get_text())
+                                        content = self.__clear_differences(text)
                                         
-                                        if content is not '':
-                                            difference.append(self.__clear_differences(e.get_text()))
+                                        if flag is False:
+                                            
+                                            if content != '':
+                                                original.append(content)
+                                            
+                                            flag = True
+                                            
+                                        else:
+                                            
+                                            if content != '':
+                                                difference.append(content)
 
-                                        flag = False
-                                        
-                        else:                    
-                            self.__error(self.__line_no(), 'Expecting one column when something new is added or two columns if somthing was changed, but more columns were found.', None)
-                            return False
-        
-        return { 'original' : original, 'difference' : difference }
+                                            flag = False
+                                            
+                            else:                    
+                                self.__error(self.__line_no(), 'Expecting one column when something new is added or two columns if somthing was changed, but more columns were found.', None)
+                                return False
+            
+            return { 'original' : original, 'difference' : difference }
     
     def __clear_differences(self, content):
         """
         Internal method which strips some non-content data from differences string.  
         
-        This function strips some (but not all) unrelated html tags and unrelated content.        
+        This function strips some (but not all) unrelated html tags and unrelated content. 
+        The patterns are compiled once, and a pattern is only applied if the line contains 
+        the markup it removes.
         
         Args:
             content: A string with the extracted html data.
@@ -1897,24 +3081,43 @@ class Parse:
         Returns:
             A string with the processed data.
         """
-        content = re.sub('<ref(.*?)</ref>|<ref(.*?)/>', '', content) 
-        content = re.sub('[[]{2}(File:|Category:)(.*?)]{2}', '', content)
-        content = re.sub('[{]{2}(.*?)[}]{2}', '', content)
         
-        def filter_links(m):
-            return re.sub('[[]{2}(.*?)[|]|]]', '', m.group(0))            
+        if '<ref' in content:
+            content = self._wiki_references.sub('', content)
         
-        content = re.sub('[[]{2}(.*?)[|](.*?)]{2}', filter_links, content)
-        content = re.sub('[[]{2}|]{2}', '', content)
-        content = re.sub('(=){2,4}(.*?)(=){2,4}', '', content)
+        if '[[' in content:
+            content = self._wiki_files.sub('', content)
         
-        def filter_layout(m):
-            return re.sub('(\'){2,4}|(\'){2,4}', '', m.group(0)) 
-            
-        content = re.sub('(\'){2,4}(.*?)(\'){2,4}', filter_layout, content)        
-        content = re.sub('([|]})', '', content)
+        if '{{' in content:
+            content = self._wiki_templates.sub('', content)
         
-        return content
+        if '[[' in content and '|' in content:
+            content = self._wiki_links.sub(self.__filter_links, content)
+        
+        if '[[' in content or ']]' in content:
+            content = self._wiki_brackets.sub('', content)
+        
+        if '==' in content:
+            content = self._wiki_headers.sub('', content)
+        
+        if "''" in content:
+            content = self._wiki_layout.sub(self.__filter_layout, content)
+        
+        return content.replace('|}', '')
+    
+    def __filter_links(self, match):
+        """
+        Internal method which keeps only the label of a link with a label.
+        """
+        
+        return self._wiki_labels.sub('', match.group(0))
+    
+    def __filter_layout(self, match):
+        """
+        Internal method which removes the quotes of bold and italic text.
+        """
+        
+        return self._wiki_quotes.sub('', match.group(0))
     
     def __clear_html(self, content, lists):
         """
@@ -1924,110 +3127,143 @@ class Parse:
         Note that this function is subject to change in case the html layout 
         of Wikipedia changes.
         
+        The page is walked only once. The action for each tag is looked up in the 
+        _html_rules table, so a new rule does not add another walk over the page.
+        
         Args:
-            content: A string with the extracted html data.
+            content: The element with the content of the page. Its descendants are cleared 
+                in place, the element itself is kept.
             lists: Include lists (ul, ol, or dl tags) in text.
         
         Returns:
-            A string with the processed data.
+            The cleared element.
         """
-
-        # Remove first div, but keep all content
-
-        elements = content.find('div').replaceWithChildren()
         
-        # Remove remaining div from the page
+        unwrap = []
+        paragraphs = []
         
-        elements = content.findAll('div')
-        for element in elements:
-            element.replace_with('')
-
-        # Remove tables from the page
-
-        elements = content.findAll('table')
-        for element in elements:
-            element.replace_with('')
+        stack = [content]
         
-         # Remove scripts from the page
+        while stack:
+            
+            for element in list(stack.pop().contents):
+                
+                # Remove comments
+                
+                if isinstance(element, bs.Comment):
+                    element.extract()
+                    continue
+                
+                if not isinstance(element, bs.Tag):
+                    continue
+                
+                action = self.__html_action(element, lists)
+                
+                # Remove the tag and its content, an empty string is left in its place
+                
+                if action == 'drop':
+                    element.replace_with('')
+                    continue
+                
+                if action == 'unwrap':
+                    unwrap.append(element)
+                elif element.name == 'p':
+                    paragraphs.append(element)
+                
+                stack.append(element)
         
-        elements = content.findAll('noscript')
-        for element in elements:
-            element.replace_with('')  
+        # Remove html but keep text, nested tags first
         
-        # Remove lists from the page
+        for element in reversed(unwrap):
+            element.unwrap()
         
-        elements = content.findAll('ul')
-        for element in elements:
-            if lists is True:
-                element.replaceWithChildren()
-            else:
-                element.replace_with('')
-        elements = content.findAll('ol')
-        for element in elements:
-            if lists is True:
-                element.replaceWithChildren()
-            else:
-                element.replace_with('')
-        elements = content.findAll('dl')
-        for element in elements:
-            if lists is True:
-                element.replaceWithChildren()
-            else:
-                element.replace_with('')
-
-        # Remove additional information
-
-        elements = content.findAll('span', attrs={"id": "coordinates"})
-        for element in elements:
-            element.replace_with('')
-        elements = content.findAll('span', attrs={"class": "mw-editsection"})
-        for element in elements:
-            element.replace_with('')
+        # Remove empty paragraphs
+        
+        empty = [element for element in paragraphs if not element.contents]
+        [element.extract() for element in empty]
+                
+        return content
+    
+    def __html_action(self, tag, lists):
+        """
+        Internal method which looks up the action for a tag in the _html_rules table.
         
-        # Remove comments
+        Args:
+            tag: A BeautifulSoup tag.
+            lists: Include lists (ul, ol, or dl tags) in text.
         
-        comments = content.findAll(text=lambda text:isinstance(text, bs.Comment))
-        [comment.extract() for comment in comments]
+        Returns:
+            A string with the action ("drop" or "unwrap"), or None to keep the tag.
+        """
         
-        # Remove sub headers
+        for attrs, action in self._html_rules.get(tag.name, ()):
+            
+            if attrs is not None:
+                
+                value = tag.get(attrs[0])
+                
+                # Tags can have several classes
+                
+                if isinstance(value, list):
+                    if attrs[1] not in value and ' '.join(value) != attrs[1]:
+                        continue
+                elif value != attrs[1]:
+                    continue
+            
+            if action == 'list':
+                return 'unwrap' if lists is True else 'drop'
+            
+            return action
         
-        elements = content.findAll('h3')
-        for element in elements:
-            element.replace_with('')                
+        return None
         
-        # Remove html but keep text
+    def __soup(self, content):
+        """
+        Internal method which parses html with the selected parser.
         
-        elements = content.findAll('a')
-        for element in elements:
-            element.replaceWithChildren()
+        Args:
+            content: A string with the html.
         
-        elements = content.findAll('b')
-        for element in elements:
-            element.replaceWithChildren()  
+        Returns:
+            A BeautifulSoup object.
+        """
         
-        elements = content.findAll('sup')
-        for element in elements:
-            element.replaceWithChildren()
+        soup = bs.BeautifulSoup(content, self._parser)
         
-        elements = content.findAll('i')
-        for element in elements:
-            element.replaceWithChildren()
+        # Unlike html.parser, lxml wraps a html fragment in html and body tags
         
-        elements = content.findAll('span')
-        for element in elements:
-            element.replaceWithChildren()
+        if self._parser == 'lxml' and soup.html is not None:
+            
+            for tag in soup.html.find_all(['head', 'body'], recursive=False):
+                tag.unwrap()
+            
+            soup.html.unwrap()
         
-        elements = content.findAll('abbr')
-        for element in elements:
-            element.replaceWithChildren()
+        return soup
+    
+    def __parser(self, parser):
+        """
+        Internal method which selects the html parser.
         
-        # Remove empty paragraphs
+        Args:
+            parser: The html parser, or None to use the default parser.
         
-        empty = content.findAll(lambda tag: tag.name == 'p' and not tag.contents and (tag.string is None or not tag.string.strip()))
-        [empty.extract() for empty in empty]
-                
-        return content
+        Raises:
+            ValueError: The parser must be "lxml" or "html.parser".
+            ImportError: The lxml parser requires lxml.
+        """
+        
+        if parser is None:
+            return
+        
+        if parser not in ('lxml', 'html.parser'):
+            raise ValueError('The parser must be "lxml" or "html.parser".')
+        
+        if parser == 'lxml' and lxml is None:
+            raise ImportError('The lxml parser requires lxml.')
         
+        self._parser = parser
+    
     def __line_no(self):
         """
         Internal method to get the current line number.
@@ -2056,3 +3292,147 @@ class Parse:
         if self._ignore is False:
             raise ValueError(error)
 
+
+class AsyncParse(Parse):
+    """
+    This class parses Wikipedia pages with non-blocking requests for asyncio
+    """
+    
+    def __init__(self, wiki=None, lang='en', ignore=True, transport=None, cache=None, results=None, languages=None, stats=None, parser=None, processes=None):
+        """
+        Initialize the AsyncParse class.
+        
+        The metadata of the page is extracted when the instance is awaited, e.g.
+        wiki = await AsyncParse(23862). The extraction methods (extract, extract_revision,
+        extract_revisions_by_date, extract_revisions_by_user, extract_users and 
+        get_pageviews) must be awaited as well. All other methods are the same as in 
+        the Parse class.
+        
+        Args:
+            wiki: The Wiki page identifier, title or a json wiki object (default None).
+            lang: The article language which will be used as the default language (default "en").
+            ignore: Set to False to raise exeptions, which is helpfull for debugging (default True).
+            transport: The AsyncTransport used to connect to Wikipedia (default None). If no 
+                transport is specified, a pooled transport which is shared by all instances 
+                is used.
+            cache: A DiskCache in which the MediaWiki API responses are saved (default None).
+            results: A ResultCache in which the parsed revisions are kept (default None).
+            languages: A dict with the title of the page in each language, including the default 
+                language (default None). If it is specified together with a page identifier or 
+                json wiki object, the titles are not requested from Wikipedia.
+            stats: The Stats in which the requests, cache hits, retries and processing time 
+                are counted (default None, i.e. a new Stats instance for this instance).
+            parser: The html parser used by BeautifulSoup, either "html.parser" or "lxml" 
+                (default None, i.e. "html.parser"). lxml is several times faster, but it repairs 
+                invalid html (e.g. a paragraph in a header) in another way, so the text of such 
+                a page can differ.
+            processes: A ProcessPoolExecutor in which the html, wikitext and differences are 
+                parsed (default None, i.e. they are parsed in the thread which requested them). 
+                Each thread waits for its own page or revision, so the number of workers 
+                limits the number of pages and revisions waiting to be parsed.
+        
+        Raises:
+            ValueError: The parser must be "lxml" or "html.parser".
+            ImportError: The lxml parser requires lxml.
+        """
+        
+        if transport is None:
+            transport = get_async_transport()
+        
+        self._init_state(transport, cache, results, stats, parser, processes)
+        
+        self.__wiki = wiki
+        self.__lang = lang
+        self.__languages = languages
+        self.__raise = ignore is False
+        
+    def __await__(self):
+        return self.__load().__await__()
+    
+    async def __aenter__(self):
+        return await self
+    
+    async def __aexit__(self, *args):
+        await self.close()
+    
+    async def close(self):
+        """
+        Close the pooled connections of the transport.
+        
+        The connections of a transport are bound to the event loop in which they are 
+        opened, so close the instance before its event loop is closed, e.g. at the end of 
+        the coroutine which is run by asyncio.run, or use the instance as an async context 
+        manager. If the transport is shared with other instances (e.g. the default 
+        transport), their connections are closed as well, and they are opened again on 
+        the next request.
+        """
+        
+        await self._transport.close()
+    
+    async def __load(self):
+        """
+        Internal method which extracts the metadata to setup this class.
+        
+        Returns:
+            An instance of the AsyncParse class.
+        """
+        
+        await self._setup(self.__wiki, self.__lang, self.__languages)
+        
+        if self.__raise is True:
+            self._ignore = False
+        
+        return self
+    
+    async def _run(self, steps):
+        """
+        Internal method which runs the requests yielded by an extraction method.
+        
+        Each request is awaited on the transport, and the response (or the raised 
+        exception) is passed back into the extraction method. Concurrent steps are 
+        gathered on the running event loop, and parse steps are awaited on the worker 
+        processes.
+        
+        Args:
+            steps: A generator which yields the requests of an extraction method.
+        
+        Returns:
+            The return value of the extraction method.
+        """
+        
+        response = error = None
+        
+        while True:
+            
+            try:
+                if error is None:
+                    request = steps.send(response)
+                else:
+                    request = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            
+            response = error = None
+            
+            try:
+                
+                if request[0] == 'get':
+                    response = await self._transport.get_json(request[1], request[2], self._stats)
+                
+                elif request[0] == 'parse':
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        self._processes, partial(_parse, self._parser, *request[1:])
+                    )
+                
+                else:
+                    
+                    workers = asyncio.Semaphore(request[2])
+                    
+                    async def run(step):
+                        async with workers:
+                            return await self._run(step)
+                    
+                    response = await asyncio.gather(*[run(step) for step in request[1]])
+                    
+            except Exception as e:
+                error = e
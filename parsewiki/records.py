@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+class Record:
+    """
+    This class is the base class of the records in which the extracted pages are saved
+    """
+
+    # The keys of a record, in the order in which they are exported
+    _fields = ()
+
+    __slots__ = ('_extra',)
+
+    def __init__(self, data=None):
+        """
+        Initialize the Record class.
+
+        A record has a slot for each of its keys, which takes much less memory than a dict.
+        It can be read and changed like a dict, keys which are not set are missing. Other
+        keys (e.g. from a json wiki object which is changed by hand) are kept in a dict.
+
+        Args:
+            data: A dict or record with the initial keys and values (default None).
+        """
+
+        self._extra = None
+
+        if data is not None:
+            self.update(data)
+
+    def __getitem__(self, key):
+
+        if key in self._fields:
+
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+
+        if key in self._fields:
+            setattr(self, key, self._convert(key, value))
+
+        else:
+
+            if self._extra is None:
+                self._extra = {}
+
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+
+        if key in self._fields:
+
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        elif self._extra is None or key not in self._extra:
+            raise KeyError(key)
+
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+
+        if key in self._fields:
+            return hasattr(self, key)
+
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def get(self, key, default=None):
+        """
+        Get the value of a key, or the default value if the key is not set.
+        """
+
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """
+        Get the keys which are set, in the order in which they are exported.
+        """
+
+        return list(self)
+
+    def update(self, data):
+        """
+        Set the keys and values of a dict or record.
+        """
+
+        for key in data.keys():
+            self[key] = data[key]
+
+    def export(self, skip=()):
+        """
+        Export the record, and the records it contains, as a dict.
+
+        Args:
+            skip: The keys which are left out (default ()).
+
+        Returns:
+            A dict with the same layout as the json wiki object.
+        """
+
+        return {key : export(self[key]) for key in self if key not in skip}
+
+    def _convert(self, key, value):
+        """
+        Internal method which converts a value before it is set, e.g. to a dict of records.
+        """
+
+        return value
+
+class Section(Record):
+    """
+    This class holds the header and paragraphs of a section
+    """
+
+    _fields = ('header', 'content')
+
+    __slots__ = _fields
+
+class Revision(Record):
+    """
+    This class holds a saved revision of a page
+    """
+
+    _fields = (
+        'oldid', 'date', 'user', 'comment', 'size', 'empty', 'payload', 'sections',
+        'references', 'externallinks', 'previous', 'differences'
+    )
+
+    __slots__ = _fields
+
+    def _convert(self, key, value):
+
+        if key == 'sections':
+            return sections(value)
+
+        return value
+
+class Page(Record):
+    """
+    This class holds a saved page in one language, with its revisions and users
+    """
+
+    _fields = (
+        'language', 'date', 'title', 'sections', 'references', 'externallinks', 'previous',
+        'revisions', 'users'
+    )
+
+    __slots__ = _fields
+
+    def _convert(self, key, value):
+
+        if key == 'sections':
+            return sections(value)
+
+        if key == 'revisions':
+            return numbered(value, Revision)
+
+        return value
+
+def numbered(records, cls):
+    """
+    Convert a dict of dicts, e.g. the revisions of a page, into a dict of records.
+
+    The keys of a json object are strings, so the records are numbered again in the
+    order in which they are saved.
+
+    Args:
+        records: A dict with dicts or records.
+        cls: The Record class of the values.
+
+    Returns:
+        A dict with the records, numbered from 0.
+    """
+
+    return {
+        i : value if type(value) is cls else cls(value)
+        for i, value in enumerate(records.values())
+    }
+
+def sections(value):
+    """
+    Convert the sections of a page or revision into a dict of Section records.
+    """
+
+    return numbered(value, Section)
+
+def export(value):
+    """
+    Export a record, or a dict which contains records, as a dict.
+
+    Args:
+        value: A record, dict, tuple or other value.
+
+    Returns:
+        The value, in which each record is replaced by a dict and each tuple by a list.
+    """
+
+    if isinstance(value, Record):
+        return value.export()
+
+    if type(value) is dict:
+        return {key : export(value[key]) for key in value}
+
+    # The lists which are shared by several records are saved as tuples
+    if type(value) is tuple:
+        return list(value)
+
+    return value
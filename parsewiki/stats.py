@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+from contextlib import contextmanager
+
+import bisect
+import threading
+import time
+
+class Stats:
+    """
+    This class counts the requests, cache hits, retries and processing time of an extraction
+    """
+
+    _buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+
+    def __init__(self, callback=None):
+        """
+        Initialize the Stats class.
+
+        Requests are counted for each MediaWiki action and prop (e.g. "parse/text|externallinks"
+        or "compare"), requests to other APIs are counted as "rest". The latency of a request
+        is the time until the response headers arrive, which excludes any time spent waiting
+        for the rate limit or a free connection. The processing time is measured for each
+        stage: "soup" (building the BeautifulSoup tree), "clear_html", "sections", "references",
+        "differences" and "wikitext" (stripping the wikitext of a page).
+
+        The same instance can be shared by several instances of the Parse or Corpus class
+        (and their worker threads) to collect the figures of all of them.
+
+        Args:
+            callback: A callable which is called for each event with the event ("request",
+                "retry", "hit" or "stage"), the name of the request, cache or stage, and a
+                value (default None). The value is a dict with the bytes and latency of a
+                request, the delay before a retry, 1 for a cache hit, or the number of seconds
+                spent in a stage.
+        """
+
+        self.callback = callback
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def request(self, params, size, latency):
+        """
+        Count a request send to Wikipedia.
+
+        Args:
+            params: A dict with the query parameters, or None.
+            size: The number of bytes of the (decompressed) response.
+            latency: The number of seconds until the response headers arrived.
+        """
+
+        name = self.__name(params)
+
+        with self._lock:
+
+            request = self.__request(name)
+            request['count'] += 1
+            request['bytes'] += size
+            request['time'] += latency
+            request['latency'][self._buckets[bisect.bisect_left(self._buckets, latency)]] += 1
+
+        if self.callback is not None:
+            self.callback('request', name, {'bytes' : size, 'latency' : latency})
+
+    def retry(self, params, delay):
+        """
+        Count a request which is retried.
+
+        Args:
+            params: A dict with the query parameters, or None.
+            delay: The number of seconds before the request is retried.
+        """
+
+        name = self.__name(params)
+
+        with self._lock:
+            self.__request(name)['retries'] += 1
+            self._retries += 1
+
+        if self.callback is not None:
+            self.callback('retry', name, delay)
+
+    def hit(self, cache, params=None):
+        """
+        Count a cache hit.
+
+        Args:
+            cache: The name of the cache, i.e. "responses" for the DiskCache and "results"
+                for the ResultCache.
+            params: A dict with the query parameters of a cached response (default None).
+        """
+
+        with self._lock:
+
+            self._hits[cache] = self._hits.get(cache, 0) + 1
+
+            if params is not None:
+                self.__request(self.__name(params))['hits'] += 1
+
+        if self.callback is not None:
+            self.callback('hit', cache, 1)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Measure the time spent in a stage.
+
+        Args:
+            stage: The name of the stage.
+        """
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.stage(stage, time.perf_counter() - start)
+
+    def stage(self, stage, elapsed):
+        """
+        Add the time spent in a stage.
+
+        Args:
+            stage: The name of the stage.
+            elapsed: The number of seconds spent in the stage.
+        """
+
+        with self._lock:
+
+            if stage not in self._stages:
+                self._stages[stage] = {'count' : 0, 'time' : 0.0}
+
+            self._stages[stage]['count'] += 1
+            self._stages[stage]['time'] += elapsed
+
+        if self.callback is not None:
+            self.callback('stage', stage, elapsed)
+
+    def get_stats(self):
+        """
+        Get a copy of the collected figures.
+
+        Returns:
+            A dict with the requests (count, bytes, total latency, latency histogram,
+            retries and cache hits for each action and prop), the total number of retries,
+            the cache hits and the count and time of each stage.
+        """
+
+        with self._lock:
+
+            return {
+                'requests' : {
+                    name : dict(request, latency=dict(request['latency']))
+                    for name, request in self._requests.items()
+                },
+                'retries' : self._retries,
+                'hits' : dict(self._hits),
+                'stages' : {stage : dict(value) for stage, value in self._stages.items()}
+            }
+
+    def reset(self):
+        """
+        Remove all collected figures.
+        """
+
+        with self._lock:
+            self._requests = {}
+            self._retries = 0
+            self._hits = {}
+            self._stages = {}
+
+    def __request(self, name):
+        """
+        Internal method which gets the counters of a request, the lock must be held.
+        """
+
+        if name not in self._requests:
+            self._requests[name] = {
+                'count' : 0, 'bytes' : 0, 'time' : 0.0, 'retries' : 0, 'hits' : 0,
+                'latency' : dict.fromkeys(self._buckets, 0)
+            }
+
+        return self._requests[name]
+
+    def __name(self, params):
+        """
+        Internal method which creates the name of a request from its action and prop.
+        """
+
+        if params is None or 'action' not in params:
+            return 'rest'
+
+        prop = params.get('prop', params.get('list'))
+
+        if prop is None:
+            return str(params['action'])
+
+        return str(params['action']) + '/' + str(prop)
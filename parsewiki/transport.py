@@ -0,0 +1,507 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+import asyncio
+import json
+import random
+import requests
+import threading
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+class RetryPolicy:
+    """
+    This class decides when and how long to wait before a request is (re)send
+    """
+
+    _retry_status = (429, 500, 502, 503, 504)
+
+    def __init__(self, retries=3, backoff=1, backoff_max=60, maxlag=None, rate=None, burst=None):
+        """
+        Initialize the RetryPolicy class.
+
+        A request is retried when the connection fails, when the server is overloaded
+        (status code 429, 500, 502, 503 or 504), or when the replication lag of the MediaWiki
+        database is larger than maxlag. The delay between two attempts grows exponentially
+        with random jitter, but never shorter than the Retry-After header of the response.
+
+        The number of requests per host can be limited with a token bucket, which allows
+        short bursts while keeping the average rate. The same policy can be shared by
+        several transports to limit their combined rate.
+
+        Args:
+            retries: The maximum number of times a request is retried (default 3).
+            backoff: The delay before the first retry in seconds (default 1).
+            backoff_max: The maximum delay between two attempts in seconds (default 60).
+            maxlag: The maximum replication lag in seconds accepted from the MediaWiki API
+                (default None). See https://www.mediawiki.org/wiki/Manual:Maxlag_parameter
+            rate: The maximum average number of requests per second for each host (default
+                None, i.e. no limit).
+            burst: The maximum number of requests send at once to each host (default None,
+                i.e. the same as the rate).
+        """
+
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.maxlag = maxlag
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate or 1)
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def params(self, params):
+        """
+        Add the maxlag parameter to the parameters of a MediaWiki API request.
+
+        Args:
+            params: A dict with the query parameters.
+
+        Returns:
+            A dict with the query parameters.
+        """
+
+        if self.maxlag is None or params is None or 'maxlag' in params:
+            return params
+
+        return dict(params, maxlag=self.maxlag)
+
+    def wait(self, url):
+        """
+        Reserve a token for a request to the host of the url.
+
+        Args:
+            url: The url of the request.
+
+        Returns:
+            The number of seconds to wait before the request can be send.
+        """
+
+        if self.rate is None:
+            return 0
+
+        host = urlparse(url).netloc
+        now = time.monotonic()
+
+        with self._lock:
+
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate) - 1
+
+            self._buckets[host] = (tokens, now)
+
+        return 0 if tokens >= 0 else -tokens / self.rate
+
+    def delay(self, attempt, status=None, headers=None, data=None):
+        """
+        Get the delay before a request is retried.
+
+        Args:
+            attempt: The number of times the request has been retried.
+            status: The status code of the response, or None if the connection failed
+                (default None).
+            headers: The headers of the response (default None).
+            data: The decoded response (default None).
+
+        Returns:
+            The number of seconds to wait before the request is retried, or None if the
+            request should not be retried.
+        """
+
+        if status is not None:
+
+            lagged = (
+                status == 200 and isinstance(data, dict) and 
+                data.get('error', {}).get('code') == 'maxlag'
+            )
+
+            if status not in self._retry_status and not lagged:
+                return None
+
+        if attempt >= self.retries:
+            return None
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+        if headers is not None and 'Retry-After' in headers:
+            delay = max(delay, self.__retry_after(headers['Retry-After']))
+
+        return min(delay, self.backoff_max)
+
+    def __retry_after(self, value):
+        """
+        Internal method which converts a Retry-After header to a number of seconds.
+        """
+
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            return max(0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return 0
+
+class Transport:
+    """
+    This class holds a pooled keep-alive HTTP connection to the Wikipedia APIs
+    """
+
+    _headers = {
+        'Accept-Encoding' : 'gzip, deflate',
+        'Connection' : 'keep-alive',
+        'User-Agent' : 'ParseWiki/1.0.2 (https://github.com/jortdevreeze/ParseWiki)'
+    }
+
+    def __init__(self, connect_timeout=10, read_timeout=60, pool_connections=10, pool_maxsize=10, max_requests=None, headers=None, policy=None):
+        """
+        Initialize the Transport class.
+
+        A single session is shared by all requests, which keeps one connection pool for
+        each host (i.e. each language edition of Wikipedia). Connections are reused as
+        long as the server keeps them alive, so the TCP and TLS handshakes are only done
+        once for each pooled connection.
+
+        Args:
+            connect_timeout: The number of seconds to wait for a connection (default 10).
+            read_timeout: The number of seconds to wait for a response (default 60).
+            pool_connections: The number of hosts for which a pool is kept (default 10).
+            pool_maxsize: The number of connections kept in the pool of each host (default 10).
+            max_requests: The maximum number of requests in flight at the same time, shared by
+                all threads which use this transport (default None, i.e. no limit).
+            headers: A dict with additional HTTP headers send with each request (default None).
+            policy: The RetryPolicy which decides when requests are retried or delayed
+                (default None, i.e. a RetryPolicy with the default settings).
+        """
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.policy = policy if policy is not None else RetryPolicy()
+
+        if max_requests is not None:
+            self._inflight = threading.BoundedSemaphore(max_requests)
+        else:
+            self._inflight = None
+
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+
+        if headers is not None:
+            self._session.headers.update(headers)
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def get(self, url, params=None):
+        """
+        Send a GET request using a pooled connection.
+
+        Args:
+            url: The url of the API endpoint.
+            params: A dict with the query parameters (default None).
+
+        Returns:
+            A requests.Response object.
+        """
+
+        delay = self.policy.wait(url)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._inflight is None:
+            return self._session.get(url, params=params, timeout=self.timeout)
+
+        with self._inflight:
+            return self._session.get(url, params=params, timeout=self.timeout)
+
+    def get_json(self, url, params=None, stats=None):
+        """
+        Send a GET request using a pooled connection and decode the JSON response.
+
+        The request is retried as long as the retry policy allows it.
+
+        Args:
+            url: The url of the API endpoint.
+            params: A dict with the query parameters (default None).
+            stats: The Stats in which each attempt is counted (default None).
+
+        Returns:
+            A tuple with the status code and the decoded response, or None if the
+            response is not valid JSON.
+
+        Raises:
+            requests.ConnectionError: The connection failed too many times.
+            requests.Timeout: The request timed out too many times.
+        """
+
+        params = self.policy.params(params)
+        attempt = 0
+
+        while True:
+
+            try:
+                resp = self.get(url, params)
+
+            except (requests.ConnectionError, requests.Timeout):
+
+                delay = self.policy.delay(attempt)
+
+                if delay is None:
+                    raise
+
+            else:
+
+                try:
+                    data = resp.json()
+                except ValueError:
+                    data = None
+
+                # The elapsed time of a response is the time until its headers arrived
+                if stats is not None:
+                    stats.request(params, len(resp.content), resp.elapsed.total_seconds())
+
+                delay = self.policy.delay(attempt, resp.status_code, resp.headers, data)
+
+                if delay is None:
+                    return resp.status_code, data
+
+            if stats is not None:
+                stats.retry(params, delay)
+
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class AsyncTransport:
+    """
+    This class holds a pooled keep-alive HTTP connection to the Wikipedia APIs for asyncio
+    """
+
+    def __init__(self, connect_timeout=10, read_timeout=60, pool_maxsize=10, max_requests=None, headers=None, policy=None):
+        """
+        Initialize the AsyncTransport class.
+
+        This transport requires aiohttp. The session is created on the first request,
+        because it is bound to the running event loop.
+
+        Args:
+            connect_timeout: The number of seconds to wait for a connection (default 10).
+            read_timeout: The number of seconds to wait for a response (default 60).
+            pool_maxsize: The number of connections kept in the pool of each host (default 10).
+            max_requests: The maximum number of requests in flight at the same time (default
+                None, i.e. no limit).
+            headers: A dict with additional HTTP headers send with each request (default None).
+            policy: The RetryPolicy which decides when requests are retried or delayed
+                (default None, i.e. a RetryPolicy with the default settings).
+
+        Raises:
+            ImportError: The AsyncTransport requires aiohttp.
+        """
+
+        if aiohttp is None:
+            raise ImportError('The AsyncTransport requires aiohttp.')
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.max_requests = max_requests
+        self.policy = policy if policy is not None else RetryPolicy()
+
+        self._headers = dict(Transport._headers)
+
+        if headers is not None:
+            self._headers.update(headers)
+
+        self._session = None
+        self._inflight = None
+        self._loop = None
+
+    async def get_json(self, url, params=None, stats=None):
+        """
+        Send a GET request using a pooled connection and decode the JSON response.
+
+        The request is retried as long as the retry policy allows it.
+
+        Args:
+            url: The url of the API endpoint.
+            params: A dict with the query parameters (default None).
+            stats: The Stats in which each attempt is counted (default None).
+
+        Returns:
+            A tuple with the status code and the decoded response, or None if the
+            response is not valid JSON.
+
+        Raises:
+            aiohttp.ClientConnectionError: The connection failed too many times.
+            asyncio.TimeoutError: The request timed out too many times.
+        """
+
+        session = self.__session()
+        params = self.policy.params(params)
+
+        # aiohttp only accepts strings and numbers as query parameters
+        if params is not None:
+            params = {key : str(value) for key, value in params.items()}
+
+        attempt = 0
+
+        while True:
+
+            delay = self.policy.wait(url)
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+
+                if self._inflight is None:
+                    status, headers, data, size, latency = await self.__get_json(session, url, params)
+                else:
+                    async with self._inflight:
+                        status, headers, data, size, latency = await self.__get_json(session, url, params)
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+
+                delay = self.policy.delay(attempt)
+
+                if delay is None:
+                    raise
+
+            else:
+
+                if stats is not None:
+                    stats.request(params, size, latency)
+
+                delay = self.policy.delay(attempt, status, headers, data)
+
+                if delay is None:
+                    return status, data
+
+            if stats is not None:
+                stats.retry(params, delay)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self):
+        """
+        Close all pooled connections.
+        """
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def __get_json(self, session, url, params):
+        """
+        Internal method which sends a GET request and decodes the JSON response.
+
+        Returns:
+            A tuple with the status code, headers, decoded response, size of the response
+            and the number of seconds until the headers arrived.
+        """
+
+        start = time.perf_counter()
+
+        async with session.get(url, params=params) as resp:
+
+            latency = time.perf_counter() - start
+            body = await resp.read()
+
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+
+            return resp.status, resp.headers, data, len(body), latency
+
+    def __session(self):
+        """
+        Internal method which gets the session for the running event loop.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if self._session is None or self._session.closed or self._loop is not loop:
+
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.pool_maxsize)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self._headers)
+            self._loop = loop
+
+            if self.max_requests is not None:
+                self._inflight = asyncio.Semaphore(self.max_requests)
+
+        return self._session
+
+_shared = None
+_shared_async = None
+_lock = threading.Lock()
+
+def get_transport():
+    """
+    Get the transport which is shared by all instances that do not specify their own.
+
+    Returns:
+        An instance of the Transport class.
+    """
+
+    global _shared
+
+    with _lock:
+        if _shared is None:
+            _shared = Transport()
+
+    return _shared
+
+def get_async_transport():
+    """
+    Get the asyncio transport which is shared by all instances that do not specify their own.
+
+    Returns:
+        An instance of the AsyncTransport class.
+    """
+
+    global _shared_async
+
+    with _lock:
+        if _shared_async is None:
+            _shared_async = AsyncTransport()
+
+    return _shared_async
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import html
+import re
+
+class Wikitext:
+    """
+    This class converts the wikitext of a Wikipedia page into sections and references
+    """
+
+    # Markup which is removed together with its content
+
+    _comments = re.compile('<!--.*?(?:-->|$)', re.S)
+    _blocks = re.compile(
+        '<(gallery|imagemap|math|chem|score|timeline|graph|mapframe|syntaxhighlight|source)\\b'
+        '[^>]*?(?:/>|>.*?</\\1\\s*>)', re.S | re.I
+    )
+    _magic = re.compile('__[A-Z]+__')
+
+    # References, either with content or (self-closing) a reuse of a named reference
+
+    _references = re.compile('<ref\\b([^>]*?)(?:/>|>(.*?)</ref\\s*>)', re.S | re.I)
+    _names = re.compile('name\\s*=\\s*(?:"([^"]*)"|\'([^\']*)\'|([^\\s/>]+))', re.I)
+
+    # Templates and tables, which can be nested in each other
+
+    _braces = re.compile('\\{\\{|\\}\\}|^[ \\t]*\\{\\||^[ \\t]*\\|\\}(?!\\})', re.M)
+
+    # Links, the content of a link can hold single brackets and other links
+
+    _links = re.compile('\\[\\[((?:[^\\[\\]]|\\[(?!\\[)|\\](?!\\]))*?)\\]\\]([a-z]*)')
+    _external = re.compile('\\[(?:https?:|ftp:)?//[^\\s\\]]*\\s*([^\\]]*)\\]')
+    _urls = re.compile('(?:https?|ftp)://[^\\s|\\[\\]{}<>"]+')
+    _interwiki = re.compile('[a-z]{2,3}(?:-[a-z]+)*')
+
+    _formatting = re.compile("'{2,}")
+    _tags = re.compile('</?[a-zA-Z][^>]*>')
+    _spaces = re.compile('[ \\t\\xa0]+')
+
+    _heading = re.compile('(={1,6})\\s*(.+?)\\s*\\1\\s*$')
+
+    # Links to these namespaces are not shown in the text of a page
+
+    _namespaces = {
+        'file', 'image', 'category', 'datei', 'bild', 'kategorie', 'fichier', 'catégorie',
+        'archivo', 'imagen', 'categoría', 'bestand', 'categorie', 'immagine', 'categoria'
+    }
+
+    # Templates which show (some of) their arguments, the last positional argument is shown
+    # unless another selection is specified
+
+    _inline = {
+        'lang' : None,
+        'nowrap' : None,
+        'nobr' : None,
+        'small' : None,
+        'smaller' : None,
+        'transl' : None,
+        'noitalic' : None,
+        'nobold' : None,
+        'convert' : (0, 2)
+    }
+
+    def parse(self, content, lists=True):
+        """
+        Convert the wikitext of a page into sections, references and external links.
+
+        The wikitext is stripped with a number of regular expressions, so the result is an
+        approximation of the rendered page. Templates are removed, except for citations and
+        a few templates which show their text (e.g. "lang" or "nowrap"). Tables, files and
+        categories are removed, and links are replaced by their label. Level 2 headings start
+        a new section and level 3 headings are removed, which matches the html of a page.
+
+        Args:
+            content: A string with the wikitext of a page.
+            lists: Include lists (i.e. lines starting with "*", "#", ":" or ";") in text
+                (default True).
+
+        Returns:
+            A dict with all headers and corresponding paragraphs, all references, and all
+            external links.
+        """
+
+        content = self._comments.sub('', content)
+        content = self._blocks.sub('', content)
+        content = self._magic.sub('', content)
+
+        externallinks = list(dict.fromkeys(self._urls.findall(content)))
+
+        references = []
+        named = {}
+
+        for match in self._references.finditer(content):
+
+            name = self._names.search(match.group(1))
+
+            if name is not None:
+                name = next(group for group in name.groups() if group is not None)
+
+            # A named reference is listed where it is first used
+
+            if name is not None and name in named:
+                index = named[name]
+            else:
+                index = len(references)
+                references.append('')
+
+                if name is not None:
+                    named[name] = index
+
+            if match.group(2) is not None and references[index] == '':
+                references[index] = self.__strip(match.group(2))
+
+        content = self._references.sub('', content)
+
+        return {
+            'sections' : self.__split_sections(self.__strip(content, True), lists),
+            'references' : [reference for reference in references if reference != ''],
+            'externallinks' : externallinks
+        }
+
+    def __split_sections(self, content, lists):
+        """
+        Internal method which splits the stripped wikitext into sections.
+
+        Args:
+            content: A string with the stripped wikitext.
+            lists: Include lists in text.
+
+        Returns:
+            A dict with the header and content of each section.
+        """
+
+        sections = {}
+
+        header = 'Summary'
+        paragraphs = []
+        paragraph = []
+
+        for line in content.splitlines():
+
+            line = self._spaces.sub(' ', line).strip()
+
+            if line == '' or line.startswith('----'):
+
+                if paragraph:
+                    paragraphs.append(' '.join(paragraph))
+                    paragraph = []
+
+                continue
+
+            heading = self._heading.match(line) if line[0] == '=' else None
+
+            if heading is not None or line[0] in '*#:;':
+
+                if paragraph:
+                    paragraphs.append(' '.join(paragraph))
+                    paragraph = []
+
+            if heading is None:
+
+                if line[0] not in '*#:;':
+                    paragraph.append(line)
+                elif lists is True:
+                    paragraphs.append(line.lstrip('*#:; '))
+
+                continue
+
+            level = len(heading.group(1))
+
+            if level == 2:
+
+                if '\n'.join(paragraphs) != '':
+                    sections[len(sections)] = {'header' : header, 'content' : '\n'.join(paragraphs)}
+
+                header = heading.group(2)
+                paragraphs = []
+
+            elif level != 3:
+                paragraphs.append(heading.group(2))
+
+        if paragraph:
+            paragraphs.append(' '.join(paragraph))
+
+        if '\n'.join(paragraphs) != '':
+            sections[len(sections)] = {'header' : header, 'content' : '\n'.join(paragraphs)}
+
+        return sections
+
+    def __strip(self, content, lines=False):
+        """
+        Internal method which removes the markup from wikitext.
+
+        Args:
+            content: A string with wikitext without references.
+            lines: Keep the line breaks, otherwise all white space is collapsed (default False).
+
+        Returns:
+            A string with the text, in which "&", "<" and ">" are escaped as in html.
+        """
+
+        if '{' in content:
+            content = self.__remove_templates(content)
+
+        if '[[' in content:
+
+            count = 1
+
+            # Nested links (e.g. in the caption of a file) are replaced first
+            while count > 0:
+                content, count = self._links.subn(self.__link, content)
+
+        if '[' in content:
+            content = self._external.sub('\\1', content)
+
+        if "''" in content:
+            content = self._formatting.sub('', content)
+
+        if '<' in content:
+            content = self._tags.sub('', content)
+
+        content = html.unescape(content)
+        content = content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+        if lines is False:
+            content = self._spaces.sub(' ', content.replace('\n', ' ')).strip()
+
+        return content
+
+    def __remove_templates(self, content):
+        """
+        Internal method which removes the (nested) templates and tables from wikitext.
+
+        Args:
+            content: A string with wikitext.
+
+        Returns:
+            A string with the wikitext, in which each template is replaced by its text.
+        """
+
+        text = []
+        stack = []
+
+        start = 0
+        end = 0
+
+        for match in self._braces.finditer(content):
+
+            token = match.group(0).strip()
+
+            if token in ('{{', '{|'):
+
+                if not stack:
+                    text.append(content[end:match.start()])
+                    start = match.start()
+
+                stack.append(token)
+
+            # A closing token which does not match is part of the template or table
+            elif stack and (token == '}}') == (stack[-1] == '{{'):
+
+                stack.pop()
+
+                if not stack:
+                    text.append(self.__template(content[start:match.end()]))
+                    end = match.end()
+
+        # An unclosed template is shown as text
+        text.append(content[start if stack else end:])
+
+        return ''.join(text)
+
+    def __template(self, content):
+        """
+        Internal method which replaces a template by its text.
+
+        Args:
+            content: A string with a template or table, including the braces.
+
+        Returns:
+            A string with the text of a citation or an inline template, otherwise an empty
+            string.
+        """
+
+        if content.startswith('{|'):
+            return ''
+
+        args = content[2:-2].split('|')
+        name = args[0].strip().lower().replace('_', ' ')
+
+        # Nested templates are not expanded
+        if '{{' in content[2:]:
+            return ''
+
+        if name.startswith('cite ') or name == 'citation':
+            return self.__citation(args[1:])
+
+        if name not in self._inline:
+            return ''
+
+        values = [arg.strip() for arg in args[1:] if '=' not in arg]
+
+        if not values:
+            return ''
+
+        if self._inline[name] is None:
+            return values[-1]
+
+        return ' '.join(values[self._inline[name][0]:self._inline[name][1]])
+
+    def __citation(self, args):
+        """
+        Internal method which creates the text of a citation template.
+
+        Args:
+            args: A list with the arguments of the template.
+
+        Returns:
+            A string with the authors, date, title, work and publisher.
+        """
+
+        params = {}
+
+        for arg in args:
+
+            key, sep, value = arg.partition('=')
+
+            if sep:
+                params[key.strip().lower()] = value.strip()
+
+        author = params.get('author', params.get('author1', ''))
+
+        last = params.get('last', params.get('last1', ''))
+        first = params.get('first', params.get('first1', ''))
+
+        if last != '':
+            author = last + (', ' + first if first != '' else '')
+
+        date = params.get('date', params.get('year', ''))
+
+        if date != '':
+            author = author + ' (' + date + ')' if author != '' else date
+
+        title = params.get('title', '')
+
+        parts = [
+            author,
+            '"' + title + '"' if title != '' else '',
+            params.get('website', params.get('work', params.get('journal', params.get('newspaper', '')))),
+            params.get('publisher', '')
+        ]
+
+        return '. '.join(part for part in parts if part != '') + '.'
+
+    def __link(self, match):
+        """
+        Internal method which replaces a link by its label.
+        """
+
+        target, sep, label = match.group(1).partition('|')
+
+        prefix, colon, title = target.partition(':')
+        prefix = prefix.strip().lower()
+
+        # Files, categories and links to other languages
+        if colon and (prefix in self._namespaces or self._interwiki.fullmatch(prefix)):
+            return ''
+
+        if not sep:
+            label = target.lstrip(':')
+
+        # The label of the pipe trick is the title without the namespace and parentheses
+        elif label == '':
+            label = (title if colon else target).split('(')[0].strip()
+
+        return label + match.group(2)
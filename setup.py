@@ -30,5 +30,10 @@ setup(
     
     packages=['parsewiki'],
 
-    install_requires=['datetime', 'python-dateutil', 'bs4', 'requests']
+    install_requires=['datetime', 'python-dateutil', 'bs4', 'requests'],
+    
+    extras_require={
+        'async' : ['aiohttp'],
+        'lxml' : ['lxml']
+    }
 )
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import json
+
+class FakeTransport:
+    """
+    This class answers the requests of a Parse instance without connecting to Wikipedia
+    """
+
+    def __init__(self, handler, latency=0.01):
+        """
+        Initialize the FakeTransport class.
+
+        Args:
+            handler: A callable which receives the url and a copy of the query parameters,
+                and returns the decoded json response (or a tuple with a status code and
+                the response).
+            latency: The number of seconds until the headers of each response arrive, which
+                is counted in the Stats (default 0.01).
+        """
+
+        self.handler = handler
+        self.latency = latency
+        self.requests = []
+
+    def get_json(self, url, params=None, stats=None):
+
+        params = dict(params or {})
+        self.requests.append((url, params))
+
+        response = self.handler(url, params)
+
+        if type(response) is not tuple:
+            response = 200, response
+
+        # Each request is counted like in a Transport, with the size of the encoded response
+        if stats is not None:
+            stats.request(params, len(json.dumps(response[1])), self.latency)
+
+        return response
+
+class FakeAsyncTransport(FakeTransport):
+    """
+    This class answers the requests of an AsyncParse instance without connecting to Wikipedia
+    """
+
+    def __init__(self, handler):
+        """
+        Initialize the FakeAsyncTransport class.
+
+        Args:
+            handler: A callable which receives the url and a copy of the query parameters,
+                and returns the decoded json response (or a tuple with a status code and
+                the response).
+        """
+
+        super().__init__(handler)
+
+        self.closed = False
+
+    async def get_json(self, url, params=None, stats=None):
+        return super().get_json(url, params, stats)
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import re
+
+import bs4 as bs
+
+def clear_html(content, lists):
+    """
+    The implementation of Parse.__clear_html before it walked the page only once, which 
+    searched the whole page for each type of tag. It is used to check that the output is 
+    unchanged.
+    
+    Args:
+        content: A BeautifulSoup object with the page, in which the first div is the 
+            content of the page.
+        lists: Include lists (ul, ol, or dl tags) in text.
+    
+    Returns:
+        The cleared BeautifulSoup object.
+    """
+
+    # Remove first div, but keep all content
+
+    content.find('div').replaceWithChildren()
+
+    # Remove remaining div, tables and scripts from the page
+
+    for name in ('div', 'table', 'noscript'):
+        for element in content.findAll(name):
+            element.replace_with('')
+
+    # Remove lists from the page
+
+    for name in ('ul', 'ol', 'dl'):
+        for element in content.findAll(name):
+            if lists is True:
+                element.replaceWithChildren()
+            else:
+                element.replace_with('')
+
+    # Remove additional information
+
+    for element in content.findAll('span', attrs={"id": "coordinates"}):
+        element.replace_with('')
+    for element in content.findAll('span', attrs={"class": "mw-editsection"}):
+        element.replace_with('')
+
+    # Remove comments
+
+    comments = content.findAll(text=lambda text:isinstance(text, bs.Comment))
+    [comment.extract() for comment in comments]
+
+    # Remove sub headers
+
+    for element in content.findAll('h3'):
+        element.replace_with('')
+
+    # Remove html but keep text
+
+    for name in ('a', 'b', 'sup', 'i', 'span', 'abbr'):
+        for element in content.findAll(name):
+            element.replaceWithChildren()
+
+    # Remove empty paragraphs
+
+    empty = content.findAll(lambda tag: tag.name == 'p' and not tag.contents and (tag.string is None or not tag.string.strip()))
+    [empty.extract() for empty in empty]
+
+    return content
+
+def clear_differences(content):
+    """
+    The implementation of Parse.__clear_differences before its patterns were compiled once 
+    and guarded, which applied every pattern to each line. It is used to check that the 
+    output is unchanged.
+    
+    Args:
+        content: A line of wikitext from the differences of a revision.
+    
+    Returns:
+        The line without the wiki markup.
+    """
+
+    content = re.sub('<ref(.*?)</ref>|<ref(.*?)/>', '', content)
+    content = re.sub('[[]{2}(File:|Category:)(.*?)]{2}', '', content)
+    content = re.sub('[{]{2}(.*?)[}]{2}', '', content)
+
+    def filter_links(m):
+        return re.sub('[[]{2}(.*?)[|]|]]', '', m.group(0))
+
+    content = re.sub('[[]{2}(.*?)[|](.*?)]{2}', filter_links, content)
+    content = re.sub('[[]{2}|]{2}', '', content)
+    content = re.sub('(=){2,4}(.*?)(=){2,4}', '', content)
+
+    def filter_layout(m):
+        return re.sub('(\'){2,4}|(\'){2,4}', '', m.group(0))
+
+    content = re.sub('(\'){2,4}(.*?)(\'){2,4}', filter_layout, content)
+    content = re.sub('([|]})', '', content)
+
+    return content
+
+def split_sections(content):
+    """
+    The implementation of Parse.__split_sections before it walked the content once, which 
+    sliced the html with regular expressions. It is used to check that the output is 
+    unchanged.
+    
+    Args:
+        content: A string with the html of the cleared content of the page.
+    
+    Returns:
+        A dict with the header and content of each section, by index.
+    """
+
+    content = '\n'.join([line.rstrip() for line in content.splitlines() if line.strip()])
+    content = re.sub('<\\/[^<]+?>', '', content)
+    content = re.sub('\n', '', content)
+    content = content.replace('<p>', '<*>').replace('<h2>', '<*>[header]')
+    content = re.split('<[^<]+?>', content)
+
+    content[0] = '[header]Summary'
+    content = content[0:-1]
+
+    index = [i for i, section in enumerate(content) if '[header]' in section]
+    sections = {}
+
+    for j in index:
+
+        header = content[j].replace('[header]', '')
+        start = j + 1
+
+        if len(index) > 1:
+
+            end = index[1] - 1
+
+            if start == end:
+                paragraphs = [content[start]]
+            else:
+                paragraphs = ['\n'.join(content[start:end])]
+
+        else:
+            paragraphs = ['\n'.join(content[start:len(content)])]
+
+        sections[len(sections)] = {'header' : header, 'content' : paragraphs}
+        index = index[1:]
+
+    content = {}
+
+    for k in sections.keys():
+        if '' not in sections[k]['content']:
+            content[len(content)] = {'header' : sections[k]['header'], 'content' : sections[k]['content'][0]}
+
+    return content
+
+# Pages as rendered by Wikipedia, on which both html parsers give the same result
+pages = [
+    (
+        '<div class="mw-parser-output">'
+        '<p><b>Python</b> is a <a href="/wiki/Programming_language" title="Programming language">programming '
+        'language</a>.<sup id="cite_ref-1" class="reference"><a href="#cite_note-1">[1]</a></sup>\n</p>'
+        '<h2><span class="mw-headline" id="History">History</span><span class="mw-editsection">'
+        '<span class="mw-editsection-bracket">[</span><a href="#">edit</a>'
+        '<span class="mw-editsection-bracket">]</span></span></h2>'
+        '<p>Python was released in <span class="nowrap">1991</span> by Guido van Rossum.\n</p>'
+        '<h2><span class="mw-headline" id="References">References</span></h2>'
+        '<div class="reflist"><ol class="references"><li id="cite_note-1">'
+        '<span class="mw-cite-backlink"><b><a href="#cite_ref-1">^</a></b></span> '
+        '<span class="reference-text"><cite class="citation web">"About Python". '
+        '<i>python.org</i>.</cite></span></li></ol></div>'
+        '</div>'
+    ),
+    (
+        '<div class="mw-parser-output">'
+        '<style data-mw-deduplicate="TemplateStyles:r1">.x{color:red}</style>'
+        '<div role="note" class="hatnote">For other uses, see <a href="/wiki/Python">Python</a>.</div>'
+        '<table class="infobox"><tbody><tr><th colspan="2">Python</th></tr>'
+        '<tr><td>Paradigm <b>multi</b></td></tr></tbody></table>'
+        '<p class="mw-empty-elt">\n</p>'
+        '<p>It has <i>dynamic</i> typing &amp; garbage collection.\n</p>'
+        '<div class="thumb tright"><div class="thumbinner"><a href="/wiki/File:Logo.png" class="image">'
+        '<img src="Logo.png"></a><div class="thumbcaption">The logo</div></div></div>'
+        '<h2><span class="mw-headline" id="Features">Features</span></h2>'
+        '<ul><li>Functions <a href="#">and</a> classes</li><li>Modules<ul><li>nested</li></ul></li></ul>'
+        '<ol><li>first</li></ol><dl><dd><i>Main article: <a href="#">Syntax</a></i></dd></dl>'
+        '<h3><span class="mw-headline" id="Syntax">Syntax</span></h3>'
+        '<blockquote><p>Readability counts.</p></blockquote>'
+        '<table class="wikitable"><tr><th>Type</th></tr><tr><td>int</td></tr></table>'
+        '<p>The <abbr title="Python Enhancement Proposal">PEP</abbr> process '
+        '<span class="mwe-math-element"><img src="m.svg"></span> is open.\n</p>'
+        '<!-- hidden comment -->'
+        '<p><br></p>'
+        '<noscript><img src="//x" alt="" width="1" height="1" /></noscript>'
+        '</div>'
+    ),
+    (
+        '<div class="mw-parser-output">'
+        '<p>Python 3.0 was released in 2008.</p>'
+        '<h2><span class="mw-headline" id="Versions">Versions</span></h2>'
+        '<h3><span class="mw-headline" id="Python_2">Python 2</span></h3>'
+        '<p>Python 2 is no longer supported.</p><p>It was succeeded by Python 3.</p>'
+        '<h3><span class="mw-headline" id="Python_3">Python 3</span></h3>'
+        '<p>café, na&#239;ve &#160;and&#160;more.</p>'
+        '</div>'
+    )
+]
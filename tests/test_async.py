@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import asyncio
+import unittest
+import warnings
+
+from fake import FakeAsyncTransport, FakeTransport
+from parsewiki.page import AsyncParse, Parse
+
+class AsyncParseTest(unittest.TestCase):
+
+    # The paragraphs of the page and of each revision, the last paragraph of a page is left out
+    texts = {
+        0 : ['Python is a popular programming language.', 'It has a large library.', 'Last.'],
+        1 : ['Python is a language.', 'Last.'],
+        2 : ['Python is a programming language.', 'Last.'],
+        3 : ['Python is a popular programming language.', 'It has a large library.', 'Last.']
+    }
+
+    def html(self, revid):
+        return '<div class="mw-parser-output">%s</div>' % ''.join('<p>%s</p>' % text for text in self.texts[revid])
+
+    def handler(self, url, params):
+
+        if params['action'] == 'parse':
+
+            html = self.html(params.get('oldid', 0))
+
+            return {'parse' : {'text' : {'*' : html}, 'externallinks' : [], 'langlinks' : []}}
+
+        if params['action'] == 'compare':
+
+            # The differences of the first revision are requested, the others are compared locally
+            return {'compare' : {'fromrevid' : 0 if 'fromrev' in params else 3, '*' : ''}}
+
+        if 'rvuser' in params:
+
+            revisions = [
+                {
+                    'revid' : revid, 'parentid' : revid - 1, 'timestamp' : '2017-01-0%dT00:00:00Z' % revid,
+                    'user' : 'Alice', 'comment' : '', 'size' : 100
+                }
+                for revid in (3, 2, 1)
+            ]
+
+            return {'query' : {'pages' : {'23862' : {'revisions' : revisions}}}}
+
+        raise AssertionError(params)
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+    def data(self):
+
+        # A wiki without saved pages, so the titles are not requested
+        return {'id' : '23862', 'language' : 'en', 'pages' : {}}
+
+    def extract(self):
+
+        transport = FakeTransport(self.handler)
+
+        wiki = Parse(self.data(), languages={'en' : 'Python'}, transport=transport, ignore=False)
+        wiki.extract()
+        wiki.extract_revisions_by_user(username='Alice', workers=2)
+
+        return wiki, transport
+
+    async def extract_async(self):
+
+        transport = FakeAsyncTransport(self.handler)
+
+        async with AsyncParse(self.data(), languages={'en' : 'Python'}, transport=transport, ignore=False) as wiki:
+            await wiki.extract()
+            await wiki.extract_revisions_by_user(username='Alice', workers=2)
+
+        return wiki, transport
+
+    def strip(self, wiki):
+
+        # The date on which the page is extracted differs
+        wiki = wiki.get_wiki()
+
+        for page in wiki['pages'].values():
+            del page['date']
+
+        return wiki
+
+    def test_same_result(self):
+
+        wiki, transport = self.extract()
+        result, fake = asyncio.run(self.extract_async())
+
+        self.assertEqual(self.strip(result), self.strip(wiki))
+        self.assertEqual(result.get_text(revid=3), wiki.get_text(revid=3))
+        self.assertEqual(result.get_differences(revid=3), wiki.get_differences(revid=3))
+
+        # The same requests are sent, the revisions are extracted concurrently
+        self.assertEqual(sorted(map(repr, fake.requests)), sorted(map(repr, transport.requests)))
+
+    def test_close(self):
+
+        result, fake = asyncio.run(self.extract_async())
+
+        self.assertTrue(fake.closed)
+
+if __name__ == '__main__':
+    unittest.main()
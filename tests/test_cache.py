@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from parsewiki.cache import DiskCache, ResultCache
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'cache.db')
+
+        # The time is only changed by the tests
+        self.now = 1000.0
+
+        patcher = mock.patch('parsewiki.cache.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def cache(self, **kwargs):
+
+        cache = DiskCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+
+        return cache
+
+    def test_immutable(self):
+
+        # Without a time to live only the responses of a specific revision are cached
+        cache = self.cache(ttl=None)
+
+        immutable = [
+            {'action' : 'parse', 'oldid' : 100},
+            {'action' : 'query', 'revids' : '100|101'},
+            {'action' : 'query', 'rvstartid' : 100, 'rvendid' : 100}
+        ]
+
+        mutable = [
+            {'action' : 'parse', 'page' : 'Python'},
+            {'action' : 'query', 'rvstartid' : 100, 'rvendid' : 200},
+            {'action' : 'compare', 'fromrev' : 100, 'torelative' : 'prev'}
+        ]
+
+        for params in immutable + mutable:
+            cache.set('en', params, {'params' : params})
+
+        for params in immutable:
+            self.assertEqual(cache.get('en', params), {'params' : params})
+
+        for params in mutable:
+            self.assertIsNone(cache.get('en', params))
+
+        # The key depends on the language, not on the order of the parameters
+        self.assertIsNone(cache.get('de', immutable[0]))
+        self.assertEqual(cache.get('en', {'oldid' : 100, 'action' : 'parse'}), {'params' : immutable[0]})
+
+    def test_ttl(self):
+
+        cache = self.cache(ttl=60)
+
+        current = {'action' : 'parse', 'page' : 'Python'}
+        revision = {'action' : 'parse', 'oldid' : 100}
+
+        cache.set('en', current, {'revid' : 100})
+        cache.set('en', revision, {'revid' : 100})
+
+        self.now += 59
+
+        self.assertEqual(cache.get('en', current), {'revid' : 100})
+
+        self.now += 2
+
+        self.assertIsNone(cache.get('en', current))
+        self.assertEqual(cache.get('en', revision), {'revid' : 100})
+
+        # The expired response is removed
+        cache.set('en', {'action' : 'parse', 'oldid' : 101}, {'revid' : 101})
+        self.assertEqual(cache._size, sum(row[0] for row in cache._db.execute('SELECT size FROM responses')))
+
+    def test_lru(self):
+
+        data = {'text' : 'x' * 100}
+        params = [{'action' : 'parse', 'oldid' : revid} for revid in range(4)]
+
+        # Measure the size of a single response
+        cache = self.cache()
+        cache.set('en', params[0], data)
+        size = cache._size
+        cache.clear()
+
+        cache.max_size = 3 * size
+
+        for i in range(3):
+            self.now += 1
+            cache.set('en', params[i], data)
+
+        # Reading a response makes it the most recently used
+        self.now += 1
+        cache.get('en', params[0])
+
+        self.now += 1
+        cache.set('en', params[3], data)
+
+        self.assertIsNone(cache.get('en', params[1]))
+
+        for i in (0, 2, 3):
+            self.assertEqual(cache.get('en', params[i]), data)
+
+        self.assertEqual(cache._size, 3 * size)
+
+    def test_reopen(self):
+
+        cache = self.cache()
+        cache.set('en', {'action' : 'parse', 'oldid' : 100}, {'revid' : 100})
+        size = cache._size
+        cache.close()
+
+        cache = self.cache()
+
+        self.assertEqual(cache._size, size)
+        self.assertEqual(cache.get('en', {'action' : 'parse', 'oldid' : 100}), {'revid' : 100})
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'results.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def result(self, revid):
+        return {'sections' : {0 : {'header' : 'Summary', 'content' : 'Revision %d' % revid}}, 'references' : []}
+
+    def test_keys(self):
+
+        cache = ResultCache()
+        cache.set('en', 100, True, self.result(100))
+
+        self.assertEqual(cache.get('en', 100, True), self.result(100))
+        self.assertTrue(cache.has('en', 100, True))
+
+        for key in (('de', 100, True), ('en', 101, True), ('en', 100, False)):
+            self.assertIsNone(cache.get(*key))
+            self.assertFalse(cache.has(*key))
+
+        self.assertIsNone(cache.get('en', 100, True, 'wikitext'))
+
+    def test_copy(self):
+
+        cache = ResultCache()
+        cache.set('en', 100, True, self.result(100))
+
+        cache.get('en', 100, True)['references'].append('Changed')
+
+        self.assertEqual(cache.get('en', 100, True), self.result(100))
+
+    def test_evict(self):
+
+        cache = ResultCache(max_entries=2)
+
+        for revid in (100, 101):
+            cache.set('en', revid, True, self.result(revid))
+
+        cache.get('en', 100, True)
+        cache.set('en', 102, True, self.result(102))
+
+        self.assertIsNone(cache.get('en', 101, True))
+        self.assertEqual(cache.get('en', 100, True), self.result(100))
+
+    def test_spill(self):
+
+        cache = ResultCache(max_entries=2, path=self.path)
+        self.addCleanup(cache._db.close)
+
+        for revid in range(100, 105):
+            cache.set('en', revid, True, self.result(revid), 'wikitext')
+
+        self.assertEqual(len(cache._entries), 2)
+
+        # The least recently used revisions are moved to disk
+        self.assertTrue(cache.has('en', 100, True, 'wikitext'))
+        self.assertEqual(cache.get('en', 100, True, 'wikitext'), self.result(100))
+        self.assertEqual(len(cache._entries), 2)
+
+        for revid in range(100, 105):
+            self.assertEqual(cache.get('en', revid, True, 'wikitext'), self.result(revid))
+
+        self.assertIsNone(cache.get('en', 100, True))
+
+        cache.clear()
+
+        self.assertFalse(cache.has('en', 100, True, 'wikitext'))
+
+    def test_reopen(self):
+
+        cache = ResultCache(max_entries=1, path=self.path)
+
+        cache.set('en', 100, True, self.result(100))
+        cache.set('en', 101, True, self.result(101))
+        cache._db.close()
+
+        # Only the revisions which are moved to disk are kept
+        cache = ResultCache(max_entries=1, path=self.path)
+        self.addCleanup(cache._db.close)
+
+        self.assertEqual(cache.get('en', 100, True), self.result(100))
+        self.assertIsNone(cache.get('en', 101, True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import random
+import unittest
+import warnings
+
+from fake import FakeTransport
+from parsewiki.page import Parse
+from reference import clear_differences
+
+# The pieces of a random line of wikitext
+tokens = [
+    '[[', '|', ']]', '{{', '}}', '<ref', '</ref>', '/>', "''", "'''", '==', '=', '|}', '{|',
+    'File:', 'Category:', 'a', ' ', 'b', '[', ']', '{', '}', "'", 'x y', 'café'
+]
+
+class ClearDifferencesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+        # The patterns of the previous implementation give a FutureWarning
+        warnings.simplefilter('ignore', FutureWarning)
+
+        self.wiki = Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None))
+
+    def clear(self, line):
+        return self.wiki._Parse__clear_differences(line)
+
+    def test_lines(self):
+
+        lines = {
+            "'''Python''' is a [[programming language|language]].<ref>A reference.</ref>" : 'Python is a language.',
+            "It was created by [[Guido van Rossum]].<ref name=\"guido\" />" : 'It was created by Guido van Rossum.',
+            "{{Infobox language|name=Python}}Python is ''dynamic''." : 'Python is dynamic.',
+            "== History ==" : '',
+            "=== Early years ===Python was released in 1991." : 'Python was released in 1991.',
+            "[[File:Logo.png|thumb|The logo]][[Category:Languages]]" : '',
+            "|}" : '',
+            "A line without markup." : 'A line without markup.'
+        }
+
+        for line, expected in lines.items():
+            self.assertEqual(self.clear(line), expected, line)
+
+    def test_random_lines(self):
+
+        random.seed(15)
+
+        for i in range(20000):
+
+            line = ''.join(random.choice(tokens) for j in range(random.randint(0, 14)))
+
+            self.assertEqual(self.clear(line), clear_differences(line), line)
+
+    def test_difference(self):
+
+        # The wikitext is escaped in the table of Wikipedia
+        table = (
+            '<tr><td class="diff-marker">−</td><td class="diff-deletedline">'
+            "<div>'''Python''' is a [[programming language|language]].</div></td>"
+            '<td class="diff-marker">+</td><td class="diff-addedline">'
+            "<div>'''Python''' is a popular [[programming language|language]].</div></td></tr>"
+            '<tr><td colspan="2" class="diff-empty"></td><td class="diff-marker">+</td>'
+            '<td class="diff-addedline"><div>{|</div></td></tr>'
+            '<tr><td colspan="2" class="diff-empty"></td><td class="diff-marker">+</td>'
+            '<td class="diff-addedline"><div>| A cell of a table</div></td></tr>'
+            '<tr><td colspan="2" class="diff-empty"></td><td class="diff-marker">+</td>'
+            '<td class="diff-addedline"><div>|}</div></td></tr>'
+            '<tr><td colspan="2" class="diff-empty"></td><td class="diff-marker">+</td>'
+            "<td class=\"diff-addedline\"><div>It is named after [[Monty Python]].&lt;ref&gt;A reference.&lt;/ref&gt;</div></td></tr>"
+        )
+
+        # The lines of a table are skipped
+        self.assertEqual(self.wiki._Parse__extract_difference('<table>%s</table>' % table), {
+            'original' : ['Python is a language.', ''],
+            'difference' : ['Python is a popular language.', 'It is named after Monty Python.']
+        })
+
+if __name__ == '__main__':
+    unittest.main()
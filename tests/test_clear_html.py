@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import importlib.util
+import random
+import unittest
+import warnings
+
+import bs4 as bs
+
+from fake import FakeTransport
+from parsewiki.page import Parse
+from reference import clear_html
+
+# The lxml parser is only tested if lxml is installed
+if importlib.util.find_spec('lxml') is not None:
+    parsers = ('html.parser', 'lxml')
+else:
+    parsers = ('html.parser',)
+
+# The tags of a random tree, with the attributes which select a rule
+tags = [
+    ('p', ''), ('h2', ''), ('h3', ''), ('div', ' class="thumb"'), ('table', ''), ('noscript', ''),
+    ('ul', ''), ('ol', ''), ('dl', ''), ('li', ''), ('dd', ''), ('a', ' href="#"'), ('b', ''),
+    ('sup', ' class="reference"'), ('i', ''), ('abbr', ' title="x"'), ('span', ''),
+    ('span', ' id="coordinates"'), ('span', ' class="mw-editsection"'),
+    ('span', ' class="nowrap mw-editsection"'), ('blockquote', '')
+]
+
+texts = ['alpha', 'beta gamma', ' ', '\n', '&amp;', 'café', '<!-- comment -->', '']
+
+def tree(depth):
+
+    html = []
+
+    for i in range(random.randint(0, 4)):
+
+        if depth < 4 and random.random() < 0.6:
+            name, attrs = random.choice(tags)
+            html.append('<%s%s>%s</%s>' % (name, attrs, tree(depth + 1), name))
+        else:
+            html.append(random.choice(texts))
+
+    return ''.join(html)
+
+class ClearHtmlTest(unittest.TestCase):
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+        self.wikis = {
+            parser : Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None), parser=parser)
+            for parser in parsers
+        }
+
+    def clear(self, html, parser, lists):
+
+        wiki = self.wikis[parser]
+
+        soup = bs.BeautifulSoup(html, parser)
+        content = soup.select_one(wiki._css_selector)
+
+        wiki._Parse__clear_html(content, lists)
+        content.unwrap()
+
+        return str(soup)
+
+    def reference(self, html, parser, lists):
+        return str(clear_html(bs.BeautifulSoup(html, parser), lists))
+
+    def test_random_trees(self):
+
+        random.seed(12)
+
+        for i in range(500):
+
+            html = '<div class="mw-parser-output">%s</div>' % tree(0)
+
+            for parser in parsers:
+                for lists in (True, False):
+                    self.assertEqual(self.clear(html, parser, lists), self.reference(html, parser, lists), html)
+
+if __name__ == '__main__':
+    unittest.main()
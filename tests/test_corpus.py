@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from fake import FakeTransport
+from parsewiki.corpus import Corpus
+
+class ResolveTest(unittest.TestCase):
+
+    pageids = {'Python' : 1, 'Java' : 2, 'Ruby' : 3, 'Perl' : 4}
+
+    def handler(self, url, params):
+
+        titles = params['titles'].split('|')
+
+        # The batch with this title fails
+        if 'Broken' in titles:
+            return {'error' : {'code' : 'internal_api_error', 'info' : 'Failed'}}
+
+        pages = {
+            str(self.pageids[title]) : {'pageid' : self.pageids[title], 'title' : title, 'langlinks' : []}
+            for title in titles
+        }
+
+        return {'batchcomplete' : '', 'query' : {'pages' : pages}}
+
+    def corpus(self, ignore):
+
+        corpus = Corpus(
+            ['Python', 'Java', 'Broken', 'Ruby', 'Perl'], ignore=ignore, workers=1,
+            transport=FakeTransport(self.handler)
+        )
+
+        corpus._batch = 2
+        corpus._print_errors = False
+
+        return corpus
+
+    def test_failed_batch_is_skipped(self):
+
+        corpus = self.corpus(True)
+        written = []
+
+        count = corpus.extract(written.append, job=lambda wiki: None)
+
+        # The pages of the failed batch are logged, the other batches are written
+        self.assertEqual(count, 3)
+        self.assertEqual([page for date, page, error in corpus.get_log()], ['Broken', 'Ruby'])
+        self.assertEqual([wiki['id'] for wiki in written], ['1', '2', '4'])
+
+    def test_failed_batch_raises(self):
+
+        corpus = self.corpus(False)
+        written = []
+
+        with self.assertRaises(ValueError):
+            corpus.extract(written.append, job=lambda wiki: None)
+
+class WorkersTest(unittest.TestCase):
+
+    def test_fewer_workers_than_processes(self):
+
+        with ProcessPoolExecutor(2) as processes:
+
+            with self.assertWarns(RuntimeWarning):
+                Corpus(['Python'], workers=1, transport=FakeTransport(None), processes=processes)
+
+if __name__ == '__main__':
+    unittest.main()
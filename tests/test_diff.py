@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import unittest
+
+from parsewiki.diff import Diff
+
+def sections(*paragraphs):
+    return {0 : {'header' : 'Summary', 'content' : '\n'.join(paragraphs)}}
+
+class DiffTest(unittest.TestCase):
+
+    def test_identical(self):
+
+        result = Diff().compare(sections('A b c.', 'D e f.'), sections('A b c.', 'D e f.'))
+
+        self.assertEqual(result, {'original' : [], 'difference' : []})
+
+    def test_added_paragraph(self):
+
+        result = Diff().compare(sections('A b c.'), sections('A b c.', 'New text.'))
+
+        self.assertEqual(result, {'original' : [''], 'difference' : ['New text.']})
+
+    def test_removed_paragraph(self):
+
+        result = Diff().compare(sections('A b c.', 'D e f.'), sections('A b c.'))
+
+        self.assertEqual(result, {'original' : [], 'difference' : []})
+
+    def test_changed_paragraph(self):
+
+        original = sections('Python is a programming language.', 'It was created by Guido.')
+        revision = sections('Python is a popular programming language.', 'It was created by Guido.')
+
+        result = Diff().compare(original, revision)
+
+        self.assertEqual(result['original'], ['Python is a programming language.'])
+        self.assertEqual(result['difference'], ['Python is a popular programming language.'])
+
+    def test_replaced_paragraph(self):
+
+        result = Diff().compare(sections('A b c d.'), sections('Something else entirely.'))
+
+        self.assertEqual(result, {'original' : [''], 'difference' : ['Something else entirely.']})
+
+    def test_paragraphs_of_all_sections(self):
+
+        original = {0 : {'header' : 'Summary', 'content' : 'A b c.'}, 1 : {'header' : 'History', 'content' : ''}}
+        revision = {0 : {'header' : 'Summary', 'content' : 'A b c.'}, 1 : {'header' : 'History', 'content' : '\nD e f.'}}
+
+        result = Diff().compare(original, revision)
+
+        self.assertEqual(result, {'original' : [''], 'difference' : ['D e f.']})
+
+    def test_window(self):
+
+        # The changed paragraph is preceded by more removed paragraphs than the window
+        original = sections('Start.', *['Removed paragraph %d here.' % i for i in range(5)], 'The old text of a paragraph.', 'End.')
+        revision = sections('Start.', 'The new text of a paragraph.', 'End.')
+
+        self.assertEqual(Diff(window=10).compare(original, revision)['original'], ['The old text of a paragraph.'])
+        self.assertEqual(Diff(window=3).compare(original, revision)['original'], [''])
+
+    def test_words(self):
+
+        differences = {
+            'original' : ['Python is a programming language.', ''],
+            'difference' : ['Python is a popular programming language!', 'New text.']
+        }
+
+        result = Diff().words(differences)
+
+        self.assertEqual(result, [
+            {'removed' : ['language.'], 'added' : ['popular', 'language!']},
+            {'removed' : [], 'added' : ['New', 'text.']}
+        ])
+
+    def test_words_of_nothing(self):
+
+        self.assertEqual(Diff().words({'original' : [], 'difference' : []}), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import unittest
+
+from fake import FakeTransport
+from parsewiki.page import Parse
+
+# The titles of the page in each language
+titles = {'en' : 'Python', 'de' : 'Python (Programmiersprache)', 'fr' : 'Python (langage)'}
+
+def revision(revid, user, date):
+    return {
+        'oldid' : str(revid), 'date' : date, 'user' : user, 'comment' : '', 'size' : 100, 'empty' : False,
+        'sections' : {}, 'references' : [], 'externallinks' : [], 'previous' : revid - 1,
+        'differences' : {'original' : '', 'difference' : ''}
+    }
+
+def page(lang, revisions, text='Python'):
+
+    result = {
+        'language' : lang, 'date' : '2017-09-01T00:00:00Z', 'title' : titles[lang],
+        'sections' : {'0' : {'header' : 'Summary', 'content' : text}},
+        'references' : [], 'externallinks' : [], 'previous' : 0
+    }
+
+    if revisions:
+        result['revisions'] = {str(i) : revision for i, revision in enumerate(revisions)}
+
+    return result
+
+class IndexTest(unittest.TestCase):
+
+    # The user of each revision in each language, the languages share revision 100
+    users = {
+        'en' : {100 : 'Alice', 101 : 'Carol', 102 : 'Erin', 104 : 'Grace'},
+        'de' : {100 : 'Bob', 101 : 'Dave', 102 : 'Frank'}
+    }
+
+    def handler(self, url, params):
+
+        lang = url.split('//')[1].split('.')[0]
+        revid = params['rvstartid']
+
+        root = {
+            'revid' : revid, 'parentid' : revid - 1, 'timestamp' : '2017-08-0%dT00:00:00Z' % (revid - 99),
+            'user' : self.users[lang][revid], 'comment' : '', 'size' : 100
+        }
+
+        return {'query' : {'pages' : {'1' : {'revisions' : [root]}}}}
+
+    def parse(self, pages):
+
+        wiki = {'id' : '23862', 'language' : 'en', 'pages' : {str(i) : page for i, page in enumerate(pages)}}
+
+        return Parse(wiki, languages=titles, transport=FakeTransport(self.handler), ignore=False)
+
+class RevisionIndexTest(IndexTest):
+
+    def test_languages(self):
+
+        wiki = self.parse([
+            page('en', [revision(100, 'Alice', '2017-08-01T00:00:00Z')]),
+            page('de', [revision(100, 'Bob', '2017-08-01T00:00:00Z')])
+        ])
+
+        # The same revision identifier is looked up in each language
+        self.assertEqual(wiki.get_user(lang='en', revid=100), 'Alice')
+        self.assertEqual(wiki.get_user(lang='de', revid=100), 'Bob')
+
+    def test_saved_revisions(self):
+
+        wiki = self.parse([page('en', []), page('de', [])])
+
+        wiki.extract_revision(lang='en', revid=100, empty=True)
+        wiki.extract_revision(lang='en', revid=101, empty=True)
+
+        self.assertEqual(wiki.get_user(lang='en', revid=100), 'Alice')
+        self.assertEqual(wiki.get_user(lang='en', revid=101), 'Carol')
+
+        # A revision which is saved in one language is not found in the other language
+        with self.assertRaises(ValueError):
+            wiki.get_user(lang='de', revid=100)
+
+        wiki.extract_revision(lang='de', revid=100, empty=True)
+        wiki.extract_revision(lang='en', revid=102, empty=True)
+        wiki.extract_revision(lang='de', revid=102, empty=True)
+
+        # The index of each language is updated when a revision is saved
+        self.assertEqual(wiki.get_user(lang='en', revid=100), 'Alice')
+        self.assertEqual(wiki.get_user(lang='en', revid=102), 'Erin')
+        self.assertEqual(wiki.get_user(lang='de', revid=100), 'Bob')
+        self.assertEqual(wiki.get_user(lang='de', revid=102), 'Frank')
+
+        with self.assertRaises(ValueError):
+            wiki.get_user(lang='de', revid=101)
+
+        # Each revision is only saved once in each language
+        wiki.extract_revision(lang='en', revid=100, empty=True)
+
+        self.assertEqual(wiki.get_pageid(lang='en', first='2017-08-01', last='2017-08-31'), ['100', '101', '102'])
+        self.assertEqual(wiki.get_pageid(lang='de', first='2017-08-01', last='2017-08-31'), ['100', '102'])
+
+class DateIndexTest(IndexTest):
+
+    def parse_dates(self):
+
+        # The revisions are not saved in the order of their dates
+        return self.parse([page('en', [
+            revision(100, 'Alice', '2017-08-09T10:00:00Z'),
+            revision(101, 'Carol', '2017-08-01T10:00:00Z'),
+            revision(102, 'Erin', '2017-08-05T10:00:00Z'),
+            revision(103, 'Heidi', '2017-08-05T08:00:00Z')
+        ])])
+
+    def test_boundaries(self):
+
+        wiki = self.parse_dates()
+
+        # The first and last date are included
+        self.assertEqual(wiki.get_pageid(first='2017-08-01', last='2017-08-05'), ['101', '102', '103'])
+        self.assertEqual(wiki.get_pageid(first='2017-08-05', last='2017-08-09'), ['100', '102', '103'])
+        self.assertEqual(wiki.get_pageid(first='2017-08-05T23:00:00Z', last='2017-08-09T00:00:00Z'), ['100', '102', '103'])
+        self.assertEqual(wiki.get_pageid(first='2017-08-09'), ['100'])
+
+        # A range without revisions
+        self.assertEqual(wiki.get_pageid(first='2017-08-02', last='2017-08-04'), [])
+        self.assertEqual(wiki.get_pageid(first='2017-08-10', last='2017-08-31'), [])
+        self.assertEqual(wiki.get_pageid(first='2017-07-01', last='2017-07-31'), [])
+
+        with self.assertRaises(ValueError):
+            wiki.get_pageid(first='2017-08-09', last='2017-08-01')
+
+    def test_user(self):
+
+        wiki = self.parse_dates()
+
+        # Only the revisions of the user in the range are returned
+        self.assertEqual(wiki.get_pageid(user='Erin', first='2017-08-01', last='2017-08-09'), ['102'])
+        self.assertEqual(wiki.get_pageid(user='Erin', first='2017-08-09'), [])
+        self.assertEqual(wiki.get_pageid(user='Erin'), ['102'])
+
+    def test_dates(self):
+
+        wiki = self.parse_dates()
+
+        # The first saved revision on a date is returned
+        self.assertEqual(wiki.get_user(date='2017-08-01'), 'Carol')
+        self.assertEqual(wiki.get_user(date='2017-08-05'), 'Erin')
+        self.assertEqual(wiki.get_user(date='2017-08-09'), 'Alice')
+
+        with self.assertRaises(ValueError):
+            wiki.get_user(date='2017-08-02')
+
+    def test_saved_revisions(self):
+
+        wiki = self.parse_dates()
+
+        self.assertEqual(wiki.get_pageid(first='2017-08-05'), ['102', '103'])
+
+        # The dates are sorted again after a revision is saved
+        wiki.extract_revision(revid=101, empty=True)
+        wiki.extract_revision(revid=104, empty=True)
+
+        self.assertEqual(wiki.get_pageid(first='2017-08-05'), ['102', '103', '104'])
+        self.assertEqual(wiki.get_pageid(first='2017-08-01', last='2017-08-31'), ['100', '101', '102', '103', '104'])
+        self.assertEqual(wiki.get_user(date='2017-08-05'), 'Erin')
+
+class LanguageIndexTest(IndexTest):
+
+    def handler(self, url, params):
+
+        lang = url.split('//')[1].split('.')[0]
+
+        if params['action'] == 'compare':
+            return {'compare' : {'fromrevid' : 99}}
+
+        # The last paragraph of a page is left out
+        html = '<div class="mw-parser-output"><p>Extracted %s text.</p><p>Last paragraph.</p></div>' % lang
+
+        return {'parse' : {'text' : {'*' : html}, 'externallinks' : [], 'langlinks' : []}}
+
+    def text(self, wiki, lang):
+        return wiki.get_text(lang=lang, headers=False, references=False)
+
+    def test_languages(self):
+
+        wiki = self.parse([
+            page('en', [], 'English text.'),
+            page('de', [], 'German text.'),
+            page('en', [], 'Later English text.')
+        ])
+
+        # The first saved page in each language is found
+        self.assertEqual(self.text(wiki, 'en'), 'English text.\n')
+        self.assertEqual(self.text(wiki, 'de'), 'German text.\n')
+
+        with self.assertRaises(ValueError):
+            self.text(wiki, 'fr')
+
+        wiki.extract(lang='fr')
+        wiki.extract(lang='de')
+
+        # The index is created again when a page is saved
+        self.assertEqual(self.text(wiki, 'fr'), 'Extracted fr text.\n')
+        self.assertEqual(self.text(wiki, 'de'), 'German text.\n')
+        self.assertEqual(self.text(wiki, 'en'), 'English text.\n')
+
+        self.assertEqual([page['language'] for page in wiki.get_wiki()['pages'].values()], ['en', 'de', 'en', 'fr', 'de'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import unittest
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from fake import FakeTransport
+from parsewiki.page import Parse, _check_workers
+
+class ExtractWikitextTest(unittest.TestCase):
+
+    def handler(self, url, params):
+
+        if params['action'] == 'compare':
+            return {'compare' : {'fromrevid' : 99}}
+
+        page = {'pageid' : 23862, 'title' : 'Python'}
+
+        # The language links are returned in two parts, the revision only in the first part
+        if 'llcontinue' not in params:
+
+            page['revisions'] = [{'revid' : 100, 'slots' : {'main' : {'*' : 'Python is a language.'}}}]
+            page['langlinks'] = [{'lang' : 'de', '*' : 'Python (Programmiersprache)'}]
+
+            return {
+                'continue' : {'llcontinue' : '23862|fr', 'continue' : '||revisions'},
+                'query' : {'pages' : {'23862' : page}}
+            }
+
+        page['langlinks'] = [{'lang' : 'fr', '*' : 'Python (langage)'}]
+
+        return {'batchcomplete' : '', 'query' : {'pages' : {'23862' : page}}}
+
+    def test_language_links_are_continued(self):
+
+        transport = FakeTransport(self.handler)
+
+        wiki = Parse(23862, languages={'en' : 'Python'}, transport=transport, ignore=False)
+        wiki.extract(mode='wikitext')
+
+        self.assertEqual(wiki.get_title('de'), 'Python (Programmiersprache)')
+        self.assertEqual(wiki.get_title('fr'), 'Python (langage)')
+        self.assertEqual(wiki.get_text(), 'Summary.\nPython is a language.\n')
+
+        queries = [params for url, params in transport.requests if params['action'] == 'query']
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(queries[1]['llcontinue'], '23862|fr')
+
+class DifferencesTest(unittest.TestCase):
+
+    # The wikitext of each revision, revision 1 has no predecessor
+    texts = {
+        1 : 'Python is a language.',
+        2 : 'Python is a programming language.',
+        3 : 'Python is a popular programming language.\n\nIt has a large library.'
+    }
+
+    def handler(self, url, params):
+
+        if 'rvstartid' in params:
+
+            revid = params['rvstartid']
+            revision = {
+                'revid' : revid, 'parentid' : revid - 1, 'timestamp' : '2017-01-0%dT00:00:00Z' % revid,
+                'user' : 'Alice', 'comment' : '', 'size' : 100
+            }
+
+            return {'query' : {'pages' : {'23862' : {'revisions' : [revision]}}}}
+
+        if 'rvuser' in params:
+
+            revisions = [
+                {
+                    'revid' : revid, 'parentid' : revid - 1, 'timestamp' : '2017-01-0%dT00:00:00Z' % revid,
+                    'user' : 'Alice', 'comment' : '', 'size' : 100
+                }
+                for revid in (3, 2, 1)
+            ]
+
+            return {'query' : {'pages' : {'23862' : {'revisions' : revisions}}}}
+
+        if 'revids' in params:
+
+            revisions = [
+                {'revid' : int(revid), 'slots' : {'main' : {'*' : self.texts[int(revid)]}}}
+                for revid in params['revids'].split('|')
+            ]
+
+            return {'query' : {'pages' : {'23862' : {'revisions' : revisions}}}}
+
+        if params['action'] == 'parse':
+
+            html = ''.join('<p>%s</p>' % text for text in self.texts[params['oldid']].split('\n\n'))
+
+            return {'parse' : {'text' : {'*' : html}, 'externallinks' : []}}
+
+        if params['action'] == 'compare':
+
+            revid = int(params['fromrev'])
+
+            return {'compare' : {'fromrevid' : revid - 1, '*' : self.table(revid - 1, revid)}}
+
+        raise AssertionError(params)
+
+    def table(self, previous, revid):
+
+        # The diff table of Wikipedia, with a row for each changed or added paragraph
+        rows = []
+        original = self.texts[previous].split('\n\n')
+
+        for i, text in enumerate(self.texts[revid].split('\n\n')):
+
+            if i >= len(original):
+                rows.append(
+                    '<tr><td colspan="2" class="diff-empty"></td><td class="diff-marker">+</td>'
+                    '<td class="diff-addedline"><div>%s</div></td></tr>' % text
+                )
+            elif original[i] != text:
+                rows.append(
+                    '<tr><td class="diff-marker">\u2212</td><td class="diff-deletedline"><div>%s</div></td>'
+                    '<td class="diff-marker">+</td><td class="diff-addedline"><div>%s</div></td></tr>' % (original[i], text)
+                )
+
+        return '<table>%s</table>' % ''.join(rows)
+
+    def parse(self):
+
+        self.transport = FakeTransport(self.handler)
+
+        # A saved page without revisions
+        page = {
+            'language' : 'en', 'date' : '2017-02-01T00:00:00Z', 'title' : 'Python', 'sections' : {},
+            'references' : [], 'externallinks' : [], 'previous' : 3
+        }
+        wiki = {'id' : '23862', 'language' : 'en', 'pages' : {'0' : page}}
+
+        return Parse(wiki, languages={'en' : 'Python'}, transport=self.transport, ignore=False)
+
+    def test_first_revision(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=1, mode='wikitext')
+
+        self.assertEqual(wiki.get_differences(revid=1, compare=True), ('', ''))
+
+    def test_saved_predecessor(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext')
+        wiki.extract_revision(revid=3, mode='wikitext')
+
+        differences, original = wiki.get_differences(revid=3, compare=True)
+
+        self.assertEqual(original, ['Python is a programming language.', ''])
+        self.assertEqual(differences, ['Python is a popular programming language.', 'It has a large library.'])
+
+        self.assertEqual(wiki.get_differences(revid=3, words=True), [
+            {'removed' : [], 'added' : ['popular']},
+            {'removed' : [], 'added' : ['It', 'has', 'a', 'large', 'library.']}
+        ])
+
+        # Only the differences of the first revision, whose predecessor is missing, are requested
+        compares = [params['fromrev'] for url, params in self.transport.requests if params.get('action') == 'compare']
+        revids = [params['revids'] for url, params in self.transport.requests if 'revids' in params]
+
+        self.assertEqual(compares, ['2'])
+        self.assertEqual(revids, ['2', '3'])
+
+    def test_missing_predecessor(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=3, mode='wikitext')
+
+        differences, original = wiki.get_differences(revid=3, compare=True)
+
+        self.assertEqual(original, ['Python is a programming language.', ''])
+        self.assertEqual(differences, ['Python is a popular programming language.', 'It has a large library.'])
+
+        # The differences are requested, the predecessor is neither parsed nor saved
+        compares = [params['fromrev'] for url, params in self.transport.requests if params.get('action') == 'compare']
+        revids = [params['revids'] for url, params in self.transport.requests if 'revids' in params]
+
+        self.assertEqual(compares, ['3'])
+        self.assertEqual(revids, ['3'])
+        self.assertFalse(wiki.has_content(revid=2))
+
+    def test_lazy_revision(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext', lazy=True)
+        wiki.extract_revision(revid=3, mode='wikitext', lazy=True)
+
+        differences = wiki.get_differences(revid=3)
+
+        self.assertEqual(differences, ['Python is a popular programming language.', 'It has a large library.'])
+
+    def revisions(self, wiki):
+        return {revision['oldid'] : revision for revision in wiki.get_wiki()['pages'][0]['revisions'].values()}
+
+    def test_lazy_crawl(self):
+
+        wiki = self.parse()
+        wiki.extract_revisions_by_user(username='Alice', mode='wikitext', lazy=True)
+
+        revisions = self.revisions(wiki)
+
+        self.assertEqual(sorted(revisions), ['1', '2', '3'])
+        self.assertTrue(all('payload' in revision for revision in revisions.values()))
+
+        # Comparing a revision does not parse its predecessor
+        differences = wiki.get_differences(revid=3)
+
+        self.assertEqual(differences, ['Python is a popular programming language.', 'It has a large library.'])
+        self.assertIn('payload', self.revisions(wiki)['2'])
+
+    def test_lazy_predecessor(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext', lazy=True)
+        wiki.extract_revision(revid=3, mode='wikitext')
+
+        differences = wiki.get_differences(revid=3)
+
+        self.assertEqual(differences, ['Python is a popular programming language.', 'It has a large library.'])
+        self.assertIn('payload', self.revisions(wiki)['2'])
+
+class MarkupDifferencesTest(unittest.TestCase):
+
+    # The differences are compared after the markup is removed from the wikitext
+    texts = {
+        1 : "'''Python''' is a language.",
+        2 : (
+            "'''Python''' is a [[programming language|language]].<ref>A reference.</ref>\n\n"
+            "{{Infobox language|name=Python}}It was created by [[Guido van Rossum]].\n\n"
+            "== History ==\nPython was released in ''1991''."
+        ),
+        3 : (
+            "'''Python''' is a popular [[programming language|language]].<ref>A reference.</ref>\n\n"
+            "{{Infobox language|name=Python}}It was created by [[Guido van Rossum]].\n\n"
+            "== History ==\nPython was released in ''1991''.[[File:Logo.png|thumb|The logo]]\n\n"
+            "It is named after [[Monty Python]].<!-- not shown -->"
+        )
+    }
+
+    handler = DifferencesTest.handler
+    table = DifferencesTest.table
+    parse = DifferencesTest.parse
+
+    def test_differences(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext')
+        wiki.extract_revision(revid=3, mode='wikitext')
+
+        differences, original = wiki.get_differences(revid=3, compare=True)
+
+        self.assertEqual(original, ['Python is a language.', ''])
+        self.assertEqual(differences, ['Python is a popular language.', 'It is named after Monty Python.'])
+
+        self.assertEqual(wiki.get_differences(revid=3, words=True), [
+            {'removed' : [], 'added' : ['popular']},
+            {'removed' : [], 'added' : ['It', 'is', 'named', 'after', 'Monty', 'Python.']}
+        ])
+
+class InternTest(unittest.TestCase):
+
+    # Revision 2 changes the summary, revision 3 adds a section
+    texts = {
+        1 : (
+            "Python is a language.<ref>A reference.</ref> See [https://www.python.org the website].\n\n"
+            "== History ==\nPython was released in 1991."
+        ),
+        2 : (
+            "Python is a popular language.<ref>A reference.</ref> See [https://www.python.org the website].\n\n"
+            "== History ==\nPython was released in 1991."
+        ),
+        3 : (
+            "Python is a popular language.<ref>A reference.</ref> See [https://www.python.org the website].\n\n"
+            "== History ==\nPython was released in 1991.\n\n== Design ==\nIt is readable."
+        )
+    }
+
+    handler = DifferencesTest.handler
+    table = DifferencesTest.table
+    parse = DifferencesTest.parse
+
+    def revisions(self, wiki):
+        return {revision['oldid'] : revision for revision in wiki._content['pages'][0]['revisions'].values()}
+
+    def test_shared(self):
+
+        wiki = self.parse()
+
+        for revid in (1, 2, 3):
+            wiki.extract_revision(revid=revid, mode='wikitext')
+
+        first, second, third = [self.revisions(wiki)[revid] for revid in ('1', '2', '3')]
+
+        # The summary is changed by revision 2, the history is not changed
+        self.assertIsNot(first['sections'][0], second['sections'][0])
+        self.assertIs(second['sections'][0], third['sections'][0])
+        self.assertIs(first['sections'][1], second['sections'][1])
+        self.assertIs(second['sections'][1], third['sections'][1])
+
+        self.assertIs(first['references'], third['references'])
+        self.assertIs(first['externallinks'], third['externallinks'])
+
+    def test_lazy_revision(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext')
+        wiki.extract_revision(revid=3, mode='wikitext', lazy=True)
+
+        self.assertIn('payload', self.revisions(wiki)['3'])
+
+        # The revision is interned when it is parsed
+        wiki.get_text(revid=3)
+
+        second, third = self.revisions(wiki)['2'], self.revisions(wiki)['3']
+
+        self.assertNotIn('payload', third)
+        self.assertIs(second['sections'][0], third['sections'][0])
+        self.assertIs(second['sections'][1], third['sections'][1])
+        self.assertIs(second['references'], third['references'])
+        self.assertIs(second['externallinks'], third['externallinks'])
+
+    def test_exports(self):
+
+        wiki = self.parse()
+        wiki.extract_revision(revid=2, mode='wikitext')
+        wiki.extract_revision(revid=3, mode='wikitext')
+
+        second, third = wiki.get_page(revid=2), wiki.get_page(revid=3)
+
+        self.assertIsNot(second['sections'][1], third['sections'][1])
+        self.assertIsNot(second['references'], third['references'])
+        self.assertIsInstance(second['references'], list)
+
+        # Changing an export does not change the shared records
+        second['sections'][1]['content'] = 'Changed.'
+        second['references'].append('Another reference.')
+        second['externallinks'].clear()
+
+        self.assertEqual(wiki.get_page(revid=3), third)
+        self.assertEqual(wiki.get_page(revid=2)['sections'][1]['content'], 'Python was released in 1991.')
+        self.assertEqual(wiki.get_references(revid=2), ['A reference.'])
+
+        revisions = wiki.get_wiki()['pages'][0]['revisions']
+
+        self.assertIsNot(revisions[0]['sections'][1], revisions[1]['sections'][1])
+        self.assertEqual(revisions[0]['externallinks'], ['https://www.python.org'])
+
+class WorkersTest(unittest.TestCase):
+
+    def handler(self, url, params):
+        return {'batchcomplete' : '', 'query' : {'pages' : {'23862' : {'pageid' : 23862, 'title' : 'Python'}}}}
+
+    def test_fewer_workers_than_processes(self):
+
+        with ProcessPoolExecutor(2) as processes:
+
+            wiki = Parse(
+                23862, languages={'en' : 'Python'}, transport=FakeTransport(self.handler),
+                processes=processes, ignore=False
+            )
+
+            with self.assertWarns(RuntimeWarning):
+                wiki.extract_revisions_by_user(username='Alice', workers=1)
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', RuntimeWarning)
+                wiki.extract_revisions_by_user(username='Alice', workers=2)
+
+    def test_pool_without_size(self):
+
+        # The number of processes of another pool is not known
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            _check_workers(object(), 1)
+            _check_workers(None, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import importlib.util
+import unittest
+import warnings
+
+from fake import FakeTransport
+from parsewiki.page import Parse
+from reference import pages
+
+class ParsersTest(unittest.TestCase):
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+    def extract(self, html, parser, lists):
+
+        wiki = Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None), parser=parser)
+
+        return wiki._Parse__extract_html(html, lists)
+
+    def test_default(self):
+
+        wiki = Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None))
+
+        self.assertEqual(wiki._parser, 'html.parser')
+
+    @unittest.skipIf(importlib.util.find_spec('lxml') is None, 'lxml is not installed')
+    def test_same_result(self):
+
+        for html in pages:
+            for lists in (True, False):
+
+                result = self.extract(html, 'html.parser', lists)
+
+                self.assertTrue(result['sections'])
+                self.assertEqual(self.extract(html, 'lxml', lists), result, html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import json
+import unittest
+
+from parsewiki.records import Page, Revision, Section, export, numbered
+
+# A saved page with one revision, as it is saved in a json wiki object
+page = {
+    'language' : 'en',
+    'date' : '2017-09-01T00:00:00Z',
+    'title' : 'Python',
+    'sections' : {'0' : {'header' : 'Summary', 'content' : 'Python is a language.'}},
+    'references' : ['A reference.'],
+    'externallinks' : ['https://www.python.org'],
+    'previous' : 99,
+    'revisions' : {
+        '0' : {
+            'oldid' : '100', 'date' : '2017-08-01T00:00:00Z', 'user' : 'Alice', 'comment' : '',
+            'size' : 100, 'empty' : False,
+            'sections' : {'0' : {'header' : 'Summary', 'content' : 'Python is a language.'}},
+            'references' : [], 'externallinks' : [], 'previous' : 0,
+            'differences' : {'original' : [], 'difference' : []}
+        }
+    }
+}
+
+class RecordTest(unittest.TestCase):
+
+    def test_missing_keys(self):
+
+        revision = Revision({'oldid' : '100'})
+
+        # A field which is not set, and a key which is not a field
+        for key in ('user', 'unknown'):
+
+            self.assertNotIn(key, revision)
+            self.assertIsNone(revision.get(key))
+
+            with self.assertRaises(KeyError):
+                revision[key]
+
+            with self.assertRaises(KeyError):
+                del revision[key]
+
+    def test_delete(self):
+
+        revision = Revision({'oldid' : '100', 'user' : 'Alice'})
+        del revision['user']
+
+        self.assertEqual(revision.keys(), ['oldid'])
+
+    def test_extra_keys(self):
+
+        revision = Revision({'note' : 'checked', 'oldid' : '100'})
+
+        self.assertEqual(revision['note'], 'checked')
+        self.assertIn('note', revision)
+
+        # Extra keys follow the fields
+        self.assertEqual(revision.keys(), ['oldid', 'note'])
+        self.assertEqual(len(revision), 2)
+        self.assertEqual(revision.export(), {'oldid' : '100', 'note' : 'checked'})
+
+        del revision['note']
+
+        self.assertEqual(revision.keys(), ['oldid'])
+
+    def test_numbered(self):
+
+        records = numbered({'3' : {'header' : 'A'}, '7' : {'header' : 'B'}}, Section)
+
+        self.assertEqual(list(records), [0, 1])
+        self.assertIs(type(records[1]), Section)
+        self.assertEqual(records[1]['header'], 'B')
+
+        # Records are kept as they are
+        self.assertIs(numbered(records, Section)[0], records[0])
+
+    def test_round_trip(self):
+
+        record = Page(json.loads(json.dumps(page)))
+
+        self.assertIs(type(record['revisions'][0]), Revision)
+        self.assertIs(type(record['revisions'][0]['sections'][0]), Section)
+
+        exported = record.export()
+
+        self.assertEqual(list(exported), list(page))
+        self.assertEqual(list(exported['revisions'][0]), list(page['revisions']['0']))
+        self.assertEqual(json.loads(json.dumps(exported)), page)
+
+    def test_export_tuples(self):
+
+        self.assertEqual(export({0 : Revision({'references' : ('A', 'B')})}), {0 : {'references' : ['A', 'B']}})
+
+if __name__ == '__main__':
+    unittest.main()
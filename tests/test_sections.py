@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import importlib.util
+import random
+import unittest
+import warnings
+
+import bs4 as bs
+
+from fake import FakeTransport
+from parsewiki.page import Parse
+from reference import pages, split_sections
+
+# The lxml parser is only tested if lxml is installed
+if importlib.util.find_spec('lxml') is not None:
+    parsers = ('html.parser', 'lxml')
+else:
+    parsers = ('html.parser',)
+
+# The tags and texts of a random tree of cleared content
+tags = ['p', 'h2', 'li', 'ul', 'dl', 'dd']
+texts = ['alpha', 'beta gamma', 'x&amp;y', ' ', '\n', 'delta  \n epsilon', '']
+
+def tree(depth):
+
+    html = []
+
+    for i in range(random.randint(0, 4)):
+
+        if depth < 3 and random.random() < 0.5:
+            name = random.choice(tags)
+            html.append('<%s>%s</%s>' % (name, tree(depth + 1), name))
+        else:
+            html.append(random.choice(texts))
+
+    return ''.join(html)
+
+class SectionsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+        self.wikis = {
+            parser : Parse(0, languages={'en' : 'Python'}, transport=FakeTransport(None), parser=parser)
+            for parser in parsers
+        }
+
+    def split(self, content, parser):
+        return dict(enumerate(self.wikis[parser]._Parse__split_sections(content)))
+
+    def test_random_trees(self):
+
+        random.seed(14)
+
+        for i in range(2000):
+
+            html = '<div>%s</div>' % tree(0)
+
+            for parser in parsers:
+
+                content = bs.BeautifulSoup(html, parser).find('div')
+
+                self.assertEqual(self.split(content, parser), split_sections(content.decode_contents()), html)
+
+    def test_pages(self):
+
+        for html in pages:
+            for parser in parsers:
+                for lists in (True, False):
+
+                    wiki = self.wikis[parser]
+
+                    content = bs.BeautifulSoup(html, parser).select_one(wiki._css_selector)
+                    content = wiki._Parse__clear_html(content, lists)
+
+                    self.assertEqual(self.split(content, parser), split_sections(content.decode_contents()), html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+from fake import FakeTransport
+from parsewiki.cache import DiskCache, ResultCache
+from parsewiki.page import Parse
+from parsewiki.stats import Stats
+from parsewiki.transport import RetryPolicy, Transport
+
+html = '<div class="mw-parser-output"><p>Python is a language.</p><p>It is popular.</p></div>'
+
+def handler(url, params):
+
+    if params['action'] == 'compare':
+        return {'compare' : {'fromrevid' : 99}}
+
+    return {'parse' : {'revid' : 100, 'text' : {'*' : html}, 'externallinks' : [], 'langlinks' : []}}
+
+class StatsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.events = []
+        self.stats = Stats(callback=lambda event, name, value: self.events.append((event, name, value)))
+
+    def test_requests(self):
+
+        self.stats.request({'action' : 'parse', 'prop' : 'text'}, 100, 0.07)
+        self.stats.request({'action' : 'parse', 'prop' : 'text'}, 50, 0.05)
+        self.stats.request({'action' : 'query', 'list' : 'usercontribs'}, 10, 40)
+        self.stats.request({'action' : 'compare'}, 20, 0.3)
+        self.stats.request(None, 30, 1)
+
+        requests = self.stats.get_stats()['requests']
+
+        # The requests are named by their action and prop (or list)
+        self.assertEqual(sorted(requests), ['compare', 'parse/text', 'query/usercontribs', 'rest'])
+
+        self.assertEqual(requests['parse/text']['count'], 2)
+        self.assertEqual(requests['parse/text']['bytes'], 150)
+        self.assertAlmostEqual(requests['parse/text']['time'], 0.12)
+
+        # Each latency is counted in the first bucket which is not smaller
+        self.assertEqual(requests['parse/text']['latency'][0.05], 1)
+        self.assertEqual(requests['parse/text']['latency'][0.1], 1)
+        self.assertEqual(requests['query/usercontribs']['latency'][float('inf')], 1)
+        self.assertEqual(requests['compare']['latency'][0.5], 1)
+        self.assertEqual(requests['rest']['latency'][1], 1)
+        self.assertEqual(sum(requests['compare']['latency'].values()), 1)
+
+        self.assertEqual(self.events[0], ('request', 'parse/text', {'bytes' : 100, 'latency' : 0.07}))
+        self.assertEqual(len(self.events), 5)
+
+    def test_retries_and_hits(self):
+
+        params = {'action' : 'parse', 'prop' : 'text'}
+
+        self.stats.retry(params, 2)
+        self.stats.retry({'action' : 'compare'}, 4)
+        self.stats.hit('responses', params)
+        self.stats.hit('results')
+        self.stats.hit('results')
+
+        stats = self.stats.get_stats()
+
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['hits'], {'responses' : 1, 'results' : 2})
+        self.assertEqual(stats['requests']['parse/text']['retries'], 1)
+        self.assertEqual(stats['requests']['parse/text']['hits'], 1)
+        self.assertEqual(stats['requests']['parse/text']['count'], 0)
+
+        self.assertEqual(self.events, [
+            ('retry', 'parse/text', 2), ('retry', 'compare', 4),
+            ('hit', 'responses', 1), ('hit', 'results', 1), ('hit', 'results', 1)
+        ])
+
+    def test_stages(self):
+
+        with mock.patch('parsewiki.stats.time.perf_counter', side_effect=[10.0, 10.5, 20.0, 20.25]):
+
+            with self.stats.timer('soup'):
+                pass
+
+            # The time is counted when the stage fails as well
+            with self.assertRaises(KeyError):
+                with self.stats.timer('soup'):
+                    raise KeyError()
+
+        self.stats.stage('sections', 2)
+
+        self.assertEqual(self.stats.get_stats()['stages'], {
+            'soup' : {'count' : 2, 'time' : 0.75}, 'sections' : {'count' : 1, 'time' : 2}
+        })
+        self.assertEqual(self.events, [('stage', 'soup', 0.5), ('stage', 'soup', 0.25), ('stage', 'sections', 2)])
+
+    def test_copy(self):
+
+        self.stats.request({'action' : 'compare'}, 20, 0.3)
+        self.stats.stage('soup', 1)
+
+        # The figures are copied, so they are not changed by later events
+        stats = self.stats.get_stats()
+
+        self.stats.request({'action' : 'compare'}, 20, 0.3)
+        self.stats.stage('soup', 1)
+
+        self.assertEqual(stats['requests']['compare']['count'], 1)
+        self.assertEqual(stats['requests']['compare']['latency'][0.5], 1)
+        self.assertEqual(stats['stages']['soup']['count'], 1)
+
+        self.stats.reset()
+
+        self.assertEqual(self.stats.get_stats(), {'requests' : {}, 'retries' : 0, 'hits' : {}, 'stages' : {}})
+
+class ParseStatsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        warnings.simplefilter('ignore', DeprecationWarning)
+
+        self.folder = tempfile.mkdtemp()
+        self.events = []
+        self.stats = Stats(callback=lambda event, name, value: self.events.append((event, name)))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def parse(self, transport, **kwargs):
+        return Parse(23862, languages={'en' : 'Python'}, transport=transport, stats=self.stats, ignore=False, **kwargs)
+
+    def test_extract(self):
+
+        transport = FakeTransport(handler, latency=0.2)
+
+        self.parse(transport).extract()
+
+        stats = self.stats.get_stats()
+        parse = stats['requests']['parse/text|externallinks|langlinks']
+
+        self.assertEqual(sorted(stats['requests']), ['compare', 'parse/text|externallinks|langlinks'])
+        self.assertEqual(parse['count'], 1)
+        self.assertEqual(parse['bytes'], len(json.dumps(handler(None, {'action' : 'parse'}))))
+        self.assertEqual(parse['latency'][0.25], 1)
+        self.assertEqual(stats['retries'], 0)
+        self.assertEqual(stats['hits'], {})
+
+        # The page is parsed once
+        for stage in ('soup', 'references', 'clear_html', 'sections'):
+            self.assertEqual(stats['stages'][stage]['count'], 1, stage)
+
+        self.assertEqual(self.events[:2], [('request', 'parse/text|externallinks|langlinks'), ('request', 'compare')])
+        self.assertEqual(sorted(event for event in self.events if event[0] == 'stage'), [
+            ('stage', 'clear_html'), ('stage', 'references'), ('stage', 'sections'), ('stage', 'soup')
+        ])
+
+    def test_cache_hits(self):
+
+        cache = DiskCache(os.path.join(self.folder, 'cache.db'))
+        self.addCleanup(cache.close)
+
+        results = ResultCache()
+
+        for i in range(2):
+            self.parse(FakeTransport(handler), cache=cache, results=results).extract()
+
+        stats = self.stats.get_stats()
+
+        # The responses are requested once, the page is parsed once
+        self.assertEqual(stats['hits'], {'responses' : 2, 'results' : 1})
+        self.assertEqual(stats['requests']['compare'], dict(stats['requests']['compare'], count=1, hits=1))
+        self.assertEqual(stats['requests']['parse/text|externallinks|langlinks']['count'], 1)
+        self.assertEqual(stats['stages']['soup']['count'], 1)
+
+        self.assertEqual(self.events.count(('hit', 'responses')), 2)
+        self.assertEqual(self.events.count(('hit', 'results')), 1)
+
+    def test_retries(self):
+
+        responses = [(503, None), (200, handler(None, {'action' : 'parse'})), (200, handler(None, {'action' : 'compare'}))]
+
+        class Response:
+
+            def __init__(self, status, data):
+
+                self.status_code = status
+                self.headers = {}
+                self.data = data
+                self.content = json.dumps(data).encode('utf8')
+                self.elapsed = datetime.timedelta(milliseconds=10)
+
+            def json(self):
+                return self.data
+
+        session = mock.Mock()
+        session.get.side_effect = lambda url, params=None, timeout=None: Response(*responses.pop(0))
+
+        transport = Transport(policy=RetryPolicy())
+        transport._session = session
+
+        with mock.patch('parsewiki.transport.time.sleep'), mock.patch('parsewiki.transport.random.uniform', lambda low, high: high):
+            self.parse(transport).extract()
+
+        stats = self.stats.get_stats()
+        parse = stats['requests']['parse/text|externallinks|langlinks']
+
+        # Each attempt is counted
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(parse['count'], 2)
+        self.assertEqual(parse['retries'], 1)
+        self.assertEqual(parse['latency'][0.05], 2)
+        self.assertEqual(stats['requests']['compare']['retries'], 0)
+
+        self.assertEqual(self.events[:3], [
+            ('request', 'parse/text|externallinks|langlinks'), ('retry', 'parse/text|externallinks|langlinks'),
+            ('request', 'parse/text|externallinks|langlinks')
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
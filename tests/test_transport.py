@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import datetime
+import email.utils
+import unittest
+from unittest import mock
+
+import requests
+
+from parsewiki.stats import Stats
+from parsewiki.transport import RetryPolicy, Transport
+
+url = 'https://en.wikipedia.org/w/api.php'
+
+class Response:
+    """
+    This class stubs the response of a requests session
+    """
+
+    def __init__(self, status, data, headers=None):
+
+        self.status_code = status
+        self.headers = headers or {}
+        self.content = b'{}'
+        self.elapsed = datetime.timedelta(milliseconds=10)
+        self.data = data
+
+    def json(self):
+        return self.data
+
+class Session:
+    """
+    This class stubs a requests session, which returns the responses (or raises the 
+    exceptions) in order
+    """
+
+    def __init__(self, responses):
+
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+
+        self.requests.append(params)
+        response = self.responses.pop(0)
+
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+    def close(self):
+        pass
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+
+        # The longest delay of the random jitter
+        patcher = mock.patch('parsewiki.transport.random.uniform', lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_backoff(self):
+
+        policy = RetryPolicy(retries=5, backoff=1, backoff_max=10)
+
+        self.assertEqual([policy.delay(attempt, 503) for attempt in range(6)], [1, 2, 4, 8, 10, None])
+
+    def test_status(self):
+
+        policy = RetryPolicy()
+
+        for status in (429, 500, 502, 503, 504):
+            self.assertEqual(policy.delay(0, status), 1)
+
+        for status in (200, 400, 403, 404):
+            self.assertIsNone(policy.delay(0, status))
+
+        # A connection error is retried
+        self.assertEqual(policy.delay(0), 1)
+
+    def test_retry_budget(self):
+
+        policy = RetryPolicy(retries=2)
+
+        self.assertIsNotNone(policy.delay(1, 503))
+        self.assertIsNone(policy.delay(2, 503))
+        self.assertIsNone(policy.delay(2))
+
+        self.assertIsNone(RetryPolicy(retries=0).delay(0, 503))
+
+    def test_retry_after(self):
+
+        policy = RetryPolicy(backoff=1, backoff_max=60)
+
+        self.assertEqual(policy.delay(0, 429, {'Retry-After' : '30'}), 30)
+        self.assertEqual(policy.delay(0, 429, {'Retry-After' : '0'}), 1)
+        self.assertEqual(policy.delay(0, 429, {'Retry-After' : '600'}), 60)
+        self.assertEqual(policy.delay(0, 429, {'Retry-After' : 'invalid'}), 1)
+
+        date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=20)
+        delay = policy.delay(0, 503, {'Retry-After' : email.utils.format_datetime(date)})
+
+        self.assertTrue(15 < delay <= 20)
+
+    def test_maxlag(self):
+
+        policy = RetryPolicy(maxlag=5)
+
+        self.assertEqual(policy.params({'action' : 'query'}), {'action' : 'query', 'maxlag' : 5})
+        self.assertEqual(policy.params({'action' : 'query', 'maxlag' : 1}), {'action' : 'query', 'maxlag' : 1})
+        self.assertIsNone(policy.params(None))
+        self.assertEqual(RetryPolicy().params({'action' : 'query'}), {'action' : 'query'})
+
+        # The API refuses a lagged request with status code 200
+        lagged = {'error' : {'code' : 'maxlag', 'info' : 'Waiting for a database server'}}
+
+        self.assertEqual(policy.delay(0, 200, {'Retry-After' : '5'}, lagged), 5)
+        self.assertIsNone(policy.delay(0, 200, {}, {'error' : {'code' : 'badvalue'}}))
+
+    def test_token_bucket(self):
+
+        now = [0.0]
+        policy = RetryPolicy(rate=2, burst=2)
+
+        with mock.patch('parsewiki.transport.time.monotonic', lambda: now[0]):
+
+            # The burst is send at once, the next requests at the rate
+            self.assertEqual([policy.wait(url) for i in range(4)], [0, 0, 0.5, 1.0])
+
+            # Each host has its own bucket
+            self.assertEqual(policy.wait('https://de.wikipedia.org/w/api.php'), 0)
+
+            now[0] = 3.0
+
+            # The bucket is refilled, but never above the burst
+            self.assertEqual([policy.wait(url) for i in range(3)], [0, 0, 0.5])
+
+        self.assertEqual(RetryPolicy().wait(url), 0)
+
+class TransportTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.sleeps = []
+
+        patcher = mock.patch('parsewiki.transport.time.sleep', self.sleeps.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch('parsewiki.transport.random.uniform', lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def transport(self, responses, **kwargs):
+
+        transport = Transport(policy=RetryPolicy(**kwargs))
+        transport._session = Session(responses)
+
+        return transport
+
+    def test_retry(self):
+
+        transport = self.transport([
+            Response(503, None), Response(429, None, {'Retry-After' : '7'}), Response(200, {'query' : {}})
+        ])
+
+        stats = Stats()
+
+        self.assertEqual(transport.get_json(url, {'action' : 'query'}, stats), (200, {'query' : {}}))
+        self.assertEqual(self.sleeps, [1, 7])
+        self.assertEqual(len(transport._session.requests), 3)
+
+        # Each attempt is counted
+        self.assertEqual(stats.get_stats()['requests']['query']['count'], 3)
+        self.assertEqual(stats.get_stats()['retries'], 2)
+
+    def test_retry_budget(self):
+
+        transport = self.transport([Response(503, None)] * 3, retries=2)
+
+        self.assertEqual(transport.get_json(url, {'action' : 'query'}), (503, None))
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_connection_error(self):
+
+        transport = self.transport([requests.ConnectionError()] * 2 + [Response(200, {})], retries=2)
+
+        self.assertEqual(transport.get_json(url, {'action' : 'query'}), (200, {}))
+
+        transport = self.transport([requests.Timeout()] * 3, retries=2)
+
+        with self.assertRaises(requests.Timeout):
+            transport.get_json(url, {'action' : 'query'})
+
+    def test_maxlag(self):
+
+        lagged = {'error' : {'code' : 'maxlag'}}
+
+        transport = self.transport([Response(200, lagged), Response(200, {'query' : {}})], maxlag=5)
+
+        self.assertEqual(transport.get_json(url, {'action' : 'query'}), (200, {'query' : {}}))
+        self.assertEqual(transport._session.requests, [{'action' : 'query', 'maxlag' : 5}] * 2)
+
+    def test_rate(self):
+
+        now = [0.0]
+
+        transport = self.transport([Response(200, {})] * 3, rate=1, burst=1)
+
+        with mock.patch('parsewiki.transport.time.monotonic', lambda: now[0]):
+            for i in range(3):
+                transport.get_json(url, {'action' : 'query'})
+
+        self.assertEqual(self.sleeps, [1.0, 2.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+@author: jdevreeze
+"""
+
+import unittest
+
+from parsewiki.wikitext import Wikitext
+
+class WikitextTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wikitext = Wikitext()
+
+    def text(self, content, lists=True):
+        return [
+            (section['header'], section['content'])
+            for section in self.wikitext.parse(content, lists)['sections'].values()
+        ]
+
+    def test_templates(self):
+
+        content = 'Python{{Infobox|name=x|{{nested|a}}}} is {{lang|de|Schlange}} {{convert|5|km|mi}} big.{{citation needed}}'
+
+        self.assertEqual(self.text(content), [('Summary', 'Python is Schlange 5 km big.')])
+
+    def test_tables(self):
+
+        content = 'Before\n{| class=wikitable\n|-\n| cell {{x}}\n|}\nAfter'
+
+        self.assertEqual(self.text(content), [('Summary', 'Before\nAfter')])
+
+    def test_unclosed_template_is_text(self):
+
+        self.assertEqual(self.text('A {{unclosed'), [('Summary', 'A {{unclosed')])
+
+    def test_references(self):
+
+        content = (
+            'A<ref name="a">{{cite web |last=Doe |first=J |title=T |website=W |date=2017}}</ref> '
+            'B<ref name="a"/> C<ref>Plain [[Link|text]]</ref><ref name=b/>'
+        )
+
+        result = self.wikitext.parse(content)
+
+        # A named reference is listed once, a reuse without content is left out
+        self.assertEqual(result['references'], ['Doe, J (2017). "T". W.', 'Plain text'])
+        self.assertEqual(result['sections'][0]['content'], 'A B C')
+
+    def test_links(self):
+
+        content = (
+            'See [[Guido van Rossum|Guido]] and [[Monty Python]]s, [[File:x.png|thumb|cap [[y]]]] '
+            '[[Category:X]] [[de:Python]] [[Help:Pipe (x)|]] [https://python.org site] https://a.org/b'
+        )
+
+        result = self.wikitext.parse(content)
+
+        self.assertEqual(result['sections'][0]['content'], 'See Guido and Monty Pythons, Pipe site https://a.org/b')
+        self.assertEqual(result['externallinks'], ['https://python.org', 'https://a.org/b'])
+
+    def test_headers(self):
+
+        content = (
+            "Intro ''text'' '''bold'''.\n\n== History ==\nOld.\n=== Sub ===\nMore.\n"
+            "==== Deep ====\nX\n== Empty ==\n\n== End ==\nLast <b>one</b> &amp; &lt;x&gt;"
+        )
+
+        # Level 3 headings are removed, deeper headings are text, and empty sections are left out
+        self.assertEqual(self.text(content), [
+            ('Summary', 'Intro text bold.'),
+            ('History', 'Old.\nMore.\nDeep\nX'),
+            ('End', 'Last one &amp; &lt;x&gt;')
+        ])
+
+    def test_lists(self):
+
+        content = 'Intro\n* one\n# two\n: three\n; four\nText\nnext line\n\npara'
+
+        self.assertEqual(self.text(content), [('Summary', 'Intro\none\ntwo\nthree\nfour\nText next line\npara')])
+        self.assertEqual(self.text(content, lists=False), [('Summary', 'Intro\nText next line\npara')])
+
+    def test_comments_and_blocks(self):
+
+        content = 'A<!-- hidden -->B __NOTOC__ <math>x^2</math> C<gallery>\nx.png\n</gallery>'
+
+        self.assertEqual(self.text(content), [('Summary', 'AB C')])
+
+if __name__ == '__main__':
+    unittest.main()